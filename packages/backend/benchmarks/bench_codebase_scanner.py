@@ -0,0 +1,113 @@
+"""
+Benchmark — codebase scanner file collection on a synthetic tree.
+
+Compares the previous `sorted(root.rglob("*"))` implementation against the
+pruned os.scandir walker in services/codebase_scanner.py.
+
+Usage (from packages/backend):
+    python benchmarks/bench_codebase_scanner.py                 # 1M files in a temp dir
+    python benchmarks/bench_codebase_scanner.py --files 100000
+    python benchmarks/bench_codebase_scanner.py --tree /tmp/scan-tree --keep
+
+The synthetic tree mimics a real monorepo: most files live in skip dirs
+(node_modules, .git, target, build) and only a small share is source.
+Generating 1M files takes a few minutes; pass --tree/--keep to reuse it.
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.codebase_scanner import _SKIP_DIRS, _collect_files  # noqa: E402
+
+# Share of files per top-level area
+_LAYOUT = [
+    ("node_modules", 0.60),
+    (".git/objects", 0.15),
+    ("target/debug", 0.10),
+    ("build", 0.05),
+    ("src", 0.10),
+]
+_FILES_PER_DIR = 100
+
+
+def _collect_files_rglob(project_path: str, max_files: int = 200) -> list[str]:
+    """The previous implementation, kept here as the baseline."""
+    root = Path(project_path)
+    files: list[str] = []
+    for item in sorted(root.rglob("*")):
+        if item.is_dir():
+            continue
+        parts = item.relative_to(root).parts
+        if any(p in _SKIP_DIRS for p in parts):
+            continue
+        if any(p.startswith(".") and p != ".alchemistral" for p in parts):
+            continue
+        files.append(str(item.relative_to(root)))
+        if len(files) >= max_files:
+            break
+    return files
+
+
+def build_tree(root: Path, total: int) -> None:
+    """Create `total` empty files spread over the layout, 100 files per directory."""
+    marker = root / ".bench-files"
+    if marker.exists() and marker.read_text() == str(total):
+        print(f"Reusing synthetic tree at {root} ({total:,} files)")
+        return
+    if root.exists():
+        shutil.rmtree(root)
+    print(f"Generating {total:,} files under {root} ...")
+    start = time.perf_counter()
+    for area, share in _LAYOUT:
+        count = int(total * share)
+        for i in range(0, count, _FILES_PER_DIR):
+            d = root / area / f"pkg{i // 10_000}" / f"mod{i // _FILES_PER_DIR}"
+            d.mkdir(parents=True, exist_ok=True)
+            for j in range(min(_FILES_PER_DIR, count - i)):
+                (d / f"file{j}.ts").touch()
+    (root / "package.json").write_text("{}")
+    marker.write_text(str(total))
+    print(f"  generated in {time.perf_counter() - start:.1f}s")
+
+
+def _time(fn, path: str, max_files: int, repeat: int) -> tuple[float, list[str]]:
+    best = float("inf")
+    result: list[str] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(path, max_files)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1_000_000, help="synthetic tree size")
+    parser.add_argument("--tree", type=str, default="", help="directory for the synthetic tree")
+    parser.add_argument("--keep", action="store_true", help="keep the tree after the run")
+    parser.add_argument("--max-files", type=int, default=200, help="scanner file cap")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per implementation (best is reported)")
+    args = parser.parse_args()
+
+    root = Path(args.tree) if args.tree else Path(tempfile.mkdtemp(prefix="alch-scan-bench-"))
+    try:
+        build_tree(root, args.files)
+        old_s, old_files = _time(_collect_files_rglob, str(root), args.max_files, args.repeat)
+        new_s, new_files = _time(_collect_files, str(root), args.max_files, args.repeat)
+
+        print(f"rglob + sort : {old_s * 1000:10.1f} ms  ({len(old_files)} files)")
+        print(f"scandir walk : {new_s * 1000:10.1f} ms  ({len(new_files)} files)")
+        print(f"speedup      : {old_s / new_s:10.1f}x")
+        print(f"same result  : {old_files == new_files}")
+    finally:
+        if not args.keep and not args.tree:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
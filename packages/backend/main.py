@@ -1,10 +1,12 @@
+import asyncio
 import logging
 import os
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 
 # Load the .env file that lives next to this file, regardless of cwd.
@@ -14,7 +16,10 @@ load_dotenv(_env_path, override=True)
 
 # Confirm the key is present at startup so misconfiguration is obvious.
 _key = os.getenv("MISTRAL_API_KEY", "")
-logging.basicConfig(level=logging.INFO)
+# Queue-based logging: records are written by a background thread, not the event loop
+from services import log_pipeline
+
+log_pipeline.configure()
 _log = logging.getLogger("alchemistral")
 if _key:
     _log.info("MISTRAL_API_KEY loaded: %s…", _key[:8])
@@ -37,9 +42,46 @@ from routers import projects, memory
 from routers.orchestrator import router as orchestrator_router
 from routers.settings import router as settings_router
 from routers.agents import router as agents_router
+from routers.code_index import router as code_index_router
+from routers.admin import router as admin_router
+from services.agent_manager import agent_manager
+from services import loop_monitor, metrics
+from services.agent_resources import AGENT_SAMPLE_INTERVAL
+from services.git_runner import git_runner
+from services.process_supervisor import supervisor
+from services.project_watcher import watch_manager
+from services.worktree_gc import GC_INTERVAL, gc_loop
 from ws_manager import manager
 
-app = FastAPI(title="Alchemistral", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Agent process groups a crashed or killed previous run left behind
+    supervisor.reap_orphans()
+    # Record event-loop stalls with the stack that caused them
+    if loop_monitor.LOOP_LAG_THRESHOLD_MS > 0:
+        loop_monitor.monitor.start()
+    # Background worktree/branch garbage collector
+    gc_task = asyncio.create_task(gc_loop()) if GC_INTERVAL > 0 else None
+    # Per-agent CPU / memory / I/O sampling, published over the WebSocket
+    resource_task = (
+        asyncio.create_task(agent_manager.resource_loop(manager.broadcast))
+        if AGENT_SAMPLE_INTERVAL > 0 else None
+    )
+    yield
+    if gc_task:
+        gc_task.cancel()
+    if resource_task:
+        resource_task.cancel()
+    watch_manager.stop_all()
+    loop_monitor.monitor.stop()
+    await agent_manager.shutdown()
+    await git_runner.close()
+    # Last: the shutdown steps above still log
+    log_pipeline.shutdown()
+
+
+app = FastAPI(title="Alchemistral", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -59,6 +101,8 @@ app.include_router(memory.router)
 app.include_router(orchestrator_router)
 app.include_router(settings_router)
 app.include_router(agents_router)
+app.include_router(code_index_router)
+app.include_router(admin_router)
 
 
 @app.get("/health")
@@ -66,6 +110,12 @@ async def health():
     return {"status": "ok", "version": "0.1.0"}
 
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus scrape endpoint."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
     await manager.connect(ws)
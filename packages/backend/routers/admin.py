@@ -0,0 +1,52 @@
+"""
+Admin router — runtime diagnostics: event-loop lag episodes and a sampling profiler.
+"""
+import asyncio
+import logging
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from services import loop_monitor
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/loop-lag")
+async def loop_lag(limit: int = 50):
+    """Blocking episodes of the event loop (newest first), each with the stack it was stuck in."""
+    return {**loop_monitor.monitor.stats(), "recent": loop_monitor.monitor.episodes(limit)}
+
+
+@router.post("/profile")
+async def run_profile(
+    seconds: float = 5.0,
+    interval_ms: float = 5.0,
+    threads: str = "loop",
+    format: str = "collapsed",
+):
+    """
+    Sample the live server's stacks for `seconds` (capped at PROFILE_MAX_SECONDS).
+
+    threads: "loop" (the event loop thread) or "all".
+    format: "collapsed" (text, one "a;b;c count" line per stack — feed it to
+    flamegraph.pl or speedscope) or "json".
+    """
+    if threads not in ("loop", "all") or format not in ("collapsed", "json"):
+        raise HTTPException(400, "threads must be loop|all and format collapsed|json")
+    try:
+        result = await asyncio.to_thread(
+            loop_monitor.profile, seconds, interval_ms, threads == "all",
+        )
+    except RuntimeError as exc:
+        raise HTTPException(409, str(exc))
+    logger.info(f"[admin] Profiled {result['seconds']}s: {result['samples']} samples, {len(result['stacks'])} stacks")
+    if format == "collapsed":
+        return PlainTextResponse(loop_monitor.collapsed_text(result["stacks"]))
+    return {
+        "samples": result["samples"],
+        "seconds": result["seconds"],
+        "stacks": [{"stack": s, "count": n} for s, n in result["stacks"].most_common()],
+    }
@@ -0,0 +1,48 @@
+"""
+Code index router — query a project's symbol and import-graph index.
+"""
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException
+
+from services.alchemistral import get_project
+from services.symbol_index import SymbolIndex
+
+router = APIRouter(prefix="/api/projects", tags=["index"])
+
+
+def _index(project_id: str) -> SymbolIndex:
+    project = get_project(project_id)
+    if not project:
+        raise HTTPException(404, f"Project not found: {project_id}")
+    return SymbolIndex.load(Path(project["local_path"]) / ".alchemistral")
+
+
+@router.get("/{project_id}/index")
+async def index_stats(project_id: str):
+    """File, symbol and import-edge counts plus the most-imported modules."""
+    index = _index(project_id)
+    return {
+        **index.stats(),
+        "most_imported": [{"path": p, "importers": n} for p, n in index.most_imported()],
+    }
+
+
+@router.get("/{project_id}/index/symbols")
+async def find_symbols(project_id: str, q: str, limit: int = 50):
+    """Search top-level symbols by name (case-insensitive substring)."""
+    return _index(project_id).find_symbols(q, limit=limit)
+
+
+@router.get("/{project_id}/index/files")
+async def file_info(project_id: str, path: str):
+    """Symbols, imports and importers of one indexed file."""
+    index = _index(project_id)
+    if path not in index.files:
+        raise HTTPException(404, f"File not indexed: {path}")
+    return {
+        "path": path,
+        "symbols": index.symbols_in(path),
+        "imports": index.imports_of(path),
+        "imported_by": index.importers_of(path),
+    }
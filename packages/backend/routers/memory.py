@@ -104,7 +104,7 @@ async def list_contracts(project_id: str):
     return [
         {"file": f.name, "size": f.stat().st_size, "modified": f.stat().st_mtime}
         for f in sorted(contracts_dir.iterdir())
-        if f.is_file()
+        if f.is_file() and not f.name.startswith(".")
     ]
 
 
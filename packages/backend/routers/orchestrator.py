@@ -1,23 +1,33 @@
 """
-Orchestrator router — reprompt, orchestrate, and mission endpoints.
+Orchestrator router — reprompt, orchestrate, and mission (start / cancel / trace) endpoints.
 """
 import asyncio
 import logging
+import uuid
+from datetime import datetime, timezone
 from pathlib import Path
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+from services.agent_manager import agent_manager
+from services import tracing
 from services.alchemistral import get_project
 from services.reprompt import reprompt as _reprompt
 from services.orchestrator import orchestrate as _orchestrate
 from services.pipeline import run_mission
+from services.project_context import load_context, read_text
+from services.retrieval import select_context
 from ws_manager import manager
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/projects", tags=["orchestrator"])
 
+# Running mission pipeline per project, for cancellation
+_missions: dict[str, asyncio.Task] = {}
+
 
 class MessageRequest(BaseModel):
     message: str
@@ -39,7 +49,7 @@ def _get_alch(project_id: str) -> Path:
 async def reprompt_endpoint(project_id: str, req: MessageRequest):
     """Refine a developer message. Returns original + refined text."""
     alch = _get_alch(project_id)
-    global_md = (alch / "GLOBAL.md").read_text() if (alch / "GLOBAL.md").exists() else ""
+    global_md = read_text(alch / "GLOBAL.md")
     refined = await _reprompt(req.message, global_md)
     return {"original": req.message, "refined": refined}
 
@@ -50,15 +60,16 @@ async def reprompt_endpoint(project_id: str, req: MessageRequest):
 async def orchestrate_endpoint(project_id: str, req: MessageRequest):
     """Run orchestrator on a refined prompt. Returns full DAG plan."""
     alch = _get_alch(project_id)
-    global_md = (alch / "GLOBAL.md").read_text() if (alch / "GLOBAL.md").exists() else ""
-    arch_json = (alch / "architecture.json").read_text() if (alch / "architecture.json").exists() else "{}"
-    contracts_dir = alch / "contracts"
-    contract_texts: list[str] = []
-    if contracts_dir.exists():
-        for f in sorted(contracts_dir.iterdir()):
-            if f.is_file():
-                contract_texts.append(f"=== {f.name} ===\n{f.read_text()}")
-    result = await _orchestrate(req.message, global_md, arch_json, contract_texts)
+    context = load_context(alch)
+    relevant_files = await asyncio.to_thread(select_context, str(alch.parent), req.message)
+    result = await _orchestrate(
+        req.message,
+        context.global_md,
+        context.architecture,
+        context.contract_texts,
+        context.codebase_summary,
+        relevant_files,
+    )
     return result
 
 
@@ -73,5 +84,48 @@ async def mission_endpoint(project_id: str, req: MessageRequest):
     project = get_project(project_id)
     if not project:
         raise HTTPException(404, f"Project not found: {project_id}")
-    asyncio.create_task(run_mission(project_id, req.message, manager.broadcast))
-    return {"status": "started"}
+    mission_id = uuid.uuid4().hex[:12]
+    task = asyncio.create_task(run_mission(project_id, req.message, manager.broadcast, mission_id))
+    _missions[project_id] = task
+    task.add_done_callback(lambda t: _missions.pop(project_id, None) if _missions.get(project_id) is t else None)
+    return {"status": "started", "mission_id": mission_id}
+
+
+@router.post("/{project_id}/mission/cancel")
+async def cancel_mission_endpoint(project_id: str):
+    """Stop the project's running mission and kill its agents (whole process groups)."""
+    task = _missions.pop(project_id, None)
+    if task and not task.done():
+        task.cancel()
+    killed = await agent_manager.kill_project_agents(project_id, "Mission cancelled")
+    if task is None and not killed:
+        raise HTTPException(404, f"No running mission for project: {project_id}")
+    await manager.broadcast({
+        "agent_id": "orchestrator",
+        "type": "mission_cancelled",
+        "project_id": project_id,
+        "killed": killed,
+        "text": f"Mission cancelled — {len(killed)} agent{'s' if len(killed) != 1 else ''} killed",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    })
+    return {"status": "cancelled", "killed": killed}
+
+
+# ── Mission traces ───────────────────────────────────────────────────────────
+
+@router.get("/{project_id}/missions")
+async def list_missions_endpoint(project_id: str):
+    """Recent missions of the project that have a trace, newest first."""
+    return tracing.list_traces(project_id)
+
+
+@router.get("/{project_id}/missions/{mission_id}/trace")
+async def mission_trace_endpoint(project_id: str, mission_id: str):
+    """The mission's span timeline as Chrome trace-event JSON (open in ui.perfetto.dev)."""
+    trace = tracing.get_trace(mission_id)
+    if trace is None or trace.project_id != project_id:
+        raise HTTPException(404, f"No trace for mission: {mission_id}")
+    return JSONResponse(
+        trace.to_chrome(),
+        headers={"Content-Disposition": f'attachment; filename="mission-{mission_id}.trace.json"'},
+    )
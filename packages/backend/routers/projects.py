@@ -1,8 +1,10 @@
 """
-Projects router — CRUD for named projects stored in ~/.alchemistral/projects.json
+Projects router — CRUD for named projects stored in ~/.alchemistral/projects.db
 """
 import asyncio
 import logging
+import os
+import shutil
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
@@ -13,14 +15,18 @@ from pydantic import BaseModel
 logger = logging.getLogger(__name__)
 
 from services.alchemistral import (
+    add_project,
     get_project,
     init_alchemistral_dir,
     load_projects,
-    save_projects,
+    remove_project,
 )
 from services.codebase_scanner import scan_and_generate_global
 from services.agent_manager import agent_manager
+from services.git_runner import git_runner
+from services.project_watcher import list_dir, watch_manager
 from services.worktree import list_worktrees, _run_git
+from services.worktree_gc import collect_project
 from ws_manager import manager as ws_manager
 
 router = APIRouter(prefix="/api/projects", tags=["projects"])
@@ -95,9 +101,7 @@ async def create_project(req: CreateProjectRequest):
         "status": "idle",
     }
 
-    projects = load_projects()
-    projects.append(project)
-    save_projects(projects)
+    add_project(project)
     return project
 
 
@@ -109,10 +113,14 @@ async def get_project_by_id(project_id: str):
     return project
 
 
+def _remove_dirs(paths: list[str]) -> None:
+    for path in paths:
+        shutil.rmtree(path, ignore_errors=True)
+
+
 @router.delete("/{project_id}")
 async def delete_project(project_id: str):
-    projects = load_projects()
-    project = next((p for p in projects if p["id"] == project_id), None)
+    project = get_project(project_id)
     if not project:
         raise HTTPException(404, f"Project not found: {project_id}")
 
@@ -120,39 +128,44 @@ async def delete_project(project_id: str):
     errors: list[str] = []
 
     if local_path and Path(local_path).exists():
-        # 1. Remove all git worktrees
+        # 1. Remove all git worktrees — drop the checkouts, then one prune
+        #    clears their metadata instead of a `worktree remove` per agent
         try:
             worktrees = await list_worktrees(local_path)
-            for wt in worktrees:
-                wt_path = wt.get("path", "")
-                # Skip the main worktree (the project root itself)
-                if wt_path == local_path:
-                    continue
-                rc, _, err = await _run_git(local_path, "worktree", "remove", wt_path, "--force")
+            root = Path(local_path).resolve()
+            # The first entry is always the main worktree (the project root itself)
+            doomed = [
+                wt["path"] for wt in worktrees[1:]
+                if wt.get("path") and Path(wt["path"]).resolve() != root
+            ]
+            # Checkouts may hold node_modules/venvs — delete them off the event loop
+            await asyncio.to_thread(_remove_dirs, doomed)
+            if len(worktrees) > 1:
+                rc, _, err = await _run_git(local_path, "worktree", "prune")
                 if rc != 0:
-                    errors.append(f"worktree remove {wt_path}: {err.strip()}")
+                    errors.append(f"worktree prune: {err.strip()}")
         except Exception as exc:
             errors.append(f"worktree cleanup: {exc}")
 
-        # 2. Delete all agent/* branches
+        # 2. Delete all agent/* branches in one update-ref transaction
         try:
-            rc, out, _ = await _run_git(local_path, "branch", "--list", "agent/*")
-            if rc == 0 and out.strip():
-                for line in out.strip().splitlines():
-                    branch = line.strip().lstrip("* ")
-                    if branch:
-                        rc2, _, err2 = await _run_git(local_path, "branch", "-D", branch)
-                        if rc2 != 0:
-                            errors.append(f"branch -D {branch}: {err2.strip()}")
+            rc, out, _ = await _run_git(
+                local_path, "for-each-ref", "--format=%(refname:short)", "refs/heads/agent/",
+            )
+            branches = [b for b in out.split() if b] if rc == 0 else []
+            if branches:
+                rc2, _, err2 = await git_runner.delete_branches(local_path, branches)
+                if rc2 != 0:
+                    errors.append(f"delete agent branches (update-ref): {err2.strip()}")
         except Exception as exc:
             errors.append(f"branch cleanup: {exc}")
+        await git_runner.close(local_path)
 
         # 3. Remove .worktrees/ directory
-        import shutil
         wt_dir = Path(local_path) / ".worktrees"
         if wt_dir.exists():
             try:
-                shutil.rmtree(wt_dir)
+                await asyncio.to_thread(shutil.rmtree, wt_dir)
             except Exception as exc:
                 errors.append(f"rmtree .worktrees: {exc}")
 
@@ -160,23 +173,55 @@ async def delete_project(project_id: str):
         alch_dir = Path(local_path) / ".alchemistral"
         if alch_dir.exists():
             try:
-                shutil.rmtree(alch_dir)
+                await asyncio.to_thread(shutil.rmtree, alch_dir)
             except Exception as exc:
                 errors.append(f"rmtree .alchemistral: {exc}")
 
+    watch_manager.stop(project_id)
+
     # 5. Clear agents for this project from agent_manager
     if project_id in agent_manager._agents:
         del agent_manager._agents[project_id]
 
-    # 6. Remove from projects.json
-    save_projects([p for p in projects if p["id"] != project_id])
+    # 6. Remove from the project registry
+    remove_project(project_id)
 
     return {"status": "deleted", "errors": errors if errors else None}
 
 
+@router.post("/{project_id}/rescan")
+async def rescan_project(project_id: str):
+    """
+    Incremental rescan: re-read only changed files, refresh codebase-summary.md,
+    and regenerate GLOBAL.md only if the summary changed. Events stream via WebSocket.
+    """
+    project = get_project(project_id)
+    if not project:
+        raise HTTPException(404, f"Project not found: {project_id}")
+    asyncio.create_task(
+        scan_and_generate_global(project["local_path"], broadcast=ws_manager.broadcast, incremental=True)
+    )
+    return {"status": "started"}
+
+
+@router.post("/{project_id}/gc")
+async def gc_project(project_id: str):
+    """Prune merged/stale agent worktrees and branches now. Returns the GC report."""
+    project = get_project(project_id)
+    if not project:
+        raise HTTPException(404, f"Project not found: {project_id}")
+    report = await collect_project(project["local_path"])
+    report["project_id"] = project_id
+    return report
+
+
 @router.get("/{project_id}/files")
 async def list_files(project_id: str, path: str = ""):
-    """List files in project directory. Skip hidden dirs except .alchemistral."""
+    """
+    List files in project directory. Skip hidden dirs except .alchemistral.
+
+    Served from the project's live index when it is being watched.
+    """
     project = get_project(project_id)
     if not project:
         raise HTTPException(404, f"Project not found: {project_id}")
@@ -186,22 +231,11 @@ async def list_files(project_id: str, path: str = ""):
     if not target.exists() or not target.is_dir():
         return []
 
-    entries = []
-    try:
-        for item in sorted(target.iterdir(), key=lambda p: (not p.is_dir(), p.name)):
-            name = item.name
-            # Skip hidden except .alchemistral
-            if name.startswith(".") and name != ".alchemistral":
-                continue
-            # Skip common junk
-            if name in ("node_modules", "__pycache__", ".git", ".venv", "venv"):
-                continue
-            rel = str(item.relative_to(base))
-            if item.is_dir():
-                entries.append({"name": name, "type": "dir", "path": rel})
-            else:
-                entries.append({"name": name, "type": "file", "path": rel})
-    except PermissionError:
-        pass
-
-    return entries
+    await watch_manager.ensure(project_id, project["local_path"], ws_manager.broadcast)
+    index = watch_manager.get_index(project_id)
+    rel = os.path.normpath(path) if path else ""
+    if rel == ".":
+        rel = ""
+    if index and rel in index.tree:
+        return index.tree[rel]
+    return list_dir(base, rel)
@@ -7,6 +7,8 @@ from pathlib import Path
 from fastapi import APIRouter
 from pydantic import BaseModel
 
+from services import token_budget
+
 router = APIRouter(prefix="/api/settings", tags=["settings"])
 
 _ENV_PATH = Path(__file__).resolve().parent.parent / ".env"
@@ -58,3 +60,13 @@ async def update_keys(payload: KeysPayload):
         vibe_env.write_text(f"MISTRAL_API_KEY={payload.mistral_api_key}\n")
     _write_env(env)
     return {"status": "ok"}
+
+
+@router.get("/token-budget")
+async def get_token_budget():
+    """Per-model prompt budgets and the token usage recorded per call site."""
+    return {
+        "budgets": {**token_budget.MODEL_BUDGETS, "default": token_budget.DEFAULT_BUDGET},
+        "usage": token_budget.usage_stats(),
+        "recent": token_budget.recent_usage(),
+    }
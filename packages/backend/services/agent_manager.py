@@ -12,7 +12,10 @@ from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Callable, Awaitable
 
-from services.cli_adapter import AgentConfig, AgentEvent, get_adapter
+from services import log_pipeline, metrics, tracing
+from services.agent_resources import AGENT_SAMPLE_INTERVAL, ResourceSampler
+from services.cli_adapter import AgentConfig, AgentEvent, CLIAdapter, get_adapter
+from services.process_supervisor import supervisor
 from services.prompt_builder import build_prompt
 from services.worktree import create_worktree
 
@@ -35,6 +38,7 @@ class AgentState:
     validation_level: int = 0  # 0=none, 1=self-test, 2=orchestrator, 3=integration
     output_lines: list[str] = field(default_factory=list)
     error: str | None = None
+    resources: dict | None = None  # latest ResourceUsage sample of the process tree
 
     def to_dict(self) -> dict:
         return {
@@ -50,6 +54,7 @@ class AgentState:
             "validation_level": self.validation_level,
             "output_line_count": len(self.output_lines),
             "error": self.error,
+            "resources": self.resources,
         }
 
 
@@ -60,6 +65,8 @@ class AgentManager:
         # agents[project_id][agent_id] = AgentState
         self._agents: dict[str, dict[str, AgentState]] = {}
         self._tasks: dict[str, asyncio.Task] = {}
+        # Adapters of agents whose output is still streaming
+        self._adapters: dict[str, CLIAdapter] = {}
 
     def get_agent(self, agent_id: str, project_id: str | None = None) -> AgentState | None:
         if project_id:
@@ -79,6 +86,7 @@ class AgentManager:
             result.extend(a.to_dict() for a in proj_agents.values())
         return result
 
+    @tracing.traced()
     async def spawn_agent(
         self,
         agent_id: str,
@@ -95,6 +103,8 @@ class AgentManager:
         """
         Spawn an agent: create worktree, build prompt, launch CLI, stream output.
         """
+        # Tags this task's records, and those of the stream task started below
+        log_pipeline.bind(agent_id=agent_id, project_id=project_id or None)
         state = AgentState(
             id=agent_id,
             project_id=project_id,
@@ -126,7 +136,9 @@ class AgentManager:
             state.branch = f"agent/{agent_id}"
 
             # Build prompt
-            full_prompt = build_prompt(
+            # Reads memory files and the retrieval index — off the event loop
+            full_prompt = await asyncio.to_thread(
+                build_prompt,
                 agent_domain=domain,
                 task_prompt=task_prompt,
                 alch_dir=alch_dir,
@@ -138,9 +150,10 @@ class AgentManager:
             adapter_name = "mock" if demo else cli_adapter_name
             adapter = get_adapter(adapter_name)
 
-            config = AgentConfig(skills=skills or [])
+            config = AgentConfig(skills=skills or [], domain=domain)
 
             # Spawn the CLI process
+            self._adapters[agent_id] = adapter
             await adapter.spawn(wt_path, full_prompt, config, agent_id)
             state.status = "active"
 
@@ -162,6 +175,7 @@ class AgentManager:
             self._tasks[agent_id] = task
 
         except Exception as exc:
+            self._adapters.pop(agent_id, None)
             state.status = "failed"
             state.error = str(exc)
             logger.error(f"[{agent_id}] Spawn failed: {exc}", exc_info=True)
@@ -194,6 +208,7 @@ class AgentManager:
                     "agent_id": event.agent_id,
                     "type": event.type,
                     "text": event.text,
+                    **event.fields(),
                     "timestamp": datetime.now(timezone.utc).isoformat(),
                 })
 
@@ -213,21 +228,81 @@ class AgentManager:
                 "text": f"Agent error: {exc}",
                 "timestamp": datetime.now(timezone.utc).isoformat(),
             })
+        finally:
+            self._adapters.pop(agent_id, None)
+
+    async def kill_agent(self, agent_id: str, reason: str = "Killed by user") -> bool:
+        """Kill a running agent: its whole process group, then its stream task."""
+        adapter = self._adapters.pop(agent_id, None)
+        if adapter:
+            try:
+                await adapter.kill()
+            except Exception as exc:
+                logger.error(f"[{agent_id}] Kill failed: {exc}")
 
-    async def kill_agent(self, agent_id: str) -> bool:
-        """Kill a running agent."""
         task = self._tasks.get(agent_id)
         if task and not task.done():
             task.cancel()
 
         state = self.get_agent(agent_id)
         if state:
-            state.status = "failed"
-            state.error = "Killed by user"
-            state.completed_at = datetime.now(timezone.utc).isoformat()
+            if state.status not in ("done", "failed"):
+                state.status = "failed"
+                state.error = reason
+                state.completed_at = datetime.now(timezone.utc).isoformat()
             return True
         return False
 
+    async def kill_project_agents(self, project_id: str, reason: str) -> list[str]:
+        """Kill every running agent of a project (mission cancel). Returns their ids."""
+        running = [
+            a.id for a in self._agents.get(project_id, {}).values()
+            if a.status not in ("done", "failed")
+        ]
+        await asyncio.gather(*(self.kill_agent(a, reason) for a in running))
+        return running
+
+    async def shutdown(self) -> None:
+        """Kill all running agents (server shutdown)."""
+        running = list(self._adapters)
+        if running:
+            logger.info(f"Shutting down {len(running)} running agent(s)")
+        await asyncio.gather(*(self.kill_agent(a, "Server shutdown") for a in running))
+
+    async def resource_loop(self, broadcast: Callable[[dict], Awaitable[None]]) -> None:
+        """Sample the process tree of every running agent and publish the usage."""
+        sampler = ResourceSampler()
+        while True:
+            await asyncio.sleep(AGENT_SAMPLE_INTERVAL)
+            try:
+                groups = {r["agent_id"]: r["pgid"] for r in supervisor.records()}
+                usage = await asyncio.to_thread(sampler.sample, groups)
+                for agent_id, sample in usage.items():
+                    state = self.get_agent(agent_id)
+                    if not state:
+                        continue
+                    state.resources = sample.to_dict()
+                    await broadcast({
+                        "agent_id": agent_id,
+                        "type": "resources",
+                        "project_id": state.project_id,
+                        **state.resources,
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                    })
+            except Exception as exc:
+                logger.error(f"Resource sampling failed: {exc}", exc_info=True)
+
 
 # Global singleton
 agent_manager = AgentManager()
+
+
+def _agents_by_status() -> dict[tuple[str], int]:
+    counts: dict[tuple[str], int] = {}
+    for proj_agents in agent_manager._agents.values():
+        for state in proj_agents.values():
+            counts[(state.status,)] = counts.get((state.status,), 0) + 1
+    return counts
+
+
+metrics.gauge("alchemistral_agents", "Agents by status", ["status"]).set_function(_agents_by_status)
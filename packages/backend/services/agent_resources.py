@@ -0,0 +1,229 @@
+"""
+Agent Resources — per-agent resource limits and usage sampling.
+
+Limits (all optional, 0 = unlimited) are applied from the server to the
+agent CLI right after it starts, and inherited by everything it starts
+later:
+  - rlimits: CPU seconds, address space, file size, open files
+  - cgroup v2, when AGENT_CGROUP_PARENT names a writable delegated cgroup
+    (e.g. a systemd unit with Delegate=yes): each agent gets its own child
+    cgroup with memory.max, cpu.max and pids.max — a limit on the whole
+    process tree rather than on each process
+
+Usage is sampled from /proc for the agent's process group (every agent
+leads its own, see process_supervisor): CPU% since the previous sample, RSS
+and bytes read/written, summed over the tree.
+"""
+import asyncio
+import logging
+import os
+import resource
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+AGENT_CPU_SECONDS = int(os.getenv("AGENT_CPU_SECONDS", "0"))
+AGENT_MAX_MEMORY_MB = int(os.getenv("AGENT_MAX_MEMORY_MB", "0"))
+AGENT_MAX_FILE_MB = int(os.getenv("AGENT_MAX_FILE_MB", "0"))
+AGENT_MAX_OPEN_FILES = int(os.getenv("AGENT_MAX_OPEN_FILES", "0"))
+# cgroup v2 only: limits for the whole process tree
+AGENT_CGROUP_PARENT = os.getenv("AGENT_CGROUP_PARENT", "")
+AGENT_CPU_PERCENT = int(os.getenv("AGENT_CPU_PERCENT", "0"))  # 100 = one full core
+AGENT_MAX_PIDS = int(os.getenv("AGENT_MAX_PIDS", "0"))
+# Seconds between usage samples, 0 disables sampling
+AGENT_SAMPLE_INTERVAL = float(os.getenv("AGENT_SAMPLE_INTERVAL", "2"))
+
+_CPU_PERIOD_US = 100_000
+_MB = 1024 * 1024
+_PROC = Path("/proc")
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = resource.getpagesize()
+
+
+# ── Limits ──────────────────────────────────────────────────────────────────
+
+def _rlimits() -> list[tuple[int, int]]:
+    limits = [
+        (resource.RLIMIT_CPU, AGENT_CPU_SECONDS),
+        (resource.RLIMIT_AS, AGENT_MAX_MEMORY_MB * _MB),
+        (resource.RLIMIT_FSIZE, AGENT_MAX_FILE_MB * _MB),
+        (resource.RLIMIT_NOFILE, AGENT_MAX_OPEN_FILES),
+    ]
+    result: list[tuple[int, int]] = []
+    for which, value in limits:
+        if value <= 0:
+            continue
+        # An unprivileged process cannot raise its hard limit
+        hard = resource.getrlimit(which)[1]
+        result.append((which, value if hard == resource.RLIM_INFINITY else min(value, hard)))
+    return result
+
+
+def _cgroup_dir(agent_id: str) -> Path:
+    return Path(AGENT_CGROUP_PARENT) / f"agent-{agent_id}"
+
+
+def _prepare_cgroup(agent_id: str) -> Path | None:
+    """Create the agent's cgroup with its limits; returns its cgroup.procs file."""
+    parent = Path(AGENT_CGROUP_PARENT)
+    if not (parent / "cgroup.controllers").exists():
+        logger.warning(f"[resources] {parent} is not a cgroup v2 directory — cgroup limits skipped")
+        return None
+    settings = {
+        "memory.max": str(AGENT_MAX_MEMORY_MB * _MB) if AGENT_MAX_MEMORY_MB else "max",
+        "cpu.max": f"{AGENT_CPU_PERCENT * _CPU_PERIOD_US // 100} {_CPU_PERIOD_US}" if AGENT_CPU_PERCENT else "max",
+        "pids.max": str(AGENT_MAX_PIDS) if AGENT_MAX_PIDS else "max",
+    }
+    group = _cgroup_dir(agent_id)
+    try:
+        group.mkdir(exist_ok=True)
+        for name, value in settings.items():
+            # A controller that is not enabled for the parent has no file here
+            if (group / name).exists():
+                (group / name).write_text(value)
+    except OSError as exc:
+        logger.warning(f"[resources] {agent_id}: cgroup limits not applied: {exc}")
+        return None
+    return group / "cgroup.procs"
+
+
+def apply_limits(agent_id: str, pid: int) -> None:
+    """
+    Put a freshly started agent process in its limits, from the parent (a
+    preexec_fn is not safe in this multi-threaded server). Call it right
+    after spawning, before the agent has had time to start children.
+    """
+    limits = _rlimits()
+    procs_file = _prepare_cgroup(agent_id) if AGENT_CGROUP_PARENT else None
+    if not limits and procs_file is None:
+        return
+    try:
+        for which, value in limits:
+            resource.prlimit(pid, which, (value, value))
+        if procs_file:
+            procs_file.write_text(str(pid))
+    except (OSError, ValueError) as exc:
+        # The process may already be gone; nothing left to limit then
+        logger.warning(f"[resources] {agent_id}: limits not applied to PID {pid}: {exc}")
+        return
+    logger.info(
+        f"[resources] {agent_id}: {len(limits)} rlimit(s)"
+        + (f", cgroup {procs_file.parent}" if procs_file else "")
+    )
+
+
+async def release_cgroup(agent_id: str, timeout: float = 5.0) -> None:
+    """
+    Remove the agent's cgroup once its processes are gone. Killed processes
+    leave cgroup.procs asynchronously, so it is polled until empty first.
+    """
+    if not AGENT_CGROUP_PARENT:
+        return
+    group = _cgroup_dir(agent_id)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if not (group / "cgroup.procs").read_text().strip():
+                break
+        except OSError:
+            break
+        await asyncio.sleep(0.05)
+    try:
+        group.rmdir()
+    except FileNotFoundError:
+        pass
+    except OSError as exc:
+        logger.warning(f"[resources] {agent_id}: cgroup not removed: {exc}")
+
+
+# ── Sampling ────────────────────────────────────────────────────────────────
+
+@dataclass
+class ResourceUsage:
+    processes: int = 0
+    cpu_percent: float = 0.0
+    cpu_seconds: float = 0.0
+    rss_mb: float = 0.0
+    peak_rss_mb: float = 0.0
+    read_mb: float = 0.0
+    write_mb: float = 0.0
+    sampled_at: float = 0.0  # time.monotonic(), not published
+
+    def to_dict(self) -> dict:
+        return {
+            k: round(v, 2) if isinstance(v, float) else v
+            for k, v in asdict(self).items() if k != "sampled_at"
+        }
+
+
+def _read_proc(pid: str) -> tuple[int, int, int, int, int] | None:
+    """(pgid, cpu ticks, rss bytes, read bytes, write bytes) of one process."""
+    try:
+        stat = (_PROC / pid / "stat").read_text()
+    except OSError:
+        return None
+    # Fields after the command name, which may contain spaces: state is [0]
+    fields = stat.rsplit(")", 1)[1].split()
+    pgid = int(fields[2])
+    ticks = int(fields[11]) + int(fields[12])
+    rss = int(fields[21]) * _PAGE_SIZE
+    read = write = 0
+    try:
+        for line in (_PROC / pid / "io").read_text().splitlines():
+            key, _, value = line.partition(":")
+            if key == "read_bytes":
+                read = int(value)
+            elif key == "write_bytes":
+                write = int(value)
+    except OSError:
+        pass
+    return pgid, ticks, rss, read, write
+
+
+class ResourceSampler:
+    """Sums /proc usage per process group; keeps the previous sample for CPU%."""
+
+    def __init__(self) -> None:
+        self._last: dict[str, ResourceUsage] = {}
+
+    def sample(self, groups: dict[str, int]) -> dict[str, ResourceUsage]:
+        """Usage per agent id for {agent_id: pgid}; one pass over /proc (blocking)."""
+        if not groups or not _PROC.is_dir():
+            return {}
+        by_pgid = {pgid: agent_id for agent_id, pgid in groups.items()}
+        totals: dict[str, list[int]] = {}
+        for entry in os.scandir(_PROC):
+            if not entry.name.isdigit():
+                continue
+            info = _read_proc(entry.name)
+            if info is None or info[0] not in by_pgid:
+                continue
+            t = totals.setdefault(by_pgid[info[0]], [0, 0, 0, 0, 0])
+            t[0] += 1
+            for i in range(1, 5):
+                t[i] += info[i]
+
+        now = time.monotonic()
+        usage: dict[str, ResourceUsage] = {}
+        for agent_id, (count, ticks, rss, read, write) in totals.items():
+            prev = self._last.get(agent_id)
+            cpu_seconds = ticks / _CLK_TCK
+            cpu_percent = 0.0
+            if prev and now > prev.sampled_at:
+                # Exited children take their ticks along, so the sum can drop
+                cpu_percent = max(cpu_seconds - prev.cpu_seconds, 0.0) / (now - prev.sampled_at) * 100
+            rss_mb = rss / _MB
+            usage[agent_id] = ResourceUsage(
+                processes=count,
+                cpu_percent=cpu_percent,
+                cpu_seconds=cpu_seconds,
+                rss_mb=rss_mb,
+                peak_rss_mb=max(rss_mb, prev.peak_rss_mb if prev else 0.0),
+                read_mb=read / _MB,
+                write_mb=write / _MB,
+                sampled_at=now,
+            )
+        self._last = {a: usage.get(a) or self._last[a] for a in groups if a in usage or a in self._last}
+        return usage
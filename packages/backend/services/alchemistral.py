@@ -1,34 +1,138 @@
 """
 Alchemistral service — project storage and .alchemistral/ directory management.
+
+Projects live in ~/.alchemistral/projects.db (SQLite, WAL), one row per
+project keyed by id. Reads are served from an in-memory copy that is
+reloaded only when the database changed (PRAGMA data_version also sees
+commits from other processes); every write is a single transaction. A
+legacy projects.json is imported once and kept as projects.json.migrated.
 """
 import json
+import logging
+import sqlite3
+import threading
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 GLOBAL_STORAGE = Path.home() / ".alchemistral"
 PROJECTS_FILE = GLOBAL_STORAGE / "projects.json"
+PROJECTS_DB = GLOBAL_STORAGE / "projects.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id   TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+)
+"""
+
+_lock = threading.RLock()
+_db: sqlite3.Connection | None = None
+# id → project, in creation order; valid while data_version is unchanged
+_cache: dict[str, dict] = {}
+_cache_version: int | None = None
 
 
 def _ensure_global_storage() -> None:
     GLOBAL_STORAGE.mkdir(parents=True, exist_ok=True)
+
+
+def _migrate_json(db: sqlite3.Connection) -> None:
+    """Import projects.json into an empty database, once."""
     if not PROJECTS_FILE.exists():
-        PROJECTS_FILE.write_text("[]")
+        return
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        if db.execute("SELECT 1 FROM projects LIMIT 1").fetchone() is None:
+            projects = json.loads(PROJECTS_FILE.read_text() or "[]")
+            db.executemany(
+                "INSERT OR REPLACE INTO projects (id, data) VALUES (?, ?)",
+                [(p["id"], json.dumps(p)) for p in projects],
+            )
+            logger.info(f"[alchemistral] Migrated {len(projects)} project(s) from {PROJECTS_FILE}")
+        db.execute("COMMIT")
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    PROJECTS_FILE.replace(PROJECTS_FILE.with_name("projects.json.migrated"))
+
+
+def _connect() -> sqlite3.Connection:
+    global _db
+    if _db is None:
+        _ensure_global_storage()
+        # Autocommit mode: transactions are opened explicitly
+        db = sqlite3.connect(PROJECTS_DB, isolation_level=None, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("PRAGMA busy_timeout=5000")
+        db.execute(_SCHEMA)
+        _migrate_json(db)
+        _db = db
+    return _db
+
+
+def _projects() -> dict[str, dict]:
+    """The cached projects, reloaded if the database changed since the last read."""
+    global _cache, _cache_version
+    db = _connect()
+    version = db.execute("PRAGMA data_version").fetchone()[0]
+    if version != _cache_version:
+        rows = db.execute("SELECT id, data FROM projects ORDER BY rowid").fetchall()
+        _cache = {project_id: json.loads(data) for project_id, data in rows}
+        _cache_version = version
+    return _cache
+
+
+def _write(statements: list[tuple[str, tuple]]) -> None:
+    """Run the statements in one transaction and drop the cache."""
+    global _cache_version
+    db = _connect()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        for sql, params in statements:
+            db.execute(sql, params)
+        db.execute("COMMIT")
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    # data_version does not change for this connection's own commits
+    _cache_version = None
 
 
 def load_projects() -> list[dict]:
-    _ensure_global_storage()
-    return json.loads(PROJECTS_FILE.read_text())
+    with _lock:
+        return [dict(p) for p in _projects().values()]
 
 
 def save_projects(projects: list[dict]) -> None:
-    _ensure_global_storage()
-    PROJECTS_FILE.write_text(json.dumps(projects, indent=2))
+    """Replace the whole registry (prefer add_project / remove_project)."""
+    with _lock:
+        _write(
+            [("DELETE FROM projects", ())]
+            + [("INSERT OR REPLACE INTO projects (id, data) VALUES (?, ?)", (p["id"], json.dumps(p)))
+               for p in projects]
+        )
 
 
 def get_project(project_id: str) -> dict | None:
-    for p in load_projects():
-        if p["id"] == project_id:
-            return p
-    return None
+    with _lock:
+        project = _projects().get(project_id)
+        return dict(project) if project else None
+
+
+def add_project(project: dict) -> None:
+    with _lock:
+        _write([("INSERT INTO projects (id, data) VALUES (?, ?)", (project["id"], json.dumps(project)))])
+
+
+def remove_project(project_id: str) -> bool:
+    """Delete a project; False if it did not exist."""
+    with _lock:
+        if project_id not in _projects():
+            return False
+        _write([("DELETE FROM projects WHERE id = ?", (project_id,))])
+        return True
 
 
 GLOBAL_MD_TEMPLATE = """\
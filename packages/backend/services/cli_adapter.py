@@ -3,16 +3,143 @@ CLI Adapter — pluggable interface for spawning coding agent CLIs.
 
 V1 = VibeCLIAdapter (Devstral 2 via Vibe CLI).
 The architecture supports any CLI coding agent via CLI_REGISTRY.
+Output lines are typed by the shared event_parser (text rules or JSON-lines).
+"vibe-record" records Vibe sessions; "replay" plays them back offline and
+"synthetic" generates parametric load (load tests).
 """
 import asyncio
+import codecs
+import json
 import logging
-import shlex
+import math
+import os
+import random
+import tempfile
+import time
+import zlib
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from collections import deque
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timezone
+from pathlib import Path
 from typing import AsyncIterator
 
+from services.agent_resources import apply_limits, release_cgroup
+from services.event_parser import ParsedLine, parse_json_line, vibe_classifier
+from services.git_runner import git_runner
+from services.process_supervisor import supervisor
+
 logger = logging.getLogger(__name__)
 
+# Prompts up to this many bytes go on the command line (Linux caps a single
+# argument at MAX_ARG_STRLEN = 128 KiB); larger ones are handed over by
+# VIBE_LARGE_PROMPT_MODE: "file" (temp file the agent is told to read) or
+# "stdin" (for CLI builds that read a piped prompt)
+VIBE_PROMPT_ARG_MAX = int(os.getenv("VIBE_PROMPT_ARG_MAX", "65536"))
+VIBE_LARGE_PROMPT_MODE = os.getenv("VIBE_LARGE_PROMPT_MODE", "file")
+
+# Longest line segment yielded from agent output (also the StreamReader buffer
+# limit); longer lines are split rather than aborting the stream
+AGENT_STREAM_LIMIT = int(os.getenv("AGENT_STREAM_LIMIT", str(256 * 1024)))
+# stderr lines kept per agent for the exit report
+AGENT_STDERR_TAIL_LINES = int(os.getenv("AGENT_STDERR_TAIL_LINES", "200"))
+_READ_CHUNK = 64 * 1024
+
+# "text" parses Vibe's human-readable output; any other value is passed as
+# `--output <format>` and lines are parsed as JSON records (text fallback)
+VIBE_OUTPUT_FORMAT = os.getenv("VIBE_OUTPUT_FORMAT", "text")
+
+# Session recording ("vibe-record" adapter) and playback ("replay" adapter)
+AGENT_RECORDINGS_DIR = Path(os.getenv("AGENT_RECORDINGS_DIR", str(Path.home() / ".alchemistral" / "recordings")))
+REPLAY_SOURCE = Path(os.getenv("REPLAY_SOURCE", str(AGENT_RECORDINGS_DIR)))  # a recording or a directory of them
+REPLAY_SPEED = float(os.getenv("REPLAY_SPEED", "1.0"))
+REPLAY_APPLY_FILES = os.getenv("REPLAY_APPLY_FILES", "false").lower() == "true"
+_RECORD_MAX_FILE_BYTES = 1024 * 1024
+_RECORD_FLUSH_LINES = 256
+
+_FILE_PROMPT = (
+    "Your full task instructions are in {path}. "
+    "Read that file completely before doing anything else, then follow it exactly."
+)
+
+
+async def iter_lines(
+    stream: asyncio.StreamReader,
+    max_line: int = AGENT_STREAM_LIMIT,
+    chunk_size: int = _READ_CHUNK,
+) -> AsyncIterator[str]:
+    """
+    Yield decoded lines (without the newline) from a stream read in chunks.
+
+    Unlike iterating the StreamReader, a line longer than `max_line` does not
+    raise: it is yielded as consecutive segments of at most `max_line` chars.
+    Multi-byte characters split across chunks are decoded correctly.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buf = ""
+    while True:
+        chunk = await stream.read(chunk_size)
+        buf += decoder.decode(chunk, final=not chunk)
+        *lines, buf = buf.split("\n")
+        for line in lines:
+            for i in range(0, max(len(line), 1), max_line):
+                yield line[i:i + max_line]
+        while len(buf) >= max_line:
+            yield buf[:max_line]
+            buf = buf[max_line:]
+        if not chunk:
+            break
+    if buf:
+        yield buf
+
+
+@dataclass
+class SyntheticProfile:
+    """Load shape of a "synthetic" agent (see SyntheticCLIAdapter)."""
+    lines_per_second: float = 50.0
+    duration_s: float = 10.0
+    line_bytes: int = 120  # mean of a log-normal size distribution
+    line_bytes_sigma: float = 0.8
+    failure_rate: float = 0.0  # probability that the agent fails part-way
+    files_written: int = 3
+    file_bytes: int = 4096
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        if self.lines_per_second <= 0:
+            raise ValueError(f"lines_per_second must be > 0, got {self.lines_per_second}")
+        if self.duration_s < 0 or self.files_written < 0 or self.file_bytes < 0:
+            raise ValueError("duration_s, files_written and file_bytes must be >= 0")
+        if not 0 <= self.failure_rate <= 1:
+            raise ValueError(f"failure_rate must be within [0, 1], got {self.failure_rate}")
+
+
+def synthetic_profile(domain: str) -> SyntheticProfile:
+    """
+    The profile for `domain` from SYNTHETIC_PROFILES — inline JSON or a path to
+    a JSON file — whose "default" entry is overridden per domain:
+      {"default": {"lines_per_second": 500}, "frontend": {"failure_rate": 0.1}}
+    """
+    raw = os.getenv("SYNTHETIC_PROFILES", "")
+    if raw and not raw.lstrip().startswith("{"):
+        try:
+            raw = Path(raw).read_text()
+        except OSError as exc:
+            logger.warning(f"Cannot read SYNTHETIC_PROFILES file: {exc}")
+            raw = ""
+    try:
+        profiles = json.loads(raw) if raw else {}
+    except ValueError as exc:
+        logger.warning(f"Ignoring malformed SYNTHETIC_PROFILES: {exc}")
+        profiles = {}
+    known = {f.name for f in fields(SyntheticProfile)}
+    values = {**profiles.get("default", {}), **profiles.get(domain, {})}
+    try:
+        return SyntheticProfile(**{k: v for k, v in values.items() if k in known})
+    except (TypeError, ValueError) as exc:
+        logger.warning(f"Ignoring invalid SYNTHETIC_PROFILES entry for {domain!r}: {exc}")
+        return SyntheticProfile()
+
 
 @dataclass
 class AgentConfig:
@@ -20,14 +147,38 @@ class AgentConfig:
     max_turns: int = 50
     max_price: float = 5.0
     skills: list[str] = field(default_factory=list)
+    domain: str = ""
+    synthetic: SyntheticProfile | None = None  # None: synthetic_profile(domain)
 
 
 @dataclass
 class AgentEvent:
     """A single event from an agent's output stream."""
     agent_id: str
-    type: str  # think, code, bash, tool, done, error
+    type: str  # think, code, bash, tool, output, done, error
     text: str = ""
+    file_path: str | None = None  # file written/edited (code events)
+    command: str | None = None  # command run (bash events)
+    exit_code: int | None = None
+
+    @classmethod
+    def from_parsed(cls, agent_id: str, parsed: ParsedLine, type: str | None = None) -> "AgentEvent":
+        return cls(
+            agent_id=agent_id,
+            type=type or parsed.type,
+            text=parsed.text,
+            file_path=parsed.file_path,
+            command=parsed.command,
+            exit_code=parsed.exit_code,
+        )
+
+    def fields(self) -> dict:
+        """The structured fields that are set, for event payloads."""
+        return {
+            k: v for k, v in (
+                ("file_path", self.file_path), ("command", self.command), ("exit_code", self.exit_code),
+            ) if v is not None
+        }
 
 
 class CLIAdapter(ABC):
@@ -69,6 +220,9 @@ class VibeCLIAdapter(CLIAdapter):
         self._proc: asyncio.subprocess.Process | None = None
         self._agent_id: str = ""
         self._done: bool = False
+        self._prompt_file: str | None = None
+        self._stdin_task: asyncio.Task | None = None
+        self._json_output = VIBE_OUTPUT_FORMAT != "text"
 
     async def spawn(
         self,
@@ -80,72 +234,106 @@ class VibeCLIAdapter(CLIAdapter):
         self._agent_id = agent_id
         self._done = False
 
-        prompt_escaped = shlex.quote(prompt)
-        cmd = (
-            f"vibe --prompt {prompt_escaped}"
-            f" --max-turns {config.max_turns}"
-            f" --max-price {config.max_price}"
+        args = [
+            "--max-turns", str(config.max_turns),
+            "--max-price", str(config.max_price),
+        ]
+        if self._json_output:
+            args += ["--output", VIBE_OUTPUT_FORMAT]
+        prompt_bytes = len(prompt.encode())
+        mode = "arg" if prompt_bytes <= VIBE_PROMPT_ARG_MAX else VIBE_LARGE_PROMPT_MODE
+        stdin_data: bytes | None = None
+        if mode == "stdin":
+            stdin_data = prompt.encode()
+        elif mode == "file":
+            fd, self._prompt_file = tempfile.mkstemp(prefix=f"alch-{agent_id}-", suffix=".md")
+            with os.fdopen(fd, "w") as fh:
+                fh.write(prompt)
+            args = ["--prompt", _FILE_PROMPT.format(path=self._prompt_file)] + args
+        else:
+            args = ["--prompt", prompt] + args
+
+        logger.info(f"[vibe-adapter][{agent_id}] cwd: {worktree_path}")
+        logger.info(f"[vibe-adapter][{agent_id}] prompt length: {len(prompt)} chars ({prompt_bytes} bytes, via {mode})")
+        logger.debug("[vibe-adapter][%s] prompt first 200 chars: %r", agent_id, prompt[:200])
+        logger.debug(
+            "[vibe-adapter][%s] exec: vibe %s--max-turns %s --max-price %s",
+            agent_id, "--prompt <...> " if mode != "stdin" else "", config.max_turns, config.max_price,
         )
 
-        print(f"[vibe-adapter][{agent_id}] cwd: {worktree_path}")
-        print(f"[vibe-adapter][{agent_id}] prompt length: {len(prompt)} chars")
-        print(f"[vibe-adapter][{agent_id}] prompt first 200 chars: {prompt[:200]!r}")
-        print(f"[vibe-adapter][{agent_id}] shell command: vibe --prompt <{len(prompt)} chars> --max-turns {config.max_turns} --max-price {config.max_price}")
-
-        self._proc = await asyncio.create_subprocess_shell(
-            cmd,
+        self._proc = await asyncio.create_subprocess_exec(
+            "vibe", *args,
             cwd=worktree_path,
+            stdin=asyncio.subprocess.PIPE if stdin_data is not None else asyncio.subprocess.DEVNULL,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
+            limit=AGENT_STREAM_LIMIT,
+            # Own session → own process group, so kill() reaches everything vibe spawns
+            start_new_session=True,
         )
-        print(f"[vibe-adapter][{agent_id}] process spawned, PID: {self._proc.pid}")
+        apply_limits(agent_id, self._proc.pid)
+        supervisor.register(agent_id, self._proc.pid)
+        if stdin_data is not None:
+            self._stdin_task = asyncio.create_task(self._feed_stdin(stdin_data))
+        logger.info(f"[vibe-adapter][{agent_id}] process spawned, PID: {self._proc.pid}")
+
+    async def _feed_stdin(self, data: bytes) -> None:
+        """Write the prompt to stdin and close it, without blocking output streaming."""
+        if not self._proc or not self._proc.stdin:
+            return
+        try:
+            self._proc.stdin.write(data)
+            await self._proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as exc:
+            logger.warning(f"[vibe-adapter][{self._agent_id}] stdin closed early: {exc}")
+        finally:
+            self._proc.stdin.close()
+
+    def _cleanup_prompt_file(self) -> None:
+        if self._prompt_file:
+            try:
+                os.unlink(self._prompt_file)
+            except OSError:
+                pass
+            self._prompt_file = None
 
     async def stream_output(self) -> AsyncIterator[AgentEvent]:
         """Stream stdout line-by-line as agent events. Also captures stderr."""
         if not self._proc or not self._proc.stdout:
-            print(f"[vibe-adapter][{self._agent_id}] WARNING: no process or no stdout pipe")
+            logger.warning(f"[vibe-adapter][{self._agent_id}] no process or no stdout pipe")
             return
 
-        # Start a background task to drain stderr
-        stderr_lines: list[str] = []
+        # Start a background task to drain stderr into a bounded tail
+        stderr_lines: deque[str] = deque(maxlen=AGENT_STDERR_TAIL_LINES)
+        stderr_total = 0
 
         async def _drain_stderr() -> None:
+            nonlocal stderr_total
             if self._proc and self._proc.stderr:
-                async for raw in self._proc.stderr:
-                    line = raw.decode("utf-8", errors="replace").rstrip()
+                async for line in iter_lines(self._proc.stderr):
+                    line = line.rstrip()
                     if line:
                         stderr_lines.append(line)
-                        print(f"[vibe-adapter][{self._agent_id}] STDERR: {line}")
+                        stderr_total += 1
+                        logger.debug("[vibe-adapter][%s] STDERR: %s", self._agent_id, line)
 
         stderr_task = asyncio.create_task(_drain_stderr())
 
         line_count = 0
         try:
-            async for raw_line in self._proc.stdout:
-                line = raw_line.decode("utf-8", errors="replace").rstrip()
+            async for line in iter_lines(self._proc.stdout):
+                line = line.rstrip()
                 if not line:
                     continue
 
                 line_count += 1
                 if line_count <= 5:
-                    print(f"[vibe-adapter][{self._agent_id}] STDOUT[{line_count}]: {line[:200]}")
+                    logger.debug("[vibe-adapter][%s] STDOUT[%d]: %s", self._agent_id, line_count, line[:200])
 
-                # Classify output lines
-                event_type = "output"
-                if line.startswith("Thinking") or line.startswith(">"):
-                    event_type = "think"
-                elif line.startswith("$ ") or line.startswith("Running:"):
-                    event_type = "bash"
-                elif line.startswith("Writing") or line.startswith("Editing"):
-                    event_type = "code"
-
-                yield AgentEvent(
-                    agent_id=self._agent_id,
-                    type=event_type,
-                    text=line,
-                )
+                parsed = (parse_json_line(line) if self._json_output else None) or vibe_classifier.classify(line)
+                yield AgentEvent.from_parsed(self._agent_id, parsed)
         except Exception as exc:
-            print(f"[vibe-adapter][{self._agent_id}] stream error: {exc}")
+            logger.error(f"[vibe-adapter][{self._agent_id}] stream error: {exc}")
             yield AgentEvent(
                 agent_id=self._agent_id,
                 type="error",
@@ -156,34 +344,42 @@ class VibeCLIAdapter(CLIAdapter):
         if self._proc:
             await self._proc.wait()
             exit_code = self._proc.returncode
-            print(f"[vibe-adapter][{self._agent_id}] process exited with code: {exit_code}")
-            print(f"[vibe-adapter][{self._agent_id}] total stdout lines read: {line_count}")
+            logger.info(
+                f"[vibe-adapter][{self._agent_id}] process exited with code: {exit_code} "
+                f"({line_count} stdout lines)"
+            )
         else:
             exit_code = None
 
         # Wait for stderr drain to finish
         await stderr_task
         if stderr_lines:
-            print(f"[vibe-adapter][{self._agent_id}] total stderr lines: {len(stderr_lines)}")
-            # Print last 10 stderr lines for debugging
-            for sl in stderr_lines[-10:]:
-                print(f"[vibe-adapter][{self._agent_id}] STDERR(tail): {sl}")
+            # Last 10 stderr lines in one record, for debugging
+            tail = "\n".join(list(stderr_lines)[-10:])
+            log = logger.warning if exit_code else logger.info
+            log(f"[vibe-adapter][{self._agent_id}] {stderr_total} stderr lines, tail:\n{tail}")
 
         self._done = True
+        self._cleanup_prompt_file()
+        # Background processes vibe left running (dev servers, watchers) die with it
+        await supervisor.terminate(self._agent_id)
+        await release_cgroup(self._agent_id)
 
         # Report if vibe exited with an error
         if exit_code and exit_code != 0:
-            err_summary = "; ".join(stderr_lines[-3:]) if stderr_lines else f"exit code {exit_code}"
+            err_summary = "; ".join(list(stderr_lines)[-3:]) if stderr_lines else f"exit code {exit_code}"
             yield AgentEvent(
                 agent_id=self._agent_id,
                 type="error",
                 text=f"Vibe exited with code {exit_code}: {err_summary}",
+                exit_code=exit_code,
             )
         else:
             yield AgentEvent(
                 agent_id=self._agent_id,
                 type="done",
                 text=f"Agent completed ({line_count} output lines)",
+                exit_code=exit_code,
             )
 
     async def is_complete(self) -> bool:
@@ -192,14 +388,15 @@ class VibeCLIAdapter(CLIAdapter):
         return self._done or self._proc.returncode is not None
 
     async def kill(self) -> None:
-        if self._proc and self._proc.returncode is None:
-            logger.info(f"[{self._agent_id}] Killing vibe process")
-            self._proc.terminate()
-            try:
-                await asyncio.wait_for(self._proc.wait(), timeout=5)
-            except asyncio.TimeoutError:
-                self._proc.kill()
+        if self._proc:
+            logger.info(f"[{self._agent_id}] Killing vibe process group")
+            await supervisor.terminate(self._agent_id)
+            if self._proc.returncode is None:
+                await self._proc.wait()
+            # After the wait: the group may still be exiting right after SIGKILL
+            await release_cgroup(self._agent_id)
             self._done = True
+        self._cleanup_prompt_file()
 
 
 class MockCLIAdapter(CLIAdapter):
@@ -234,16 +431,373 @@ class MockCLIAdapter(CLIAdapter):
         ]
         for event_type, text in steps:
             await asyncio.sleep(1.5)
+            yield AgentEvent.from_parsed(self._agent_id, vibe_classifier.classify(text), type=event_type)
+        self._done = True
+        yield AgentEvent(
+            agent_id=self._agent_id,
+            type="done",
+            text="Agent completed (mock)",
+        )
+
+    async def is_complete(self) -> bool:
+        return self._done
+
+    async def kill(self) -> None:
+        self._done = True
+
+
+class RecordingCLIAdapter(CLIAdapter):
+    """
+    Wraps VibeCLIAdapter and records the session to AGENT_RECORDINGS_DIR, one
+    JSON-lines file per agent:
+      {"kind": "meta", "agent_id", "adapter", "recorded_at", "prompt_chars"}
+      {"kind": "event", "t": seconds since spawn, "type", "text", ...fields}
+      {"kind": "files", "t", "changes": [{"path", "content" | null if deleted}]}
+    The worktree changes are captured just before the final event, so a
+    replay reproduces what the agent left behind for the DAG commit step.
+    Records are buffered and appended to the file from a worker thread every
+    _RECORD_FLUSH_LINES records and when the session ends.
+    """
+    name = "vibe-record"
+
+    def __init__(self, inner: CLIAdapter | None = None) -> None:
+        self._inner = inner or VibeCLIAdapter()
+        self._agent_id: str = ""
+        self._worktree: str = ""
+        self._path: Path | None = None
+        self._buffer: list[str] = []
+        self._flush_lock = asyncio.Lock()
+        self._t0: float = 0.0
+
+    async def spawn(
+        self,
+        worktree_path: str,
+        prompt: str,
+        config: AgentConfig,
+        agent_id: str,
+    ) -> None:
+        await self._inner.spawn(worktree_path, prompt, config, agent_id)
+        self._agent_id = agent_id
+        self._worktree = worktree_path
+        self._t0 = time.monotonic()
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        self._path = path = AGENT_RECORDINGS_DIR / f"{agent_id}-{stamp}.jsonl"
+        self._write({
+            "kind": "meta",
+            "agent_id": agent_id,
+            "adapter": self._inner.name,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "prompt_chars": len(prompt),
+        })
+        logger.info(f"[{agent_id}] Recording session to {path}")
+
+    def _write(self, record: dict) -> None:
+        if self._path:
+            self._buffer.append(json.dumps(record) + "\n")
+
+    @staticmethod
+    def _append(path: Path, lines: list[str]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a") as fh:
+            fh.writelines(lines)
+
+    async def _flush(self) -> None:
+        async with self._flush_lock:
+            lines, self._buffer = self._buffer, []
+            if lines and self._path:
+                await asyncio.to_thread(self._append, self._path, lines)
+
+    async def _close(self) -> None:
+        await self._flush()
+        self._path = None
+
+    async def _record_files(self) -> None:
+        rc, out, err = await git_runner.run(
+            self._worktree, "status", "--porcelain", "-z", "--untracked-files=all",
+        )
+        if rc != 0:
+            logger.warning(f"[{self._agent_id}] Cannot record worktree changes: {err.strip()}")
+            return
+        changes: list[dict] = []
+        entries = iter(out.split("\0"))
+        for entry in entries:
+            if len(entry) < 4:
+                continue
+            status, rel = entry[:2], entry[3:]
+            if "R" in status or "C" in status:
+                # Renames/copies are followed by the source path, which is now gone
+                source = next(entries, "")
+                if "R" in status and source:
+                    changes.append({"path": source, "content": None})
+            full = Path(self._worktree) / rel
+            if not full.is_file():
+                changes.append({"path": rel, "content": None})
+                continue
+            if full.stat().st_size > _RECORD_MAX_FILE_BYTES:
+                logger.info(f"[{self._agent_id}] Not recording {rel}: larger than {_RECORD_MAX_FILE_BYTES} bytes")
+                continue
+            try:
+                changes.append({"path": rel, "content": full.read_text()})
+            except (OSError, UnicodeDecodeError):
+                logger.info(f"[{self._agent_id}] Not recording {rel}: not a text file")
+        self._write({"kind": "files", "t": round(time.monotonic() - self._t0, 3), "changes": changes})
+
+    async def stream_output(self) -> AsyncIterator[AgentEvent]:
+        try:
+            async for event in self._inner.stream_output():
+                final = event.type == "done" or (event.type == "error" and await self._inner.is_complete())
+                if final:
+                    await self._record_files()
+                self._write({
+                    "kind": "event",
+                    "t": round(time.monotonic() - self._t0, 3),
+                    "type": event.type,
+                    "text": event.text,
+                    **event.fields(),
+                })
+                if len(self._buffer) >= _RECORD_FLUSH_LINES:
+                    await self._flush()
+                yield event
+        finally:
+            await self._close()
+
+    async def is_complete(self) -> bool:
+        return await self._inner.is_complete()
+
+    async def kill(self) -> None:
+        await self._inner.kill()
+        await self._close()
+
+
+_replay_cache: dict[str, tuple[float, list[dict]]] = {}
+
+
+def _load_recording(path: Path) -> list[dict]:
+    mtime = path.stat().st_mtime
+    cached = _replay_cache.get(str(path))
+    if cached and cached[0] == mtime:
+        return cached[1]
+    records: list[dict] = []
+    with open(path) as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict):
+                records.append(record)
+    _replay_cache[str(path)] = (mtime, records)
+    return records
+
+
+def pick_recording(agent_id: str, source: Path = REPLAY_SOURCE) -> list[dict]:
+    """
+    Records of the session to replay for `agent_id`: a recording of the same
+    agent id if there is one, else one of the same domain ("backend-t1" →
+    "backend"), else any — picked by a hash of the agent id, so an agent gets
+    the same session whatever else the process replayed before.
+    """
+    paths = sorted(source.glob("*.jsonl")) if source.is_dir() else [source]
+    paths = [p for p in paths if p.is_file()]
+    if not paths:
+        raise FileNotFoundError(f"No recorded sessions in {source}")
+    sessions = [_load_recording(p) for p in paths]
+
+    def agent_of(records: list[dict]) -> str:
+        meta = records[0] if records and records[0].get("kind") == "meta" else {}
+        return str(meta.get("agent_id", ""))
+
+    domain = agent_id.split("-", 1)[0]
+    candidates = (
+        [s for s in sessions if agent_of(s) == agent_id]
+        or [s for s in sessions if agent_of(s).split("-", 1)[0] == domain]
+        or sessions
+    )
+    return candidates[zlib.crc32(agent_id.encode()) % len(candidates)]
+
+
+class ReplayCLIAdapter(CLIAdapter):
+    """
+    Plays back sessions recorded by RecordingCLIAdapter — no CLI, no API calls —
+    for deterministic load tests of the pipeline. REPLAY_SPEED scales the
+    recorded timing (1 = original, 10 = ten times faster, 0 = no delays);
+    with REPLAY_APPLY_FILES the recorded changes are written to the worktree.
+    """
+    name = "replay"
+
+    def __init__(self) -> None:
+        self._agent_id: str = ""
+        self._worktree: Path = Path()
+        self._records: list[dict] = []
+        self._done: bool = False
+
+    async def spawn(
+        self,
+        worktree_path: str,
+        prompt: str,
+        config: AgentConfig,
+        agent_id: str,
+    ) -> None:
+        self._agent_id = agent_id
+        self._worktree = Path(worktree_path)
+        self._records = await asyncio.to_thread(pick_recording, agent_id)
+        self._done = False
+        logger.info(f"[{agent_id}] Replaying {len(self._records)} recorded records at {REPLAY_SPEED}x")
+
+    def _apply_files(self, changes: list[dict]) -> None:
+        root = self._worktree.resolve()
+        for change in changes:
+            target = (root / str(change.get("path", ""))).resolve()
+            if root not in target.parents:
+                continue
+            content = change.get("content")
+            if content is None:
+                target.unlink(missing_ok=True)
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_text(content)
+
+    async def stream_output(self) -> AsyncIterator[AgentEvent]:
+        elapsed = 0.0
+        final = False
+        for record in self._records:
+            if self._done:
+                return
+            kind = record.get("kind")
+            if kind not in ("event", "files"):
+                continue
+            t = float(record.get("t", elapsed))
+            if REPLAY_SPEED > 0 and t > elapsed:
+                await asyncio.sleep((t - elapsed) / REPLAY_SPEED)
+            elapsed = max(elapsed, t)
+            if kind == "files":
+                if REPLAY_APPLY_FILES:
+                    await asyncio.to_thread(self._apply_files, record.get("changes", []))
+                continue
+            final = record.get("type") == "done" or final
             yield AgentEvent(
                 agent_id=self._agent_id,
-                type=event_type,
-                text=text,
+                type=str(record.get("type", "output")),
+                text=str(record.get("text", "")),
+                file_path=record.get("file_path"),
+                command=record.get("command"),
+                exit_code=record.get("exit_code"),
             )
         self._done = True
+        if not final:
+            yield AgentEvent(agent_id=self._agent_id, type="done", text="Agent completed (replay)")
+
+    async def is_complete(self) -> bool:
+        return self._done
+
+    async def kill(self) -> None:
+        self._done = True
+
+
+_SYNTHETIC_TYPES = ("think", "bash", "code", "output")
+_SYNTHETIC_WEIGHTS = (2, 1, 1, 6)
+_SYNTHETIC_WORDS = (
+    "request handler schema migration index query cache worker token retry "
+    "payload route session commit render state module build config client "
+).split()
+_SYNTHETIC_FILLER = " ".join(_SYNTHETIC_WORDS * 4096)
+
+
+class SyntheticCLIAdapter(CLIAdapter):
+    """
+    Generates agent output from a SyntheticProfile (config.synthetic, else the
+    SYNTHETIC_PROFILES entry for config.domain) to load-test the agent manager,
+    WebSocket fan-out and DAG executor without Vibe or network. Output is paced
+    against a schedule rather than one sleep per line, so high rates are
+    delivered in bursts; a run is seeded by agent id and thus reproducible.
+    """
+    name = "synthetic"
+
+    def __init__(self) -> None:
+        self._agent_id: str = ""
+        self._worktree: Path = Path()
+        self._profile = SyntheticProfile()
+        self._rng = random.Random()
+        self._done: bool = False
+
+    async def spawn(
+        self,
+        worktree_path: str,
+        prompt: str,
+        config: AgentConfig,
+        agent_id: str,
+    ) -> None:
+        self._agent_id = agent_id
+        self._worktree = Path(worktree_path)
+        self._profile = config.synthetic or synthetic_profile(config.domain)
+        self._rng = random.Random(self._profile.seed ^ zlib.crc32(agent_id.encode()))
+        self._done = False
+        logger.info(f"[{agent_id}] Synthetic spawn: {self._profile}")
+
+    def _line(self) -> tuple[str, str]:
+        p = self._profile
+        # Log-normal sizes with mean line_bytes: mu = ln(mean) - sigma²/2
+        mu = math.log(max(p.line_bytes, 1)) - p.line_bytes_sigma ** 2 / 2
+        size = min(int(self._rng.lognormvariate(mu, p.line_bytes_sigma)) + 1, AGENT_STREAM_LIMIT)
+        start = self._rng.randrange(len(_SYNTHETIC_FILLER) // 2)
+        text = _SYNTHETIC_FILLER[start:start + size]
+        event_type = self._rng.choices(_SYNTHETIC_TYPES, _SYNTHETIC_WEIGHTS)[0]
+        if event_type == "bash":
+            text = f"$ {text}"
+        return event_type, text
+
+    def _write_file(self, index: int) -> str:
+        rel = f"synthetic/{self._agent_id}/file_{index}.txt"
+        target = self._worktree / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        size = self._profile.file_bytes
+        target.write_text((_SYNTHETIC_FILLER * (size // len(_SYNTHETIC_FILLER) + 1))[:size])
+        return rel
+
+    async def stream_output(self) -> AsyncIterator[AgentEvent]:
+        p = self._profile
+        total = max(int(p.lines_per_second * p.duration_s), 1)
+        fail_at = self._rng.randrange(total) if self._rng.random() < p.failure_rate else None
+        # Spread file writes evenly over the run
+        write_every = max(total // p.files_written, 1) if p.files_written > 0 else 0
+        files_done = 0
+        start = time.monotonic()
+
+        for i in range(total):
+            if self._done:
+                return
+            # Sleep only when ahead of schedule
+            ahead = start + i / p.lines_per_second - time.monotonic()
+            if ahead > 0.001:
+                await asyncio.sleep(ahead)
+            elif i % 256 == 0:
+                await asyncio.sleep(0)  # let other agents and broadcasts run
+
+            if i == fail_at:
+                self._done = True
+                yield AgentEvent(
+                    agent_id=self._agent_id,
+                    type="error",
+                    text=f"Synthetic failure after {i} lines",
+                    exit_code=1,
+                )
+                return
+
+            if write_every and i % write_every == 0 and files_done < p.files_written:
+                rel = await asyncio.to_thread(self._write_file, files_done)
+                files_done += 1
+                yield AgentEvent(agent_id=self._agent_id, type="code", text=f"Writing {rel}", file_path=rel)
+                continue
+
+            event_type, text = self._line()
+            yield AgentEvent(agent_id=self._agent_id, type=event_type, text=text)
+
+        self._done = True
         yield AgentEvent(
             agent_id=self._agent_id,
             type="done",
-            text="Agent completed (mock)",
+            text=f"Agent completed (synthetic, {total} lines, {files_done} files)",
+            exit_code=0,
         )
 
     async def is_complete(self) -> bool:
@@ -258,6 +812,9 @@ def get_adapter(name: str = "vibe") -> CLIAdapter:
     registry: dict[str, type[CLIAdapter]] = {
         "vibe": VibeCLIAdapter,
         "mock": MockCLIAdapter,
+        "vibe-record": RecordingCLIAdapter,
+        "replay": ReplayCLIAdapter,
+        "synthetic": SyntheticCLIAdapter,
     }
     cls = registry.get(name)
     if cls is None:
@@ -1,15 +1,23 @@
 """
 Codebase Scanner — analyses a project's files, stack, and structure on first open.
 
-Runs ONCE at project creation. Produces:
+Runs at project creation, and incrementally on rescan. Produces:
   1. .alchemistral/codebase-summary.md  (raw scan data)
   2. .alchemistral/GLOBAL.md            (LLM-generated project intelligence)
+  3. .alchemistral/manifest.json        (per-file fingerprints, see scan_manifest)
+  4. .alchemistral/index/               (symbol index and BM25 retrieval index)
 """
 import asyncio
+import codecs
 import logging
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
+from services import global_memory, metrics, retrieval, scan_manifest, symbol_index
 from services.mistral_client import get_client
 
 logger = logging.getLogger(__name__)
@@ -21,6 +29,15 @@ _SKIP_DIRS = {
     ".nuxt", "target", "out", ".turbo", ".cache", "coverage",
 }
 
+# Files the scanner itself writes — never part of the scanned file set
+_SCAN_OUTPUTS = {
+    os.path.join(".alchemistral", "codebase-summary.md"),
+    os.path.join(".alchemistral", "manifest.json"),
+}
+_SCAN_OUTPUT_DIRS = (
+    os.path.join(".alchemistral", "index") + os.sep,
+)
+
 # Stack detection: filename → stack label
 _STACK_MARKERS: dict[str, str] = {
     "CMakeLists.txt": "C/C++ (CMake)",
@@ -53,6 +70,34 @@ _SOURCE_EXTS = {
     ".zig", ".lua", ".vue", ".svelte",
 }
 
+# Header sampling: byte budget per file, prefix sniffed for binary content
+_HEAD_BYTES = 4096
+_SUMMARY_MAX_FILES = 200  # files in the summary's File Tree
+_SNIFF_BYTES = 1024
+_READ_WORKERS = 8
+
+# Files that usually define how a project starts — sampled first
+_ENTRY_POINTS = {
+    "main.py", "__main__.py", "app.py", "server.py", "manage.py", "wsgi.py", "asgi.py",
+    "index.js", "index.ts", "index.tsx", "index.jsx", "main.js", "main.ts", "main.tsx",
+    "server.js", "server.ts", "app.js", "app.ts", "App.tsx", "App.jsx", "App.vue",
+    "main.go", "main.rs", "lib.rs", "main.c", "main.cpp", "Main.java", "Program.cs",
+}
+
+# File stems that stand for their directory when imported (package/index files)
+_PACKAGE_STEMS = {"__init__", "index", "mod", "lib"}
+
+# import/include/use statements across the stacks we sample (one group per syntax)
+_IMPORT_RE = re.compile(
+    r"""^\s*from\s+([\w.]+)\s+import\b"""              # Python: from x.y import z
+    r"""|^\s*import\s+([\w.]+)(?=\s*(?:;|,|$|\bas\b))"""  # Python/Java/Kotlin: import x.y
+    r"""|(?:\bfrom|\brequire\(|\bimport\(?)\s*['"]([^'"]+)['"]"""  # JS/TS
+    r"""|^\s*#\s*include\s*"([^"]+)\""""                # C/C++ local includes
+    r"""|^\s*(?:pub\s+)?(?:use|mod)\s+([\w:]+)"""        # Rust
+    r"""|^\s*(?:import\s+)?(?:\w+\s+)?"([\w./-]+)"\s*$""",  # Go (import block lines)
+    re.MULTILINE,
+)
+
 _GLOBAL_SYSTEM_PROMPT = """\
 Generate a GLOBAL.md for this SPECIFIC codebase. Do NOT describe Alchemistral. \
 Describe what you see in the file tree and source files below.
@@ -87,24 +132,135 @@ RULES:
 """
 
 
+def _is_skipped(name: str) -> bool:
+    """Skip junk dirs and hidden files/dirs (except .alchemistral)."""
+    return name in _SKIP_DIRS or (name.startswith(".") and name != ".alchemistral")
+
+
+def _is_scan_output(rel: str) -> bool:
+    return rel in _SCAN_OUTPUTS or rel.startswith(_SCAN_OUTPUT_DIRS)
+
+
+def _sorted_entries(path: str) -> list[os.DirEntry]:
+    try:
+        with os.scandir(path) as it:
+            return sorted(it, key=lambda e: e.name)
+    except OSError:
+        return []
+
+
 def _collect_files(project_path: str, max_files: int = 200) -> list[str]:
-    """Walk project tree, skip junk dirs, return relative paths (max_files cap)."""
-    root = Path(project_path)
+    """
+    Walk project tree, skip junk dirs, return relative paths (max_files cap).
+
+    Iterative os.scandir walk: skipped and hidden dirs are pruned before
+    descending, entries are visited in name order (the same order a sorted
+    rglob yields), and the walk stops as soon as max_files is reached.
+    """
     files: list[str] = []
-    for item in sorted(root.rglob("*")):
-        # Skip directories themselves
-        if item.is_dir():
+    if max_files <= 0:
+        return files
+    # Stack of (entries iterator, relative prefix) — one frame per open directory
+    stack = [(iter(_sorted_entries(project_path)), "")]
+    while stack:
+        entries, prefix = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
             continue
-        # Check if any parent is a skip dir
-        parts = item.relative_to(root).parts
-        if any(p in _SKIP_DIRS for p in parts):
+        name = entry.name
+        if _is_skipped(name):
             continue
-        # Skip hidden files/dirs (except .alchemistral)
-        if any(p.startswith(".") and p != ".alchemistral" for p in parts):
+        rel = prefix + name
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((iter(_sorted_entries(entry.path)), rel + os.sep))
+                continue
+            if entry.is_symlink() and entry.is_dir():
+                # Symlinked directory — neither listed nor followed
+                continue
+        except OSError:
             continue
-        files.append(str(item.relative_to(root)))
+        if _is_scan_output(rel):
+            continue
+        files.append(rel)
+        if len(files) >= max_files:
+            break
+    return files
+
+
+def _iter_nul_separated(stream, chunk_size: int = 65536):
+    """Yield NUL-terminated records from a binary stream without buffering it all."""
+    pending = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        records = (pending + chunk).split(b"\0")
+        pending = records.pop()
+        for record in records:
+            if record:
+                yield os.fsdecode(record)
+    if pending:
+        yield os.fsdecode(pending)
+
+
+def _git_ls_files(project_path: str, max_files: int = 200) -> list[str] | None:
+    """
+    List files from the git index, honouring .gitignore and other standard excludes.
+
+    Tracked files come first (`--cached`), then untracked non-ignored ones
+    (`--others --exclude-standard`) — git would otherwise emit untracked files
+    first. Output is streamed and git is stopped once max_files is reached.
+    Returns None when the project is not a git repo or git is unavailable.
+    """
+    files: list[str] = []
+    for mode in (("--cached",), ("--others", "--exclude-standard")):
         if len(files) >= max_files:
             break
+        try:
+            proc = subprocess.Popen(
+                ["git", "ls-files", "-z", *mode],
+                cwd=project_path,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            return None
+        stopped = False
+        try:
+            for rel in _iter_nul_separated(proc.stdout):
+                # Nested repos (e.g. agent worktrees) are listed as "dir/"
+                if rel.endswith("/") or any(_is_skipped(p) for p in rel.split("/")) or _is_scan_output(rel):
+                    continue
+                files.append(rel)
+                if len(files) >= max_files:
+                    stopped = True
+                    break
+        finally:
+            proc.stdout.close()
+            if stopped and proc.poll() is None:
+                proc.kill()
+            proc.wait()
+        if not stopped and proc.returncode != 0:
+            if not files:
+                return None
+            logger.warning(f"[codebase_scanner] git ls-files {' '.join(mode)} exited {proc.returncode}")
+    return files
+
+
+def _list_files(project_path: str, max_files: int = 200) -> list[str]:
+    """
+    Prefer the git index for repositories; fall back to the filesystem walker.
+
+    Both leave out the scanner's own outputs, so a rescan never sees itself change.
+    """
+    files = None
+    if (Path(project_path) / ".git").exists():
+        files = _git_ls_files(project_path, max_files)
+    if files is None:
+        files = _collect_files(project_path, max_files)
     return files
 
 
@@ -128,39 +284,166 @@ def _detect_stack(project_path: str, files: list[str]) -> list[str]:
     return detected
 
 
-def _read_readme(project_path: str, max_chars: int = 2000) -> str:
-    """Read README.md first N chars if it exists."""
+def _read_head(path: Path, max_bytes: int = _HEAD_BYTES) -> str | None:
+    """
+    Read at most max_bytes from the start of a file.
+
+    Returns None for binary files (NUL byte in the sniffed prefix) or on error.
+    A multi-byte character cut at the budget boundary is dropped, not mangled.
+    """
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read(max_bytes)
+    except OSError:
+        return None
+    if b"\0" in data[:_SNIFF_BYTES]:
+        return None
+    return codecs.getincrementaldecoder("utf-8")(errors="replace").decode(data, final=False)
+
+
+def _read_readme(project_path: str, max_chars: int = 2000, cache: dict | None = None) -> str:
+    """Read README.md first N chars if it exists (reusing the manifest's cached copy)."""
     for name in ("README.md", "readme.md", "Readme.md", "README.rst", "README"):
+        entry = cache.get(name) if cache else None
+        if entry and "readme" in entry:
+            return entry["readme"]
         p = Path(project_path) / name
         if p.exists():
-            try:
-                text = p.read_text(errors="replace")[:max_chars]
-                return f"=== {name} (first {max_chars} chars) ===\n{text}"
-            except Exception:
-                pass
+            # UTF-8 is at most 4 bytes per char — this budget always covers max_chars
+            text = _read_head(p, max_bytes=max_chars * 4)
+            if text is None:
+                continue
+            readme = f"=== {name} (first {max_chars} chars) ===\n{text[:max_chars]}"
+            if entry is not None:
+                entry["readme"] = readme
+            return readme
     return ""
 
 
-def _sample_imports(project_path: str, files: list[str], max_files: int = 10, max_lines: int = 10) -> str:
-    """Read first N lines of top source files to capture imports/includes."""
+def _import_targets(head: str) -> list[str]:
+    """Module stems referenced by import/include/use statements in a file header."""
+    stems: list[str] = []
+    for m in _IMPORT_RE.finditer(head):
+        target = next(g for g in m.groups() if g)
+        ext = os.path.splitext(target)[1]
+        if ext in _SOURCE_EXTS:
+            target = target[:-len(ext)]
+        last = re.split(r"[./:\\]+", target.rstrip("/.;"))[-1]
+        if last:
+            stems.append(last)
+    return stems
+
+
+def _module_stem(rel: str) -> str:
+    """Name other files import this one by: file stem, or the dir for index-like files."""
+    p = Path(rel)
+    if p.stem in _PACKAGE_STEMS and p.parent.name:
+        return p.parent.name
+    return p.stem
+
+
+def _analyse_head(root: Path, rel: str, max_lines: int) -> dict | None:
+    head = _read_head(root / rel)
+    if head is None:
+        return None
+    lines = head.splitlines()[:max_lines]
+    return {
+        "sample": f"=== {rel} (first {max_lines} lines) ===\n" + "\n".join(lines),
+        "imports": _import_targets(head) if Path(rel).suffix in _SOURCE_EXTS else [],
+    }
+
+
+def _rank_sample_files(files: list[str], heads: dict[str, dict]) -> list[str]:
+    """
+    Order candidate files by how informative their header is:
+    entry points first, then manifests, then the most-imported modules,
+    shallower paths breaking ties.
+    """
+    in_degree: dict[str, int] = {}
+    for info in heads.values():
+        for stem in set(info["imports"]):
+            in_degree[stem] = in_degree.get(stem, 0) + 1
+
+    def score(rel: str) -> tuple:
+        name = Path(rel).name
+        return (
+            name not in _ENTRY_POINTS,
+            name not in _STACK_MARKERS,
+            -in_degree.get(_module_stem(rel), 0),
+            rel.count("/") + rel.count(os.sep),
+            rel,
+        )
+
+    return sorted((f for f in files if f in heads), key=score)
+
+
+def _sample_imports(
+    project_path: str,
+    files: list[str],
+    max_files: int = 10,
+    max_lines: int = 10,
+    cache: dict | None = None,
+) -> str:
+    """
+    Read the header of every candidate file (bounded, in parallel) and return
+    the first N lines of the highest-ranked ones to capture imports/includes.
+    """
     root = Path(project_path)
-    source_files = [f for f in files if Path(f).suffix in _SOURCE_EXTS][:max_files]
-    parts: list[str] = []
-    for f in source_files:
-        try:
-            lines = (root / f).read_text(errors="replace").splitlines()[:max_lines]
-            parts.append(f"=== {f} (first {max_lines} lines) ===\n" + "\n".join(lines))
-        except Exception:
-            pass
-    return "\n\n".join(parts)
+    candidates = [
+        f for f in files
+        if Path(f).suffix in _SOURCE_EXTS or Path(f).name in _STACK_MARKERS
+    ]
+    heads: dict[str, dict] = {}
+    to_read: list[str] = []
+    for f in candidates:
+        entry = cache.get(f) if cache else None
+        if entry and "sample" in entry and "imports" in entry:
+            heads[f] = {"sample": entry["sample"], "imports": entry["imports"]}
+        else:
+            to_read.append(f)
+
+    if to_read:
+        with ThreadPoolExecutor(max_workers=min(_READ_WORKERS, len(to_read))) as pool:
+            results = pool.map(lambda rel: _analyse_head(root, rel, max_lines), to_read)
+            for f, info in zip(to_read, results):
+                if info is None:
+                    continue
+                heads[f] = info
+                entry = cache.get(f) if cache else None
+                if entry is not None:
+                    entry.update(info)
+
+    ranked = _rank_sample_files(candidates, heads)[:max_files]
+    return "\n\n".join(heads[f]["sample"] for f in ranked)
+
+
+def build_codebase_summary(
+    project_path: str,
+    manifest: dict | None = None,
+    index: "symbol_index.SymbolIndex | None" = None,
+    files: list[str] | None = None,
+) -> str:
+    """
+    Build a raw codebase summary string (no LLM call).
+
+    With a symbol index, a Key Modules section lists the most-imported
+    modules and their top-level symbols.
 
+    With a manifest, files are fingerprinted first and only new or changed
+    files are re-read; unchanged ones reuse the header/README cached in it.
+    The added/changed/removed lists are stored in manifest["last_changes"].
 
-def build_codebase_summary(project_path: str) -> str:
-    """Build a raw codebase summary string (no LLM call)."""
-    files = _collect_files(project_path)
+    `files` is a _list_files result the caller already has (only its first
+    _SUMMARY_MAX_FILES entries are used); listed here otherwise.
+    """
+    files = files[:_SUMMARY_MAX_FILES] if files is not None else _list_files(project_path, _SUMMARY_MAX_FILES)
+    cache: dict | None = None
+    if manifest is not None:
+        manifest["last_changes"] = scan_manifest.refresh(project_path, files, manifest)
+        cache = manifest["files"]
     stack = _detect_stack(project_path, files)
-    readme = _read_readme(project_path)
-    imports = _sample_imports(project_path, files)
+    readme = _read_readme(project_path, cache=cache)
+    imports = _sample_imports(project_path, files, cache=cache)
 
     sections = [
         f"# Codebase Scan\n\nPath: {project_path}\nScanned: {len(files)} files",
@@ -169,6 +452,9 @@ def build_codebase_summary(project_path: str) -> str:
     ]
     if readme:
         sections.append(f"## README\n{readme}")
+    key_modules = index.key_modules() if index else ""
+    if key_modules:
+        sections.append(f"## Key Modules (most imported)\n{key_modules}")
     if imports:
         sections.append(f"## Source Samples (imports)\n{imports}")
 
@@ -179,20 +465,79 @@ def _ts() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-async def scan_and_generate_global(project_path: str, broadcast=None) -> None:
+def _write_summary(
+    project_path: str, alch: Path, incremental: bool, report: dict,
+) -> tuple[str, str, dict, list[str]]:
+    """
+    Build the summary, write it if its hash changed, persist the manifest.
+    Fills `report`; also returns the file list (listed once per scan).
     """
-    Full scan flow — called once at project creation.
-    1. Build codebase-summary.md
-    2. Call Mistral Large to generate intelligent GLOBAL.md
-    3. Write both files to .alchemistral/
+    manifest = scan_manifest.load_manifest(alch) if incremental else scan_manifest.empty_manifest()
+    indexed_files = _list_files(project_path, symbol_index.INDEX_MAX_FILES)
+    index = symbol_index.update_index(project_path, indexed_files)
+    retrieval.update_index(project_path, indexed_files, index)
+    summary = build_codebase_summary(project_path, manifest, index, indexed_files)
+    report.update(manifest.pop("last_changes", {}))
+    summary_hash = scan_manifest.hash_text(summary)
+    summary_path = alch / "codebase-summary.md"
+    report["summary_changed"] = summary_hash != manifest.get("summary_hash") or not summary_path.exists()
+    if report["summary_changed"]:
+        summary_path.write_text(summary)
+        manifest["summary_hash"] = summary_hash
+    scan_manifest.save_manifest(alch, manifest)
+    return summary, summary_hash, manifest, indexed_files
+
+
+async def refresh_codebase_summary(project_path: str) -> dict:
+    """Incrementally refresh codebase-summary.md only — no LLM call, no broadcasts."""
+    alch = Path(project_path) / ".alchemistral"
+    report: dict = {"added": [], "changed": [], "removed": [], "summary_changed": False}
+    if not alch.is_dir():
+        return report
+    await asyncio.to_thread(_write_summary, project_path, alch, True, report)
+    return report
+
+
+def _repo_header(summary: str) -> str:
+    """The repo-level parts of a codebase summary — without the file tree and samples."""
+    sections = re.split(r"(?m)^(?=## )", summary)
+    return "".join(
+        s for s in sections
+        if not s.startswith(("## File Tree", "## Source Samples"))
+    ).rstrip()
+
+
+async def _broadcast_scan_complete(broadcast, global_md: str, report: dict) -> None:
+    if broadcast:
+        await broadcast({
+            "agent_id": "orchestrator",
+            "type": "scan_complete",
+            "global_md": global_md,
+            "changes": report,
+            "timestamp": _ts(),
+        })
+
+
+@metrics.timed(metrics.STAGE_SECONDS.labels("scan"))
+async def scan_and_generate_global(project_path: str, broadcast=None, incremental: bool = False) -> dict:
+    """
+    Scan flow — full at project creation, incremental on rescan.
+    1. Build codebase-summary.md (incremental: only changed files are re-read)
+    2. Call Mistral Large to generate intelligent GLOBAL.md — in one shot, or
+       map-reduce over modules on large repos (see global_memory)
+       (incremental: skipped when the summary/partition hash hasn't changed)
+    3. Write both files plus manifest.json to .alchemistral/
     4. Broadcast progress events via WebSocket
+
+    Returns a report: added/changed/removed files, summary_changed, global_regenerated.
     """
     project_path = str(Path(project_path).resolve())
-    logger.info(f"[codebase_scanner] Scanning codebase at: {project_path}")
+    logger.info(f"[codebase_scanner] Scanning codebase at: {project_path} (incremental={incremental})")
+    report: dict = {"added": [], "changed": [], "removed": [], "summary_changed": False, "global_regenerated": False}
 
     if not Path(project_path).exists():
         logger.error(f"[codebase_scanner] Path does not exist: {project_path}")
-        return
+        return report
 
     # Sanity check: list top-level contents to verify we're in the right place
     top_level = [p.name for p in sorted(Path(project_path).iterdir())[:20]]
@@ -206,71 +551,80 @@ async def scan_and_generate_global(project_path: str, broadcast=None) -> None:
         await broadcast({
             "agent_id": "orchestrator",
             "type": "scanning",
-            "text": "Scanning codebase...",
+            "text": "Rescanning changed files..." if incremental else "Scanning codebase...",
             "timestamp": _ts(),
         })
 
     # Step 1: raw scan
-    summary = await asyncio.to_thread(build_codebase_summary, project_path)
-    (alch / "codebase-summary.md").write_text(summary)
-    logger.info(f"[codebase_scanner] Wrote codebase-summary.md ({len(summary)} chars) for {project_path}")
+    summary, summary_hash, manifest, files = await asyncio.to_thread(
+        _write_summary, project_path, alch, incremental, report,
+    )
+    if report["summary_changed"]:
+        logger.info(f"[codebase_scanner] Wrote codebase-summary.md ({len(summary)} chars) for {project_path}")
 
     # Broadcast: files written
-    if broadcast:
+    if broadcast and report["summary_changed"]:
         await broadcast({
             "agent_id": "orchestrator",
             "type": "files_updated",
             "timestamp": _ts(),
         })
 
-    # Step 2: call Mistral Large for intelligent GLOBAL.md
+    # Step 2: call Mistral Large for intelligent GLOBAL.md — map-reduce over
+    # modules on large repos, where the generation hash covers every partition
+    memory_plan = None
+    if global_memory.use_hierarchical(summary, files):
+        memory_plan = await asyncio.to_thread(global_memory.plan, project_path, files)
+    generation_hash = scan_manifest.hash_text(summary_hash + memory_plan.digest) if memory_plan else summary_hash
+
+    if incremental and manifest.get("global_summary_hash") == generation_hash:
+        logger.info("[codebase_scanner] Summary unchanged — keeping existing GLOBAL.md")
+        await _broadcast_scan_complete(broadcast, "", report)
+        return report
+
     client = get_client()
     if not client.api_key:
         logger.warning("MISTRAL_API_KEY not set — skipping LLM-generated GLOBAL.md")
-        if broadcast:
-            await broadcast({
-                "agent_id": "orchestrator",
-                "type": "scan_complete",
-                "global_md": "",
-                "timestamp": _ts(),
-            })
-        return
+        await _broadcast_scan_complete(broadcast, "", report)
+        return report
 
     # Broadcast: generating project memory
     if broadcast:
+        text = "Generating project memory..."
+        if memory_plan:
+            text = f"Generating project memory from {len(memory_plan.partitions)} modules..."
         await broadcast({
             "agent_id": "orchestrator",
             "type": "scanning",
-            "text": "Generating project memory...",
+            "text": text,
             "timestamp": _ts(),
         })
 
     try:
-        global_md = await client.chat(
-            model="mistral-large-latest",
-            messages=[
-                {"role": "system", "content": _GLOBAL_SYSTEM_PROMPT},
-                {"role": "user", "content": summary},
-            ],
-            temperature=0.3,
-        )
+        if memory_plan:
+            global_md, report["partitions"] = await global_memory.generate(
+                client, alch, _repo_header(summary), memory_plan,
+            )
+        else:
+            global_md = await client.chat(
+                model="mistral-large-latest",
+                messages=[
+                    {"role": "system", "content": _GLOBAL_SYSTEM_PROMPT},
+                    {"role": "user", "content": summary},
+                ],
+                temperature=0.3,
+            )
         (alch / "GLOBAL.md").write_text(global_md)
         logger.info(f"Wrote LLM-generated GLOBAL.md for {project_path}")
+        # A module that fell back to its raw scan text keeps the next rescan regenerating
+        if not report.get("partitions", {}).get("failed"):
+            manifest["global_summary_hash"] = generation_hash
+        await asyncio.to_thread(scan_manifest.save_manifest, alch, manifest)
+        report["global_regenerated"] = True
 
         # Broadcast: scan complete with new GLOBAL.md content
-        if broadcast:
-            await broadcast({
-                "agent_id": "orchestrator",
-                "type": "scan_complete",
-                "global_md": global_md,
-                "timestamp": _ts(),
-            })
+        await _broadcast_scan_complete(broadcast, global_md, report)
     except Exception as exc:
         logger.warning(f"Failed to generate GLOBAL.md via LLM: {exc}")
-        if broadcast:
-            await broadcast({
-                "agent_id": "orchestrator",
-                "type": "scan_complete",
-                "global_md": "",
-                "timestamp": _ts(),
-            })
+        await _broadcast_scan_complete(broadcast, "", report)
+    return report
@@ -4,31 +4,45 @@ then auto-merges, auto-installs deps, and auto-runs verification.
 """
 import asyncio
 import logging
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Callable, Awaitable
 
+from services import metrics, tracing
 from services.agent_manager import agent_manager
+from services.git_runner import git_runner
 
 logger = logging.getLogger(__name__)
 
 MAX_CONCURRENT_AGENTS = 3
 AUTO_RUN_TIMEOUT = 30
 
+_AGENTS_QUEUED = metrics.gauge("alchemistral_agents_queued", "DAG tasks waiting for an agent slot")
+_MAKESPAN_SECONDS = metrics.histogram(
+    "alchemistral_dag_makespan_seconds", "Wall time from DAG start until every task finished",
+    buckets=(10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200),
+)
+_MERGE_CONFLICTS = metrics.counter(
+    "alchemistral_merge_conflicts_total", "Agent branch merge conflicts", ["resolution"],
+)
+
 
 def _ts() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
 async def _git(cwd: str, *args: str) -> tuple[int, str, str]:
-    proc = await asyncio.create_subprocess_exec(
-        "git", *args,
-        cwd=cwd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, stderr = await proc.communicate()
-    return proc.returncode, stdout.decode(), stderr.decode()
+    return await git_runner.run(cwd, *args)
+
+
+async def _file_changed(project_path: str, old_rev: str, path: str) -> bool:
+    """Compare a file's blob id at HEAD vs old_rev via the repo's cat-file batch process."""
+    new = await git_runner.read_object(project_path, f"HEAD:{path}")
+    old = await git_runner.read_object(project_path, f"{old_rev}:{path}")
+    if new is None:
+        return False
+    return old is None or old[0] != new[0]
 
 
 async def _shell(cwd: str, cmd: str, timeout: int = AUTO_RUN_TIMEOUT) -> tuple[int, str]:
@@ -49,6 +63,7 @@ async def _shell(cwd: str, cmd: str, timeout: int = AUTO_RUN_TIMEOUT) -> tuple[i
 
 # ── Auto-merge ──────────────────────────────────────────────────────────────
 
+@tracing.traced()
 async def _auto_merge(
     project_path: str,
     dag: list[dict],
@@ -88,10 +103,12 @@ async def _auto_merge(
                 "--strategy-option", "theirs",
             )
             if rc2 != 0:
+                _MERGE_CONFLICTS.labels("unresolved").inc()
                 await _git(project_path, "merge", "--abort")
                 conflicts.append(branch)
                 logger.warning(f"Merge conflict unresolvable for {branch}: {err2}")
                 continue
+            _MERGE_CONFLICTS.labels("theirs").inc()
 
         merged.append(branch)
         logger.info(f"Merged {branch} into main")
@@ -109,6 +126,7 @@ async def _auto_merge(
 
 # ── Auto-install deps ───────────────────────────────────────────────────────
 
+@tracing.traced()
 async def _auto_install_deps(
     project_path: str,
     merge_count: int,
@@ -116,8 +134,7 @@ async def _auto_install_deps(
 ) -> None:
     """Check if requirements.txt or package.json changed, install if so."""
     # Check for Python deps
-    rc, diff_out, _ = await _git(project_path, "diff", f"HEAD~{merge_count}", "--", "requirements.txt")
-    if rc == 0 and diff_out.strip():
+    if await _file_changed(project_path, f"HEAD~{merge_count}", "requirements.txt"):
         await broadcast({
             "agent_id": "orchestrator", "type": "thinking",
             "text": "Installing Python dependencies...", "timestamp": _ts(),
@@ -132,8 +149,7 @@ async def _auto_install_deps(
         return
 
     # Check for Node deps
-    rc, diff_out, _ = await _git(project_path, "diff", f"HEAD~{merge_count}", "--", "package.json")
-    if rc == 0 and diff_out.strip():
+    if await _file_changed(project_path, f"HEAD~{merge_count}", "package.json"):
         await broadcast({
             "agent_id": "orchestrator", "type": "thinking",
             "text": "Installing Node dependencies...", "timestamp": _ts(),
@@ -149,6 +165,7 @@ async def _auto_install_deps(
 
 # ── Auto-run ────────────────────────────────────────────────────────────────
 
+@tracing.traced()
 async def _auto_run(
     project_path: str,
     run_command: str,
@@ -174,6 +191,7 @@ async def _auto_run(
 
 # ── Main DAG executor ──────────────────────────────────────────────────────
 
+@tracing.traced()
 async def execute_dag(
     dag: list[dict],
     project_path: str,
@@ -204,6 +222,7 @@ async def execute_dag(
     spawned: set[str] = set()
     agent_futures: dict[str, asyncio.Task] = {}
 
+    started = time.perf_counter()
     await broadcast({
         "agent_id": "orchestrator", "type": "dag_execution_start",
         "text": f"Executing DAG with {len(dag)} tasks", "timestamp": _ts(),
@@ -211,7 +230,14 @@ async def execute_dag(
 
     async def _run_agent(agent_id: str, task_id: str, task: dict) -> None:
         """Acquire semaphore, spawn agent, wait for completion, commit work, release."""
-        async with semaphore:
+        tracing.set_lane(agent_id)
+        _AGENTS_QUEUED.inc()
+        try:
+            with tracing.span("queue_wait"):
+                await semaphore.acquire()
+        finally:
+            _AGENTS_QUEUED.dec()
+        try:
             domain = task.get("agent_domain", "backend")
             label = task.get("label", task_id)
             prompt = task.get("prompt", "")
@@ -231,13 +257,14 @@ async def execute_dag(
             )
 
             # Poll until done
-            while True:
-                state = agent_manager.get_agent(agent_id)
-                if not state:
-                    break
-                if state.status in ("done", "failed"):
-                    break
-                await asyncio.sleep(1)
+            with tracing.span("agent_run", domain=domain):
+                while True:
+                    state = agent_manager.get_agent(agent_id)
+                    if not state:
+                        break
+                    if state.status in ("done", "failed"):
+                        break
+                    await asyncio.sleep(1)
 
             # ── Git commit agent work ──
             # Vibe CLI creates files but doesn't commit them.
@@ -266,6 +293,8 @@ async def execute_dag(
                         logger.warning(f"[dag] git commit in {wt} returned {rc}: {err}")
                 except Exception as exc:
                     logger.error(f"[dag] Failed to commit agent work in {wt}: {exc}")
+        finally:
+            semaphore.release()
 
         state = agent_manager.get_agent(agent_id)
         if state and state.status == "done":
@@ -282,54 +311,61 @@ async def execute_dag(
         return any(d in failed for d in deps)
 
     # Main execution loop
-    max_iterations = len(dag) * 10
-    iteration = 0
-
-    while len(completed) + len(failed) < len(dag):
-        iteration += 1
-        if iteration > max_iterations:
-            logger.error("DAG execution exceeded max iterations — aborting")
-            break
-
-        ready: list[dict] = []
-        for task in dag:
-            tid = task["id"]
-            if tid in spawned:
-                continue
-            if _deps_failed(task):
-                failed.add(tid)
+    try:
+        max_iterations = len(dag) * 10
+        iteration = 0
+
+        while len(completed) + len(failed) < len(dag):
+            iteration += 1
+            if iteration > max_iterations:
+                logger.error("DAG execution exceeded max iterations — aborting")
+                break
+
+            ready: list[dict] = []
+            for task in dag:
+                tid = task["id"]
+                if tid in spawned:
+                    continue
+                if _deps_failed(task):
+                    failed.add(tid)
+                    spawned.add(tid)
+                    await broadcast({
+                        "agent_id": "orchestrator", "type": "task_skipped",
+                        "task_id": tid,
+                        "text": f"Skipped {task.get('label', tid)} — dependency failed",
+                        "timestamp": _ts(),
+                    })
+                    continue
+                if _deps_met(task):
+                    ready.append(task)
+
+            for task in ready:
+                tid = task["id"]
                 spawned.add(tid)
-                await broadcast({
-                    "agent_id": "orchestrator", "type": "task_skipped",
-                    "task_id": tid,
-                    "text": f"Skipped {task.get('label', tid)} — dependency failed",
-                    "timestamp": _ts(),
-                })
-                continue
-            if _deps_met(task):
-                ready.append(task)
-
-        for task in ready:
-            tid = task["id"]
-            spawned.add(tid)
-            agent_id = f"{task.get('agent_domain', 'agent')}-{tid}"
-            agent_futures[tid] = asyncio.create_task(
-                _run_agent(agent_id, tid, task)
-            )
-
-        running = [
-            tid for tid, fut in agent_futures.items()
-            if not fut.done() and tid not in completed and tid not in failed
-        ]
-        if not ready and not running:
-            logger.warning("DAG executor: no tasks ready and none running — possible cycle")
-            break
-
-        if running:
-            running_futures = [agent_futures[tid] for tid in running]
-            await asyncio.wait(running_futures, return_when=asyncio.FIRST_COMPLETED)
+                agent_id = f"{task.get('agent_domain', 'agent')}-{tid}"
+                agent_futures[tid] = asyncio.create_task(
+                    _run_agent(agent_id, tid, task)
+                )
+
+            running = [
+                tid for tid, fut in agent_futures.items()
+                if not fut.done() and tid not in completed and tid not in failed
+            ]
+            if not ready and not running:
+                logger.warning("DAG executor: no tasks ready and none running — possible cycle")
+                break
+
+            if running:
+                running_futures = [agent_futures[tid] for tid in running]
+                await asyncio.wait(running_futures, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        # Mission cancelled: agents still queued on the semaphore must not spawn
+        for fut in agent_futures.values():
+            fut.cancel()
+        raise
 
     # ── DAG execution summary ──
+    _MAKESPAN_SECONDS.observe(time.perf_counter() - started)
     await broadcast({
         "agent_id": "orchestrator", "type": "dag_execution_done",
         "completed": list(completed), "failed": list(failed),
@@ -0,0 +1,142 @@
+"""
+Event Parser — turns CLI agent output lines into typed events with fields.
+
+Shared by every CLIAdapter:
+  - LineClassifier: an ordered table of (event type, regex) rules compiled
+    into one alternation, so each line is matched once; named groups `path`,
+    `command` and `exit_code` become event fields
+  - parse_json_line: for CLIs with a machine-readable JSON-lines mode, maps
+    both event-style ({"type": "bash", "command": ...}) and message-style
+    ({"role": "assistant", "tool_calls": [...]}) objects onto the same fields
+
+Both return a ParsedLine; adapters wrap it in an AgentEvent.
+"""
+import json
+import re
+from dataclasses import dataclass
+
+
+@dataclass
+class ParsedLine:
+    type: str
+    text: str
+    file_path: str | None = None
+    command: str | None = None
+    exit_code: int | None = None
+
+
+class LineClassifier:
+    """First matching rule wins; unmatched lines are typed `default`."""
+
+    def __init__(self, rules: list[tuple[str, str]], default: str = "output") -> None:
+        self._types: list[str] = []
+        alternatives: list[str] = []
+        for i, (event_type, pattern) in enumerate(rules):
+            # Group names must be unique across the alternation: r<i>_<field>
+            pattern = re.sub(r"\(\?P<(\w+)>", lambda m: f"(?P<r{i}_{m.group(1)}>", pattern)
+            alternatives.append(f"(?P<r{i}>{pattern})")
+            self._types.append(event_type)
+        self._re = re.compile("|".join(alternatives))
+        self._default = default
+
+    def classify(self, line: str) -> ParsedLine:
+        m = self._re.match(line)
+        if not m:
+            return ParsedLine(self._default, line)
+        # The rule's outer group closes last, so it is the match's lastgroup
+        rule = int(m.lastgroup[1:])
+        parsed = ParsedLine(self._types[rule], line)
+        groups = {k: v for k, v in m.groupdict().items() if v is not None}
+        path = groups.get(f"r{rule}_path")
+        command = groups.get(f"r{rule}_command")
+        code = groups.get(f"r{rule}_exit_code")
+        parsed.file_path = path.strip("`'\":") if path else None
+        parsed.command = command.strip() if command else None
+        parsed.exit_code = int(code) if code else None
+        return parsed
+
+
+# Vibe CLI text output
+VIBE_RULES: list[tuple[str, str]] = [
+    ("think", r"Thinking|>"),
+    ("bash", r"\$ (?P<command>.+)"),
+    ("bash", r"Running:\s*(?P<command>.+)"),
+    ("code", r"(?:Writing|Editing)(?:\s+(?:to\s+)?`?(?P<path>[\w./-]*\.[A-Za-z0-9]+)\b)?"),
+    ("output", r".*?\b(?:[Ee]xit(?:ed with)? code|returncode)[:=]?\s*(?P<exit_code>-?\d+)"),
+]
+vibe_classifier = LineClassifier(VIBE_RULES)
+
+
+# JSON-lines: event type aliases → AgentEvent types
+_JSON_TYPES = {
+    "think": "think", "thinking": "think", "reasoning": "think", "assistant": "think",
+    "bash": "bash", "shell": "bash", "command": "bash", "exec": "bash",
+    "code": "code", "edit": "code", "write": "code", "file_edit": "code", "patch": "code",
+    "tool": "tool", "tool_call": "tool", "tool_use": "tool", "tool_result": "output",
+    "error": "error",
+    # the adapter reports completion itself when the process exits
+    "done": "output", "result": "output", "output": "output", "user": "output",
+}
+_BASH_TOOLS = {"bash", "shell", "run_command", "execute", "exec"}
+_EDIT_TOOLS = {"write_file", "edit_file", "search_replace", "create_file", "edit", "write", "str_replace"}
+
+
+def _first(obj: dict, *keys: str):
+    for key in keys:
+        value = obj.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _tool_call(obj: dict) -> tuple[str, dict] | None:
+    calls = obj.get("tool_calls")
+    if not isinstance(calls, list) or not calls or not isinstance(calls[0], dict):
+        return None
+    fn = calls[0].get("function", calls[0])
+    name = str(fn.get("name", ""))
+    args = fn.get("arguments", {})
+    if isinstance(args, str):
+        try:
+            args = json.loads(args)
+        except ValueError:
+            args = {}
+    return name, args if isinstance(args, dict) else {}
+
+
+def parse_json_line(line: str) -> ParsedLine | None:
+    """Parse one JSON-lines record; None if the line is not a JSON object."""
+    if not line.startswith("{"):
+        return None
+    try:
+        obj = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(obj, dict):
+        return None
+
+    kind = str(_first(obj, "type", "event", "kind", "role") or "output").lower()
+    parsed = ParsedLine(_JSON_TYPES.get(kind, "output"), "")
+    text = _first(obj, "text", "message", "content")
+    args: dict = obj
+
+    call = _tool_call(obj)
+    if call:
+        name, args = call
+        parsed.type = "bash" if name in _BASH_TOOLS else "code" if name in _EDIT_TOOLS else "tool"
+        text = text or f"{name}({', '.join(f'{k}={str(v)[:80]}' for k, v in args.items())})"
+
+    path = _first(args, "file_path", "path", "file", "filename")
+    command = _first(args, "command", "cmd")
+    code = _first(obj, "exit_code", "returncode", "return_code")
+    parsed.file_path = str(path) if path is not None else None
+    parsed.command = " ".join(command) if isinstance(command, list) else (str(command) if command else None)
+    if isinstance(code, int) or (isinstance(code, str) and code.lstrip("-").isdigit()):
+        parsed.exit_code = int(code)
+    if parsed.type == "output" and parsed.command:
+        parsed.type = "bash"
+
+    if not isinstance(text, str):
+        text = json.dumps(text) if text is not None else ""
+    parsed.text = text or parsed.command or parsed.file_path or line
+    return parsed
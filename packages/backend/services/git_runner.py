@@ -0,0 +1,173 @@
+"""
+Git Runner — single execution layer for every git command the backend issues.
+
+  - per-repo concurrency limit (GIT_MAX_CONCURRENCY processes per working dir)
+  - batched writes: ref changes (e.g. deleting many branches) as one `update-ref --stdin` transaction
+  - long-lived `cat-file --batch` process per repo for object reads
+  - timing metrics per git subcommand (see GitRunner.stats, and /metrics)
+"""
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+
+from services import metrics, tracing
+
+logger = logging.getLogger(__name__)
+
+GIT_MAX_CONCURRENCY = int(os.getenv("GIT_MAX_CONCURRENCY", "4"))
+
+class _CatFileBatch:
+    """A persistent `git cat-file --batch` process for one repository."""
+
+    def __init__(self, cwd: str) -> None:
+        self.cwd = cwd
+        self._proc: asyncio.subprocess.Process | None = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure(self) -> asyncio.subprocess.Process:
+        if self._proc is None or self._proc.returncode is not None:
+            self._proc = await asyncio.create_subprocess_exec(
+                "git", "cat-file", "--batch",
+                cwd=self.cwd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        return self._proc
+
+    async def read(self, spec: str) -> tuple[str, str, bytes] | None:
+        """Return (object_id, type, content) for `spec`, or None if it doesn't exist."""
+        async with self._lock:
+            proc = await self._ensure()
+            assert proc.stdin and proc.stdout
+            proc.stdin.write(spec.encode() + b"\n")
+            await proc.stdin.drain()
+            header = (await proc.stdout.readline()).decode().rstrip("\n")
+            parts = header.split(" ")
+            if len(parts) != 3 or parts[-1] in ("missing", "ambiguous"):
+                return None
+            oid, obj_type, size = parts[0], parts[1], int(parts[2])
+            content = await proc.stdout.readexactly(size + 1)  # trailing LF
+            return oid, obj_type, content[:-1]
+
+    async def close(self) -> None:
+        proc = self._proc
+        self._proc = None
+        if proc and proc.returncode is None:
+            if proc.stdin:
+                proc.stdin.close()
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=2)
+            except asyncio.TimeoutError:
+                proc.kill()
+
+
+_COMMAND_SECONDS = metrics.histogram("alchemistral_git_command_seconds", "git command duration", ["subcommand"])
+_COMMAND_ERRORS = metrics.counter("alchemistral_git_command_errors_total", "git commands that failed", ["subcommand"])
+
+
+class GitRunner:
+    """Runs git commands with per-repo limits, batching, and timing metrics."""
+
+    def __init__(self, max_per_repo: int = GIT_MAX_CONCURRENCY) -> None:
+        self._max_per_repo = max_per_repo
+        self._limits: dict[str, asyncio.Semaphore] = {}
+        self._cat_files: dict[str, _CatFileBatch] = {}
+        # stats[subcommand] = {"count", "errors", "total_s", "max_s"}
+        self._stats: dict[str, dict[str, float]] = {}
+
+    def _limit(self, cwd: str) -> asyncio.Semaphore:
+        key = str(Path(cwd).resolve())
+        sem = self._limits.get(key)
+        if sem is None:
+            sem = asyncio.Semaphore(self._max_per_repo)
+            self._limits[key] = sem
+        return sem
+
+    def _record(self, subcommand: str, elapsed: float, ok: bool) -> None:
+        _COMMAND_SECONDS.labels(subcommand).observe(elapsed)
+        if not ok:
+            _COMMAND_ERRORS.labels(subcommand).inc()
+        s = self._stats.setdefault(subcommand, {"count": 0, "errors": 0, "total_s": 0.0, "max_s": 0.0})
+        s["count"] += 1
+        s["total_s"] += elapsed
+        s["max_s"] = max(s["max_s"], elapsed)
+        if not ok:
+            s["errors"] += 1
+
+    async def run(
+        self,
+        cwd: str,
+        *args: str,
+        input: bytes | None = None,
+    ) -> tuple[int, str, str]:
+        """Run a git command and return (returncode, stdout, stderr)."""
+        subcommand = args[0] if args else ""
+        with tracing.span(f"git {subcommand}"):
+            async with self._limit(cwd):
+                start = time.perf_counter()
+                proc = await asyncio.create_subprocess_exec(
+                    "git", *args,
+                    cwd=cwd,
+                    stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                stdout, stderr = await proc.communicate(input)
+                self._record(subcommand, time.perf_counter() - start, proc.returncode == 0)
+        return proc.returncode, stdout.decode(), stderr.decode()
+
+    async def delete_branches(self, cwd: str, branches: list[str]) -> tuple[int, str, str]:
+        """
+        Force-delete many branches in one update-ref transaction (missing ones
+        are ignored). Unlike `branch -D` this does not refuse a branch that is
+        checked out, so remove its worktree first.
+        """
+        return await self.update_refs(cwd, [f"delete refs/heads/{b}" for b in branches])
+
+    async def update_refs(self, cwd: str, commands: list[str]) -> tuple[int, str, str]:
+        """
+        Apply ref updates atomically via `git update-ref --stdin`.
+
+        Each command is one update-ref stdin line, e.g. "delete refs/heads/agent/x"
+        or "update refs/heads/main <new> <old>". All succeed or none do.
+        """
+        if not commands:
+            return 0, "", ""
+        payload = "start\n" + "".join(f"{c}\n" for c in commands) + "prepare\ncommit\n"
+        return await self.run(cwd, "update-ref", "--stdin", input=payload.encode())
+
+    async def read_object(self, cwd: str, spec: str) -> tuple[str, str, bytes] | None:
+        """Read an object (e.g. "HEAD:package.json") through the repo's cat-file batch process."""
+        key = str(Path(cwd).resolve())
+        batch = self._cat_files.get(key)
+        if batch is None:
+            batch = _CatFileBatch(cwd)
+            self._cat_files[key] = batch
+        start = time.perf_counter()
+        try:
+            result = await batch.read(spec)
+        except (asyncio.IncompleteReadError, BrokenPipeError, ConnectionResetError) as exc:
+            logger.warning(f"[git] cat-file batch in {cwd} failed: {exc}")
+            await batch.close()
+            result = None
+        self._record("cat-file", time.perf_counter() - start, result is not None)
+        return result
+
+    async def close(self, cwd: str | None = None) -> None:
+        """Stop long-lived cat-file processes (for one repo, or all of them)."""
+        keys = [str(Path(cwd).resolve())] if cwd else list(self._cat_files)
+        for key in keys:
+            batch = self._cat_files.pop(key, None)
+            if batch:
+                await batch.close()
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Per-subcommand call counts, error counts, and total/max durations (seconds)."""
+        return {name: dict(s) for name, s in self._stats.items()}
+
+
+# Global singleton
+git_runner = GitRunner()
@@ -0,0 +1,310 @@
+"""
+Global Memory — hierarchical (map-reduce) GLOBAL.md generation for large repositories.
+
+The single-shot path sends one summary capped at a few hundred files; on a big
+monorepo that either loses most of the tree or overflows the model context.
+Here the repo is instead:
+  1. partitioned by top-level module (split deeper when too large, or when a
+     directory only groups sub-projects, like packages/ in a monorepo)
+  2. mapped: each partition is summarised concurrently by a fast model, at
+     most GLOBAL_MD_MAP_CONCURRENCY at a time — below the client-wide limit,
+     so interactive reprompt/orchestrate calls are never starved by a scan
+  3. reduced: the partition summaries plus the repo-level scan header go to
+     Mistral Large, which writes GLOBAL.md
+
+Partition summaries are cached at .alchemistral/index/partitions.json keyed by
+a hash of the partition's scan text, so a rescan only re-summarises the
+modules that changed.
+"""
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from services import scan_manifest, symbol_index
+from services.mistral_client import MistralClient
+
+logger = logging.getLogger(__name__)
+
+# auto: hierarchical once the repo outgrows the single-shot summary
+GLOBAL_MD_MODE = os.getenv("GLOBAL_MD_MODE", "auto")  # auto | single | hierarchical
+HIERARCHICAL_MIN_FILES = int(os.getenv("GLOBAL_MD_HIERARCHICAL_MIN_FILES", "400"))
+HIERARCHICAL_MIN_CHARS = int(os.getenv("GLOBAL_MD_HIERARCHICAL_MIN_CHARS", "24000"))
+PARTITION_MAX_FILES = int(os.getenv("GLOBAL_MD_PARTITION_MAX_FILES", "400"))
+MAX_PARTITIONS = int(os.getenv("GLOBAL_MD_MAX_PARTITIONS", "24"))
+MAP_MODEL = os.getenv("GLOBAL_MD_MAP_MODEL", "mistral-small-latest")
+MAP_CONCURRENCY = int(os.getenv("GLOBAL_MD_MAP_CONCURRENCY", "2"))
+REDUCE_MODEL = "mistral-large-latest"
+
+CACHE_VERSION = 1
+_ROOT = "(root)"
+_MISC = "(misc)"
+_MIN_PARTITION_FILES = 3
+_MAX_DEPTH = 3
+_TREE_LINES = 120
+_KEY_FILES = 12
+_SAMPLE_FILES = 4
+_SAMPLE_LINES = 15
+_MAP_FALLBACK_CHARS = 1500
+
+_MAP_SYSTEM_PROMPT = """\
+You are summarising ONE module of a larger codebase. Describe only what the scan shows.
+
+Return concise markdown (max 25 lines) covering:
+- Purpose of the module
+- Key files and the main symbols they define
+- Conventions and patterns visible in the samples
+- Dependencies on other modules or external libraries
+
+Never invent files. No preamble.\
+"""
+
+_REDUCE_SYSTEM_PROMPT = """\
+Generate a GLOBAL.md for this SPECIFIC codebase. Do NOT describe Alchemistral. \
+You are given the repository-level scan and a summary of each of its modules.
+
+Generate a GLOBAL.md with these sections:
+
+## Project Overview
+(What is this project? What does it do?)
+
+## Stack
+(Language, frameworks, build system, dependencies — only what the scan shows)
+
+## Architecture
+(Each module and what it does, how modules depend on each other)
+
+## Conventions
+(Coding style, naming, patterns detected in the modules)
+
+## Entry Points
+(Main files, build commands)
+
+RULES:
+- ONLY describe files and technologies that appear in the input
+- Never invent files that don't appear in the input
+- Never mention Alchemistral, orchestrators, or agents in the output
+- Be concise — max 100 lines\
+"""
+
+
+@dataclass
+class Partition:
+    name: str
+    files: list[str]
+    text: str = ""
+    hash: str = ""
+
+
+@dataclass
+class Plan:
+    """Partitions with their scan text, plus a digest over all of them."""
+    partitions: list[Partition]
+    digest: str
+
+
+def use_hierarchical(summary: str, files: list[str]) -> bool:
+    if GLOBAL_MD_MODE == "hierarchical":
+        return True
+    if GLOBAL_MD_MODE == "single":
+        return False
+    return len(files) >= HIERARCHICAL_MIN_FILES or len(summary) >= HIERARCHICAL_MIN_CHARS
+
+
+# ── Partitioning ────────────────────────────────────────────────────────────
+
+def _group(files: list[str], depth: int) -> dict[str, list[str]]:
+    groups: dict[str, list[str]] = {}
+    for rel in files:
+        parts = rel.split("/")
+        key = "/".join(parts[:depth]) if len(parts) > depth else (_ROOT if depth == 1 else "/".join(parts[:-1]))
+        groups.setdefault(key, []).append(rel)
+    return groups
+
+
+def partition_files(files: list[str]) -> list[Partition]:
+    """
+    Group files by top-level directory. Groups that are oversized, or pure
+    containers (only sub-directories, like packages/ in a monorepo), are split
+    by their sub-directories; tiny groups and the overflow past MAX_PARTITIONS
+    go to (misc).
+    """
+    files = [f.replace(os.sep, "/") for f in files]
+    groups = _group(files, 1)
+    pending = [k for k in groups if k != _ROOT]
+    while pending:
+        key = pending.pop()
+        members = groups[key]
+        depth = key.count("/") + 2
+        container = all(m.count("/") >= depth for m in members)
+        if depth > _MAX_DEPTH or not (container or len(members) > PARTITION_MAX_FILES):
+            continue
+        sub = _group(members, depth)
+        if len(sub) > 1:
+            del groups[key]
+            groups.update(sub)
+            pending.extend(sub)
+
+    ordered = sorted(groups.items(), key=lambda kv: (-len(kv[1]), kv[0]))
+    partitions: list[Partition] = []
+    misc: list[str] = []
+    for name, members in ordered:
+        if name != _ROOT and (len(members) < _MIN_PARTITION_FILES or len(partitions) >= MAX_PARTITIONS - 1):
+            misc.extend(members)
+        else:
+            partitions.append(Partition(name, sorted(members)))
+    if misc:
+        partitions.append(Partition(_MISC, sorted(misc)))
+    return sorted(partitions, key=lambda p: p.name)
+
+
+def _head_lines(path: Path, max_lines: int) -> str:
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read(4096)
+    except OSError:
+        return ""
+    if b"\0" in data:
+        return ""
+    return "\n".join(data.decode("utf-8", errors="ignore").splitlines()[:max_lines])
+
+
+def _partition_text(root: Path, part: Partition, index: "symbol_index.SymbolIndex", ranked: list[str]) -> str:
+    members = set(part.files)
+    tree = part.files[:_TREE_LINES]
+    more = len(part.files) - len(tree)
+    sections = [
+        f"# Module: {part.name} ({len(part.files)} files)",
+        "## Files\n" + "\n".join(tree) + (f"\n(+{more} more)" if more > 0 else ""),
+    ]
+
+    # Most-imported files of the partition first, then whatever else defines symbols
+    key_files = [p for p in ranked if p in members]
+    key_files += [p for p in part.files if p in index.files and p not in key_files]
+    lines: list[str] = []
+    for rel in key_files[:_KEY_FILES]:
+        names = [s["name"] for s in index.symbols_in(rel) if not s["name"].startswith("_")]
+        if names:
+            lines.append(f"- {rel}: {', '.join(names[:10])}" + (", …" if len(names) > 10 else ""))
+    if lines:
+        sections.append("## Key symbols\n" + "\n".join(lines))
+
+    samples: list[str] = []
+    for rel in (key_files or part.files)[:_SAMPLE_FILES]:
+        head = _head_lines(root / rel, _SAMPLE_LINES)
+        if head:
+            samples.append(f"=== {rel} (first {_SAMPLE_LINES} lines) ===\n{head}")
+    if samples:
+        sections.append("## Samples\n" + "\n\n".join(samples))
+    return "\n\n".join(sections)
+
+
+def plan(project_path: str, files: list[str]) -> Plan:
+    """Partition the repo and build each partition's scan text (blocking — run in a thread)."""
+    root = Path(project_path)
+    index = symbol_index.SymbolIndex.load(root / ".alchemistral")
+    ranked = [p for p, _ in index.most_imported(len(index.files))]
+    # Project memory itself is an output of this generation, not input
+    partitions = partition_files([f for f in files if not f.startswith(".alchemistral")])
+    for part in partitions:
+        part.text = _partition_text(root, part, index, ranked)
+        part.hash = scan_manifest.hash_text(part.text)
+    digest = scan_manifest.hash_text("".join(f"{p.name}:{p.hash}\n" for p in partitions))
+    return Plan(partitions, digest)
+
+
+# ── Cache ───────────────────────────────────────────────────────────────────
+
+def _cache_path(alch_dir: str | Path) -> Path:
+    return symbol_index.index_dir(alch_dir) / "partitions.json"
+
+
+def load_cache(alch_dir: str | Path) -> dict[str, dict]:
+    """Cached partition summaries: {name: {"hash": ..., "summary": ...}}."""
+    try:
+        data = json.loads(_cache_path(alch_dir).read_text())
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("partitions", {})
+
+
+def save_cache(alch_dir: str | Path, partitions: dict[str, dict]) -> None:
+    path = _cache_path(alch_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "partitions": partitions}, separators=(",", ":")))
+    os.replace(tmp, path)
+
+
+# ── Map / reduce ────────────────────────────────────────────────────────────
+
+_map_limit = asyncio.Semaphore(max(MAP_CONCURRENCY, 1))
+
+
+async def _map_partition(client: MistralClient, part: Partition) -> str | None:
+    try:
+        async with _map_limit:
+            return await client.chat(
+                model=MAP_MODEL,
+                messages=[
+                    {"role": "system", "content": _MAP_SYSTEM_PROMPT},
+                    {"role": "user", "content": part.text},
+                ],
+                temperature=0.2,
+            )
+    except Exception as exc:
+        logger.warning(f"[global_memory] Summarising module {part.name} failed: {exc}")
+        return None
+
+
+async def generate(client: MistralClient, alch_dir: str | Path, repo_header: str, plan: Plan) -> tuple[str, dict]:
+    """
+    Summarise changed partitions concurrently, then reduce everything into GLOBAL.md.
+
+    Returns (global_md, stats) where stats has partitions/cached/summarised/failed
+    counts. Raises if the reduce call fails.
+    """
+    cache = await asyncio.to_thread(load_cache, alch_dir)
+    todo = [p for p in plan.partitions if cache.get(p.name, {}).get("hash") != p.hash]
+    results = await asyncio.gather(*(_map_partition(client, p) for p in todo))
+
+    failed = 0
+    fresh: dict[str, str] = {}
+    for part, summary in zip(todo, results):
+        if summary is None:
+            failed += 1
+            # Raw scan text stands in, uncached, so the next rescan retries
+            fresh[part.name] = part.text[:_MAP_FALLBACK_CHARS]
+        else:
+            fresh[part.name] = summary
+            cache[part.name] = {"hash": part.hash, "summary": summary}
+
+    names = {p.name for p in plan.partitions}
+    cache = {name: entry for name, entry in cache.items() if name in names}
+    await asyncio.to_thread(save_cache, alch_dir, cache)
+
+    module_sections = [
+        f"### {p.name} ({len(p.files)} files)\n{fresh.get(p.name) or cache[p.name]['summary']}"
+        for p in plan.partitions
+    ]
+    reduce_input = f"{repo_header}\n\n## Module Summaries\n\n" + "\n\n".join(module_sections)
+    global_md = await client.chat(
+        model=REDUCE_MODEL,
+        messages=[
+            {"role": "system", "content": _REDUCE_SYSTEM_PROMPT},
+            {"role": "user", "content": reduce_input},
+        ],
+        temperature=0.3,
+    )
+    stats = {
+        "partitions": len(plan.partitions),
+        "cached": len(plan.partitions) - len(todo),
+        "summarised": len(todo) - failed,
+        "failed": failed,
+    }
+    logger.info(f"[global_memory] GLOBAL.md reduced from {stats}")
+    return global_md, stats
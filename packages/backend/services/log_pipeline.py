@@ -0,0 +1,185 @@
+"""
+Log Pipeline — queue-based, structured logging that keeps I/O off the event loop.
+
+configure() installs a single QueueHandler on the root logger: a log call
+only formats its record and puts it on an in-memory queue; a QueueListener
+thread writes it to the sinks:
+  - the console (stderr), human-readable
+  - optionally LOG_JSON_FILE, one JSON object per line, size-rotated
+
+Every record carries the mission_id / project_id / agent_id bound in the
+current task (bind / log_context), so one agent's or mission's lines can be
+filtered out of the JSON log. DEBUG records of an agent are rate-limited to
+LOG_AGENT_DEBUG_RATE per second (with a burst allowance); what was dropped is
+reported as a count on the next line that gets through.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_JSON_FILE = os.getenv("LOG_JSON_FILE", "")
+LOG_JSON_MAX_MB = int(os.getenv("LOG_JSON_MAX_MB", "20"))
+LOG_JSON_BACKUPS = int(os.getenv("LOG_JSON_BACKUPS", "5"))
+LOG_AGENT_DEBUG_RATE = float(os.getenv("LOG_AGENT_DEBUG_RATE", "20"))  # records/s per agent, 0 = unlimited
+LOG_AGENT_DEBUG_BURST = int(os.getenv("LOG_AGENT_DEBUG_BURST", "100"))
+
+CONTEXT_FIELDS = ("mission_id", "project_id", "agent_id")
+
+_context: dict[str, ContextVar[str | None]] = {
+    name: ContextVar(f"log_{name}", default=None) for name in CONTEXT_FIELDS
+}
+_listener: logging.handlers.QueueListener | None = None
+
+
+def bind(**fields: str | None) -> None:
+    """Attach context fields to every later record of the current task."""
+    for name, value in fields.items():
+        _context[name].set(value)
+
+
+@contextmanager
+def log_context(**fields: str | None):
+    """Attach context fields to the records logged inside the block."""
+    tokens = [(_context[name], _context[name].set(value)) for name, value in fields.items()]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the bound context onto the record (explicit `extra=` values win)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for name, var in _context.items():
+            if getattr(record, name, None) is None:
+                setattr(record, name, var.get())
+        return True
+
+
+class AgentRateLimitFilter(logging.Filter):
+    """Token bucket per agent for DEBUG records; other levels always pass."""
+
+    def __init__(self, rate: float = LOG_AGENT_DEBUG_RATE, burst: int = LOG_AGENT_DEBUG_BURST) -> None:
+        super().__init__()
+        self._rate = rate
+        self._burst = burst
+        # agent_id → [tokens, last refill, dropped since last pass]
+        self._buckets: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        agent_id = getattr(record, "agent_id", None)
+        if self._rate <= 0 or record.levelno != logging.DEBUG or not agent_id:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(agent_id)
+            if bucket is None:
+                bucket = self._buckets[agent_id] = [float(self._burst), now, 0]
+            bucket[0] = min(self._burst, bucket[0] + (now - bucket[1]) * self._rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            dropped, bucket[2] = int(bucket[2]), 0
+        if dropped:
+            record.msg = f"{record.getMessage()} ({dropped} debug line(s) suppressed)"
+            record.args = None
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for name in CONTEXT_FIELDS:
+            value = getattr(record, name, None)
+            if value is not None:
+                entry[name] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """basicConfig's "LEVEL:logger:message", plus the bound context."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = f"{record.levelname}:{record.name}:{record.getMessage()}"
+        context = " ".join(
+            f"{name}={getattr(record, name)}" for name in CONTEXT_FIELDS if getattr(record, name, None)
+        )
+        if context:
+            text += f"  [{context}]"
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Format the message here (args may be mutable), but keep exc_info:
+        # the sinks format tracebacks themselves, in the listener thread
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure(level: str = LOG_LEVEL, json_file: str = LOG_JSON_FILE) -> None:
+    """Route all logging through the queue; safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    console = logging.StreamHandler()
+    console.setFormatter(ConsoleFormatter())
+    sinks: list[logging.Handler] = [console]
+    if json_file:
+        path = Path(json_file).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        file_sink = logging.handlers.RotatingFileHandler(
+            path, maxBytes=LOG_JSON_MAX_MB * 1024 * 1024, backupCount=LOG_JSON_BACKUPS, encoding="utf-8",
+        )
+        file_sink.setFormatter(JSONFormatter())
+        sinks.append(file_sink)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(ContextFilter())
+    handler.addFilter(AgentRateLimitFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *sinks, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown)
+
+
+def shutdown() -> None:
+    """Flush the queue and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,190 @@
+"""
+Loop Monitor — event-loop lag watchdog and on-demand sampling profiler.
+
+Everything (routers, pipeline, agent streams, WebSocket fan-out) shares one
+asyncio loop, so any synchronous call that runs long stalls all of it.
+
+  - LoopLagMonitor: a heartbeat task on the loop measures how late each
+    wake-up is; a watchdog thread notices when the heartbeat stops and
+    captures the loop thread's stack *while* it is blocked, so each
+    blocking episode over LOOP_LAG_THRESHOLD_MS is recorded with its culprit
+  - profile(): samples the stacks of the loop thread (or all threads) at a
+    fixed interval for a bounded time and returns them as collapsed stacks
+    ("outer;inner;leaf count" lines — flamegraph.pl / speedscope input)
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "250"))  # 0 disables the monitor
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+LOOP_LAG_KEEP = int(os.getenv("LOOP_LAG_KEEP", "50"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+_LAG_SECONDS = metrics.histogram(
+    "alchemistral_event_loop_lag_seconds", "How late the event loop heartbeat woke up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+_BLOCKED = metrics.counter(
+    "alchemistral_event_loop_blocked_total", "Event loop stalls longer than LOOP_LAG_THRESHOLD_MS",
+)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame) -> str:
+    """Root-first "a;b;c" stack of a frame."""
+    labels: list[str] = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class LoopLagMonitor:
+    def __init__(
+        self,
+        threshold_ms: float = LOOP_LAG_THRESHOLD_MS,
+        interval_ms: float = LOOP_LAG_INTERVAL_MS,
+        keep: int = LOOP_LAG_KEEP,
+    ) -> None:
+        self._threshold = threshold_ms / 1000
+        self._interval = interval_ms / 1000
+        self._episodes: deque[dict] = deque(maxlen=keep)
+        self._beat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        # Stack captured by the watchdog for the stall in progress
+        self._pending: dict | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self.max_lag_ms = 0.0
+
+    @property
+    def loop_thread_id(self) -> int | None:
+        return self._loop_thread_id
+
+    def start(self) -> None:
+        """Start the heartbeat on the running loop and the watchdog thread."""
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watchdog, name="loop-lag-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"[loop_monitor] Watching event loop lag (threshold {self._threshold * 1000:.0f} ms)")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self._interval)
+            now = time.monotonic()
+            lag = max(now - before - self._interval, 0.0)
+            with self._lock:
+                self._beat = now
+                pending, self._pending = self._pending, None
+            _LAG_SECONDS.observe(lag)
+            self.max_lag_ms = max(self.max_lag_ms, lag * 1000)
+            if lag >= self._threshold:
+                self._record(lag, pending)
+
+    def _record(self, lag: float, pending: dict | None) -> None:
+        _BLOCKED.inc()
+        episode = {
+            "detected_at": pending["detected_at"] if pending else datetime.now(timezone.utc).isoformat(),
+            "lag_ms": round(lag * 1000, 1),
+            # Without a watchdog capture (stall shorter than its poll), the culprit is unknown
+            "stack": pending["stack"] if pending else [],
+        }
+        self._episodes.append(episode)
+        culprit = episode["stack"][-1].strip().splitlines()[0] if episode["stack"] else "unknown"
+        logger.warning(f"[loop_monitor] Event loop blocked for {episode['lag_ms']} ms at {culprit}")
+
+    def _watchdog(self) -> None:
+        poll = min(self._interval, self._threshold) / 2
+        while not self._stop.wait(poll):
+            with self._lock:
+                stalled = time.monotonic() - self._beat - self._interval
+                if stalled < self._threshold or self._pending is not None:
+                    continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.format_stack(frame)
+            with self._lock:
+                # The loop may have woken up meanwhile; then the capture is stale
+                if time.monotonic() - self._beat - self._interval >= self._threshold:
+                    self._pending = {"detected_at": datetime.now(timezone.utc).isoformat(), "stack": stack}
+
+    def episodes(self, limit: int = 50) -> list[dict]:
+        """Recorded blocking episodes, newest first."""
+        return list(self._episodes)[-limit:][::-1]
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "threshold_ms": self._threshold * 1000,
+            "episodes": len(self._episodes),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+        }
+
+
+monitor = LoopLagMonitor()
+
+_profiling = threading.Lock()
+
+
+def profile(seconds: float, interval_ms: float = 5.0, all_threads: bool = False) -> dict:
+    """
+    Sample thread stacks for `seconds` (capped at PROFILE_MAX_SECONDS); blocking,
+    run it in a worker thread. Returns {"samples", "seconds", "stacks": Counter}
+    where each stack is a collapsed root-first "a;b;c" string, prefixed by
+    the thread name when all threads are sampled.
+    """
+    if not _profiling.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+    try:
+        seconds = min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
+        interval = max(interval_ms, 1.0) / 1000
+        me = threading.get_ident()
+        target = None if all_threads else monitor.loop_thread_id or threading.main_thread().ident
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks: Counter[str] = Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me or (target is not None and ident != target):
+                    continue
+                stack = _collapse(frame)
+                if all_threads:
+                    stack = f"{names.get(ident, ident)};{stack}"
+                stacks[stack] += 1
+            samples += 1
+            time.sleep(interval)
+        return {"samples": samples, "seconds": seconds, "stacks": stacks}
+    finally:
+        _profiling.release()
+
+
+def collapsed_text(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
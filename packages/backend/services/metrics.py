@@ -0,0 +1,267 @@
+"""
+Metrics — a small in-process registry exported in Prometheus text format.
+
+Counters, gauges and histograms with labels; no client library needed.
+Services create their metrics at import time and update them inline:
+
+    _LATENCY = metrics.histogram("alchemistral_x_seconds", "X latency", ["model"])
+    _LATENCY.labels("mistral-large-latest").observe(0.42)
+
+A gauge may instead be computed at scrape time with set_function (e.g. the
+number of connected WebSocket clients). GET /metrics renders everything.
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+# Seconds: from a fast git call up to a slow LLM completion
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: list[str] | None = None) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames or ())
+        self._lock = threading.Lock()
+        self._children: dict[tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _default(self):
+        return self.labels()
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _Scalar(_Metric):
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default().inc(amount)
+
+    def samples(self) -> Iterator[str]:
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_labels_text(self.labelnames, key)} {_number(child.value)}"
+
+
+class Counter(_Scalar):
+    type = "counter"
+
+
+class Gauge(_Scalar):
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: list[str] | None = None) -> None:
+        super().__init__(name, help, labelnames)
+        self._function: Callable[[], float | dict[tuple[str, ...], float]] | None = None
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def dec(self, amount: float = 1) -> None:
+        self._default().dec(amount)
+
+    def set_function(self, fn: Callable[[], float | dict[tuple[str, ...], float]]) -> None:
+        """Compute the value at scrape time; labelled gauges return {label values: value}."""
+        self._function = fn
+
+    def samples(self) -> Iterator[str]:
+        if self._function is None:
+            yield from super().samples()
+            return
+        try:
+            result = self._function()
+        except Exception:
+            return  # a broken collector must not fail the whole scrape
+        values = result if isinstance(result, dict) else {(): result}
+        for key, value in values.items():
+            yield f"{self.name}{_labels_text(self.labelnames, key)} {_number(value)}"
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: list[str] | None = None,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def samples(self) -> Iterator[str]:
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, n in zip(child.buckets, counts):
+                cumulative += n
+                labels = _labels_text(self.labelnames, key, f'le="{_number(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _labels_text(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {count}"
+            yield f"{self.name}_sum{_labels_text(self.labelnames, key)} {_number(total)}"
+            yield f"{self.name}_count{_labels_text(self.labelnames, key)} {count}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls: type, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, *args, **kwargs)
+                if not metric.labelnames:
+                    metric.labels()  # unlabelled metrics are exported from the start, at 0
+                self._metrics[name] = metric
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name} already registered as {metric.type}")
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+
+registry = Registry()
+
+
+def counter(name: str, help: str, labelnames: list[str] | None = None) -> Counter:
+    return registry._get_or_create(Counter, name, help, labelnames)
+
+
+def gauge(name: str, help: str, labelnames: list[str] | None = None) -> Gauge:
+    return registry._get_or_create(Gauge, name, help, labelnames)
+
+
+def histogram(
+    name: str,
+    help: str,
+    labelnames: list[str] | None = None,
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return registry._get_or_create(Histogram, name, help, labelnames, buckets)
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format."""
+    return registry.render()
+
+
+def timed(child: "_HistogramValue"):
+    """Decorator: observe the duration of every call of an async function."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with child.time():
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Shared by the pipeline stages (reprompt, orchestrate, scan)
+STAGE_SECONDS = histogram("alchemistral_stage_seconds", "Duration of pipeline stages", ["stage"])
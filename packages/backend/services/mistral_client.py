@@ -1,13 +1,33 @@
 """
 Mistral API client — thin async wrapper around the chat completions endpoint.
+
+All clients share one concurrency limit (MISTRAL_MAX_CONCURRENCY requests
+in flight), so nothing can flood the API. Fan-out callers like the
+map-reduce GLOBAL.md generation also keep a smaller limit of their own (see
+global_memory), so they never hold every slot.
 """
+import asyncio
 import os
 import logging
+import time
+
 import httpx
 
+from services import metrics
+
 logger = logging.getLogger(__name__)
 
 _BASE_URL = "https://api.mistral.ai/v1"
+MISTRAL_MAX_CONCURRENCY = int(os.getenv("MISTRAL_MAX_CONCURRENCY", "4"))
+
+_limit = asyncio.Semaphore(MISTRAL_MAX_CONCURRENCY)
+
+_REQUEST_SECONDS = metrics.histogram(
+    "alchemistral_mistral_request_seconds", "Mistral chat completion latency", ["model", "outcome"],
+)
+_QUEUE_SECONDS = metrics.histogram(
+    "alchemistral_mistral_queue_seconds", "Time waiting for the shared Mistral concurrency limit",
+)
 
 
 class MistralClient:
@@ -21,14 +41,22 @@ class MistralClient:
         temperature: float = 0.7,
     ) -> str:
         """Single chat completion. Returns the assistant message text."""
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.post(
-                f"{_BASE_URL}/chat/completions",
-                headers={"Authorization": f"Bearer {self.api_key}"},
-                json={"model": model, "messages": messages, "temperature": temperature},
-            )
-            r.raise_for_status()
-            return r.json()["choices"][0]["message"]["content"]
+        queued = time.perf_counter()
+        async with _limit, httpx.AsyncClient(timeout=60) as client:
+            start = time.perf_counter()
+            _QUEUE_SECONDS.observe(start - queued)
+            outcome = "error"
+            try:
+                r = await client.post(
+                    f"{_BASE_URL}/chat/completions",
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                    json={"model": model, "messages": messages, "temperature": temperature},
+                )
+                r.raise_for_status()
+                outcome = "ok"
+                return r.json()["choices"][0]["message"]["content"]
+            finally:
+                _REQUEST_SECONDS.labels(model, outcome).observe(time.perf_counter() - start)
 
 
 def get_client() -> MistralClient:
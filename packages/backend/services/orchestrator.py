@@ -4,10 +4,14 @@ Uses Mistral Large. Falls back to a mock result if API key not set or call fails
 """
 import json
 import logging
+from services import metrics, token_budget
 from services.mistral_client import get_client
+from services.retrieval import SUMMARY_CHAR_BUDGET, select_sections
 
 logger = logging.getLogger(__name__)
 
+_MODEL = "mistral-large-latest"
+
 _SYSTEM_PROMPT = """\
 You are the orchestrator of Alchemistral, a multi-agent coding system. You coordinate AI \
 coding agents that work in parallel on isolated git worktrees.
@@ -168,7 +172,7 @@ def _mock_result(refined_prompt: str) -> dict:
 
 def _parse_response(text: str, refined_prompt: str) -> dict:
     text = text.strip()
-    print(f"[orchestrator] raw response first 100 chars: {text[:100]!r}")
+    logger.debug("[orchestrator] raw response first 100 chars: %r", text[:100])
     # Strip markdown code block if present
     if text.startswith("```"):
         lines = text.split("\n")
@@ -179,55 +183,77 @@ def _parse_response(text: str, refined_prompt: str) -> dict:
                 end = i
                 break
         text = "\n".join(lines[start:end])
-        print(f"[orchestrator] stripped markdown block, reparsing: {text[:100]!r}")
+        logger.debug("[orchestrator] stripped markdown block, reparsing: %r", text[:100])
     try:
         result = json.loads(text)
-        print(f"[orchestrator] JSON parsed OK — dag tasks: {len(result.get('dag', []))}")
+        logger.info(f"[orchestrator] JSON parsed OK — dag tasks: {len(result.get('dag', []))}")
         return result
     except json.JSONDecodeError as exc:
-        print(f"[orchestrator] JSON parse FAILED: {exc}")
-        print(f"[orchestrator] full raw text:\n{text}")
-        logger.warning(f"Orchestrator response parse failed: {exc}")
+        logger.warning(f"[orchestrator] JSON parse failed, using mock plan: {exc}")
+        logger.debug("[orchestrator] full raw text:\n%s", text)
         return _mock_result(refined_prompt)
 
 
+@metrics.timed(metrics.STAGE_SECONDS.labels("orchestrate"))
 async def orchestrate(
     refined_prompt: str,
     global_memory: str,
     architecture: str,
     contracts: list[str],
     codebase_summary: str = "",
+    relevant_files: str = "",
 ) -> dict:
-    """Decompose a refined prompt into a DAG plan. Falls back to mock on any failure."""
+    """
+    Decompose a refined prompt into a DAG plan. Falls back to mock on any failure.
+
+    A codebase summary over SUMMARY_CHAR_BUDGET is cut down to its sections most
+    relevant to the mission; `relevant_files` (see retrieval.select_context)
+    adds the matching file snippets.
+    """
     client = get_client()
     if not client.api_key:
-        print("[orchestrator] MISTRAL_API_KEY is empty — using mock")
         logger.warning("MISTRAL_API_KEY not set — orchestrator returning mock result")
         return _mock_result(refined_prompt)
 
-    print(f"[orchestrator] calling mistral-large-latest, key prefix: {client.api_key[:8]}…")
+    logger.info(f"[orchestrator] calling {_MODEL}")
 
+    codebase_summary = select_sections(codebase_summary, refined_prompt, SUMMARY_CHAR_BUDGET)
+    fitted = token_budget.fit(
+        "orchestrate",
+        _MODEL,
+        [
+            token_budget.Section("mission", refined_prompt, token_budget.PRIORITY_TASK),
+            token_budget.Section("contracts", "\n\n".join(contracts), token_budget.PRIORITY_CONTRACTS),
+            token_budget.Section("architecture", architecture, token_budget.PRIORITY_DOMAIN_MEMORY),
+            token_budget.Section("global_memory", global_memory, token_budget.PRIORITY_GLOBAL_MEMORY),
+            token_budget.Section("relevant_files", relevant_files, token_budget.PRIORITY_SCAN),
+            token_budget.Section("codebase_summary", codebase_summary, token_budget.PRIORITY_SCAN),
+        ],
+        reserve=token_budget.estimate_tokens(_SYSTEM_PROMPT),
+    )
+    global_memory, codebase_summary = fitted["global_memory"], fitted["codebase_summary"]
+    relevant_files, architecture = fitted["relevant_files"], fitted["architecture"]
     ctx_parts = [
         f"Global memory:\n{global_memory}" if global_memory.strip() else "",
         f"Codebase scan:\n{codebase_summary}" if codebase_summary.strip() else "",
+        f"Relevant files:\n{relevant_files}" if relevant_files.strip() else "",
         f"Architecture:\n{architecture}" if architecture.strip() not in ("", "{}") else "",
-        ("Existing contracts:\n" + "\n\n".join(contracts)) if contracts else "",
+        f"Existing contracts:\n{fitted['contracts']}" if fitted["contracts"].strip() else "",
         f"Mission:\n{refined_prompt}",
     ]
     context = "\n\n".join(p for p in ctx_parts if p)
 
     try:
         text = await client.chat(
-            model="mistral-large-latest",
+            model=_MODEL,
             messages=[
                 {"role": "system", "content": _SYSTEM_PROMPT},
                 {"role": "user", "content": context},
             ],
             temperature=0.2,
         )
-        print(f"[orchestrator] API call succeeded, response len: {len(text)}")
+        logger.info(f"[orchestrator] API call succeeded, response len: {len(text)}")
         return _parse_response(text, refined_prompt)
     except Exception as exc:
-        print(f"[orchestrator] API call FAILED: {type(exc).__name__}: {exc}")
-        logger.warning(f"Orchestrator API error, returning mock: {exc}")
+        logger.warning(f"Orchestrator API error ({type(exc).__name__}), returning mock: {exc}")
         return _mock_result(refined_prompt)
@@ -14,16 +14,21 @@ Flow:
         → execute DAG (spawn agents)
     → broadcast all events via WebSocket
 """
+import asyncio
 import json
 import logging
+import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Callable, Awaitable
 
+from services import log_pipeline, token_budget, tracing
 from services.alchemistral import get_project
 from services.mistral_client import get_client
 from services.reprompt import reprompt
 from services.orchestrator import orchestrate
+from services.project_context import load_context, record_contract_meta
+from services.retrieval import select_context
 from services.dag_executor import execute_dag
 
 logger = logging.getLogger(__name__)
@@ -33,19 +38,19 @@ def _ts() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _read_file(path: Path) -> str:
-    """Read a file if it exists, return empty string otherwise."""
-    return path.read_text() if path.exists() else ""
-
-
 async def run_mission(
     project_id: str,
     message: str,
     broadcast: Callable[[dict], Awaitable[None]],
+    mission_id: str = "",
 ) -> None:
     """Run the full pipeline in the background, broadcasting events to all WS clients."""
+    mission_id = mission_id or uuid.uuid4().hex[:12]
+    log_pipeline.bind(mission_id=mission_id, project_id=project_id)
+    tracing.start_mission(mission_id, project_id, message[:80])
     try:
-        await _pipeline(project_id, message, broadcast)
+        with tracing.span("mission"):
+            await _pipeline(project_id, message, broadcast)
     except Exception as exc:
         logger.error(f"Mission pipeline error: {exc}", exc_info=True)
         await broadcast({
@@ -67,17 +72,13 @@ async def _pipeline(
 
     alch = Path(project["local_path"]) / ".alchemistral"
 
-    # Read project context
-    global_md = _read_file(alch / "GLOBAL.md")
-    codebase_summary = _read_file(alch / "codebase-summary.md")
-    arch_json = _read_file(alch / "architecture.json") or "{}"
-
+    # Read project context (memoised — unchanged files are not re-read)
+    context = load_context(alch)
+    global_md = context.global_md
+    codebase_summary = context.codebase_summary
+    arch_json = context.architecture
+    contract_texts = context.contract_texts
     contracts_dir = alch / "contracts"
-    contract_texts: list[str] = []
-    if contracts_dir.exists():
-        for f in sorted(contracts_dir.iterdir()):
-            if f.is_file():
-                contract_texts.append(f"=== {f.name} ===\n{f.read_text()}")
 
     # ── Step 1: Reprompt ────────────────────────────────────────────────────
     await broadcast({
@@ -87,7 +88,8 @@ async def _pipeline(
         "timestamp": _ts(),
     })
 
-    reprompt_result = await reprompt(message, global_md, codebase_summary)
+    with tracing.span("reprompt"):
+        reprompt_result = await reprompt(message, global_md, codebase_summary)
     intent = reprompt_result["intent"]
     refined = reprompt_result["refined"]
 
@@ -103,7 +105,8 @@ async def _pipeline(
     # ── Branch: Conversation vs Mission ──────────────────────────────────────
 
     if intent == "conversation":
-        await _handle_conversation(message, global_md, codebase_summary, broadcast)
+        with tracing.span("conversation"):
+            await _handle_conversation(message, global_md, codebase_summary, broadcast)
         return
 
     # ── Mission flow continues below ─────────────────────────────────────────
@@ -116,7 +119,10 @@ async def _pipeline(
         "timestamp": _ts(),
     })
 
-    result = await orchestrate(refined, global_md, arch_json, contract_texts, codebase_summary)
+    with tracing.span("retrieval"):
+        relevant_files = await asyncio.to_thread(select_context, project["local_path"], refined)
+    with tracing.span("orchestrate"):
+        result = await orchestrate(refined, global_md, arch_json, contract_texts, codebase_summary, relevant_files)
 
     # ── Step 3: Stream DAG ──────────────────────────────────────────────────
     await broadcast({
@@ -143,6 +149,7 @@ async def _pipeline(
             "read_by": contract.get("read_by", []),
             "timestamp": _ts(),
         })
+    record_contract_meta(alch, result.get("contracts", []))
 
     # ── Step 5: Update GLOBAL.md ────────────────────────────────────────────
     additions: list[str] = result.get("memory_updates", {}).get("global_additions", [])
@@ -236,6 +243,18 @@ async def _handle_conversation(
         })
         return
 
+    fitted = token_budget.fit(
+        "conversation",
+        "mistral-large-latest",
+        [
+            token_budget.Section("question", message, token_budget.PRIORITY_TASK),
+            token_budget.Section("global_memory", global_md, token_budget.PRIORITY_GLOBAL_MEMORY),
+            token_budget.Section("codebase_summary", codebase_summary, token_budget.PRIORITY_SCAN),
+        ],
+        reserve=token_budget.estimate_tokens(_CONVERSATION_SYSTEM),
+    )
+    global_md, codebase_summary = fitted["global_memory"], fitted["codebase_summary"]
+
     ctx_parts = []
     if global_md.strip():
         ctx_parts.append(f"Project memory:\n{global_md}")
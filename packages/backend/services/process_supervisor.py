@@ -0,0 +1,176 @@
+"""
+Process Supervisor — owns the OS processes of CLI agents.
+
+Every agent CLI is started in its own session (start_new_session=True), so it
+leads a process group holding everything it spawns: test runners, dev
+servers, package installs. Killing an agent signals the whole group —
+SIGTERM, then SIGKILL after PROCESS_KILL_GRACE seconds — instead of only the
+CLI process, leaving nothing behind burning CPU.
+
+Live groups are recorded in ~/.alchemistral/agent-pids.json. A server that
+crashed or was killed cannot clean up after itself, so on startup
+reap_orphans() kills the groups still listed there — after checking the
+process start time (Linux /proc), so a recycled pid is never signalled.
+"""
+import asyncio
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from services.alchemistral import GLOBAL_STORAGE
+
+logger = logging.getLogger(__name__)
+
+PROCESS_KILL_GRACE = float(os.getenv("PROCESS_KILL_GRACE", "5"))
+PID_REGISTRY = GLOBAL_STORAGE / "agent-pids.json"
+
+_POLL_INTERVAL = 0.1
+
+
+@dataclass
+class ProcessRecord:
+    agent_id: str
+    pid: int
+    pgid: int
+    start_ticks: int | None  # /proc/<pid>/stat starttime, guards against pid reuse
+    registered_at: float
+
+
+def _start_ticks(pid: int) -> int | None:
+    try:
+        with open(f"/proc/{pid}/stat") as fh:
+            stat = fh.read()
+    except OSError:
+        return None
+    # Field 22; the command name (field 2) may contain spaces, so split after ")"
+    return int(stat.rsplit(")", 1)[1].split()[19])
+
+
+def group_alive(pgid: int) -> bool:
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _signal_group(pgid: int, sig: signal.Signals) -> bool:
+    try:
+        os.killpg(pgid, sig)
+    except ProcessLookupError:
+        return False
+    except PermissionError as exc:
+        logger.warning(f"[supervisor] Cannot signal process group {pgid}: {exc}")
+        return False
+    return True
+
+
+async def terminate_group(pgid: int, grace: float = PROCESS_KILL_GRACE) -> str:
+    """SIGTERM the group, SIGKILL whatever is left after `grace` seconds.
+
+    Returns "gone" (nothing to signal), "terminated" or "killed".
+    """
+    if not _signal_group(pgid, signal.SIGTERM):
+        return "gone"
+    deadline = time.monotonic() + grace
+    while time.monotonic() < deadline:
+        await asyncio.sleep(_POLL_INTERVAL)
+        if not group_alive(pgid):
+            return "terminated"
+    _signal_group(pgid, signal.SIGKILL)
+    return "killed"
+
+
+class ProcessSupervisor:
+    """Tracks agent process groups and persists them for orphan reaping."""
+
+    def __init__(self, registry_path: Path = PID_REGISTRY) -> None:
+        self._registry_path = registry_path
+        self._records: dict[str, ProcessRecord] = {}
+        self._lock = threading.Lock()
+
+    def register(self, agent_id: str, pid: int) -> None:
+        """Record a process started with start_new_session=True (its pgid is its pid)."""
+        with self._lock:
+            self._records[agent_id] = ProcessRecord(
+                agent_id=agent_id,
+                pid=pid,
+                pgid=pid,
+                start_ticks=_start_ticks(pid),
+                registered_at=time.time(),
+            )
+            self._save()
+
+    def unregister(self, agent_id: str) -> None:
+        with self._lock:
+            if self._records.pop(agent_id, None):
+                self._save()
+
+    def _save(self) -> None:
+        try:
+            self._registry_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._registry_path.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps([asdict(r) for r in self._records.values()]))
+            os.replace(tmp, self._registry_path)
+        except OSError as exc:
+            logger.warning(f"[supervisor] Cannot write {self._registry_path}: {exc}")
+
+    async def terminate(self, agent_id: str, grace: float = PROCESS_KILL_GRACE) -> str:
+        """Terminate the agent's whole process group and forget it."""
+        record = self._records.get(agent_id)
+        if record is None:
+            return "gone"
+        outcome = await terminate_group(record.pgid, grace)
+        if outcome != "gone":
+            logger.info(f"[supervisor] {agent_id}: process group {record.pgid} {outcome}")
+        self.unregister(agent_id)
+        return outcome
+
+    async def terminate_all(self, grace: float = PROCESS_KILL_GRACE) -> dict[str, str]:
+        agent_ids = list(self._records)
+        outcomes = await asyncio.gather(*(self.terminate(a, grace) for a in agent_ids))
+        return dict(zip(agent_ids, outcomes))
+
+    def reap_orphans(self) -> int:
+        """
+        SIGKILL the groups a previous server process left in the registry.
+        Called once at startup, before any agent is spawned. Returns the
+        number of groups signalled.
+        """
+        try:
+            stale = json.loads(self._registry_path.read_text())
+        except (OSError, ValueError):
+            return 0
+        reaped = 0
+        for entry in stale if isinstance(stale, list) else []:
+            try:
+                record = ProcessRecord(**entry)
+            except TypeError:
+                continue
+            # The leader may have exited while its children live on; only then
+            # is the group checked without the pid-reuse guard
+            ticks = _start_ticks(record.pid)
+            if ticks is not None and ticks != record.start_ticks:
+                continue
+            if ticks is None and not group_alive(record.pgid):
+                continue
+            if _signal_group(record.pgid, signal.SIGKILL):
+                reaped += 1
+                logger.warning(f"[supervisor] Reaped orphaned process group {record.pgid} of {record.agent_id}")
+        with self._lock:
+            self._save()
+        return reaped
+
+    def records(self) -> list[dict]:
+        return [asdict(r) for r in self._records.values()]
+
+
+# Global singleton
+supervisor = ProcessSupervisor()
@@ -0,0 +1,176 @@
+"""
+Project Context — memoised reads of a project's .alchemistral/ memory files.
+
+Prompt building, the mission pipeline and the orchestrator router all need
+GLOBAL.md, the codebase summary, architecture.json, domain memories and the
+contracts. Every read goes through one process-wide cache keyed on
+(path, mtime_ns, size): a file is re-read only after it changed on disk, so a
+10-task DAG reads each memory file once instead of once per spawn.
+
+`load_context` returns an immutable ProjectContext snapshot; callers can
+hold on to it without seeing later writes.
+
+Contract ownership (written_by / read_by, as returned by the orchestrator)
+lives next to the contracts in .alchemistral/contracts/.meta.json:
+  {"api-schema.json": {"written_by": "backend", "read_by": ["frontend"]}}
+Dot-files in contracts/ are never treated as contracts.
+"""
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_CACHE_MAX_FILES = int(os.getenv("CONTEXT_CACHE_MAX_FILES", "512"))
+CONTRACTS_META = ".meta.json"
+
+# Domains that see every contract regardless of ownership
+_ALL_CONTRACT_DOMAINS = {"security"}
+
+
+class _FileCache:
+    """LRU of path → (mtime_ns, size, text), validated by stat on every read."""
+
+    def __init__(self, max_files: int = CONTEXT_CACHE_MAX_FILES) -> None:
+        self._max_files = max_files
+        self._entries: OrderedDict[str, tuple[int, int, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def read(self, path: str | Path) -> str:
+        """File contents, or "" if the file does not exist or cannot be read."""
+        key = str(path)
+        try:
+            st = os.stat(key)
+        except OSError:
+            with self._lock:
+                self._entries.pop(key, None)
+            return ""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+        try:
+            text = Path(key).read_text()
+        except (OSError, UnicodeDecodeError) as exc:
+            logger.warning(f"[project_context] Cannot read {key}: {exc}")
+            return ""
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (st.st_mtime_ns, st.st_size, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_files:
+                self._entries.popitem(last=False)
+        return text
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"files": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_cache = _FileCache()
+
+
+@dataclass(frozen=True)
+class ProjectContext:
+    """Snapshot of a project's memory files at load time."""
+    global_md: str
+    codebase_summary: str
+    architecture: str
+    contracts: tuple[tuple[str, str], ...]  # (file name, content), sorted by name
+    # (file name, written_by, read_by) for contracts with known ownership
+    contract_meta: tuple[tuple[str, str, tuple[str, ...]], ...] = ()
+
+    @property
+    def contract_texts(self) -> list[str]:
+        """Contracts formatted for a prompt: "=== name ===\\ncontent"."""
+        return [f"=== {name} ===\n{text}" for name, text in self.contracts]
+
+    def contract_texts_for(self, domain: str) -> tuple[list[str], int]:
+        """
+        Contracts the domain writes or reads, formatted for a prompt, and the
+        number left out. Security sees everything; contracts without ownership
+        metadata (e.g. written by an agent directly) are always included.
+        """
+        if domain in _ALL_CONTRACT_DOMAINS:
+            return self.contract_texts, 0
+        owners = {name: (writer, readers) for name, writer, readers in self.contract_meta}
+        texts: list[str] = []
+        for name, text in self.contracts:
+            meta = owners.get(name)
+            if meta is None or domain == meta[0] or domain in meta[1]:
+                texts.append(f"=== {name} ===\n{text}")
+        return texts, len(self.contracts) - len(texts)
+
+
+def read_text(path: str | Path) -> str:
+    """Read one file through the shared cache ("" if missing)."""
+    return _cache.read(path)
+
+
+def read_contracts(alch_dir: str | Path) -> tuple[tuple[str, str], ...]:
+    contracts_dir = Path(alch_dir) / "contracts"
+    if not contracts_dir.is_dir():
+        return ()
+    return tuple(
+        (f.name, _cache.read(f))
+        for f in sorted(contracts_dir.iterdir())
+        if f.is_file() and not f.name.startswith(".")
+    )
+
+
+def read_contract_meta(alch_dir: str | Path) -> dict[str, dict]:
+    """Contract ownership: {file name: {"written_by": str, "read_by": [str]}}."""
+    text = _cache.read(Path(alch_dir) / "contracts" / CONTRACTS_META)
+    if not text:
+        return {}
+    try:
+        data = json.loads(text)
+    except ValueError:
+        logger.warning(f"[project_context] Ignoring malformed {CONTRACTS_META} in {alch_dir}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def record_contract_meta(alch_dir: str | Path, contracts: list[dict]) -> None:
+    """Merge the written_by/read_by of orchestrator contracts into contracts/.meta.json."""
+    if not contracts:
+        return
+    contracts_dir = Path(alch_dir) / "contracts"
+    meta = dict(read_contract_meta(alch_dir))
+    for contract in contracts:
+        meta[contract.get("file", "contract.json")] = {
+            "written_by": contract.get("written_by", "orchestrator"),
+            "read_by": list(contract.get("read_by", [])),
+        }
+    contracts_dir.mkdir(parents=True, exist_ok=True)
+    tmp = contracts_dir / f"{CONTRACTS_META}.tmp"
+    tmp.write_text(json.dumps(meta, indent=2))
+    os.replace(tmp, contracts_dir / CONTRACTS_META)
+
+
+def load_context(alch_dir: str | Path) -> ProjectContext:
+    alch = Path(alch_dir)
+    return ProjectContext(
+        global_md=_cache.read(alch / "GLOBAL.md"),
+        codebase_summary=_cache.read(alch / "codebase-summary.md"),
+        architecture=_cache.read(alch / "architecture.json") or "{}",
+        contracts=read_contracts(alch),
+        contract_meta=tuple(
+            (name, str(m.get("written_by", "")), tuple(m.get("read_by", [])))
+            for name, m in sorted(read_contract_meta(alch).items())
+            if isinstance(m, dict)
+        ),
+    )
+
+
+def cache_stats() -> dict:
+    """Cached file count and hit/miss counters of the shared cache."""
+    return _cache.stats()
@@ -0,0 +1,547 @@
+"""
+Project Watcher — live in-memory file index for open projects.
+
+Once a project's file tree is opened, a watcher keeps:
+  - tree:     relative dir → entries, exactly what GET /files returns
+  - manifest: relative file path → (size, mtime_ns)
+up to date from filesystem events, so directory expands are served from
+memory and codebase-summary.md is refreshed after agents merge code.
+
+Backends: inotify (Linux, via ctypes — no extra dependency) with a polling
+fallback. Bursts (e.g. `git merge` rewriting hundreds of files) are debounced
+and pushed as a single `files_updated` event listing only changed subtrees.
+
+PROJECT_WATCH=auto|inotify|poll|off (default auto).
+"""
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Awaitable
+
+from services.codebase_scanner import _SKIP_DIRS, refresh_codebase_summary
+
+logger = logging.getLogger(__name__)
+
+WATCH_MODE = os.getenv("PROJECT_WATCH", "auto").lower()
+WATCH_MAX_PROJECTS = int(os.getenv("PROJECT_WATCH_MAX_PROJECTS", "4"))
+POLL_INTERVAL = float(os.getenv("PROJECT_WATCH_POLL_INTERVAL", "2.0"))
+DEBOUNCE_QUIET = 0.3   # seconds without events before flushing
+DEBOUNCE_MAX = 2.0     # flush at least this often during a continuous burst
+MAX_WATCHED_DIRS = 20_000
+
+# Entries hidden from the file tree (same rules GET /files always used)
+_TREE_JUNK = {"node_modules", "__pycache__", ".git", ".venv", "venv"}
+
+
+def _ts() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _hidden(name: str) -> bool:
+    return (name.startswith(".") and name != ".alchemistral") or name in _TREE_JUNK
+
+
+def list_dir(base: Path, rel: str) -> list[dict]:
+    """List one directory for the file tree: dirs first, hidden/junk entries skipped."""
+    target = base / rel if rel else base
+    entries: list[tuple[bool, str]] = []
+    try:
+        with os.scandir(target) as it:
+            for entry in it:
+                if _hidden(entry.name):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                entries.append((not is_dir, entry.name))
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+        return []
+    entries.sort()
+    prefix = f"{rel}{os.sep}" if rel else ""
+    return [
+        {"name": name, "type": "file" if is_file else "dir", "path": prefix + name}
+        for is_file, name in entries
+    ]
+
+
+def _watchable(name: str) -> bool:
+    """Directories worth descending into (tree rules plus scanner skip dirs)."""
+    return not _hidden(name) and name not in _SKIP_DIRS
+
+
+class ProjectIndex:
+    """In-memory file tree and stat manifest for one project."""
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+        self.tree: dict[str, list[dict]] = {}
+        self.manifest: dict[str, tuple[int, int]] = {}
+
+    def scan_dir(self, rel: str) -> tuple[list[dict] | None, dict[str, tuple[int, int]]]:
+        """
+        Read one directory from disk (blocking; touches no index state).
+
+        Returns (entries, fingerprints): the tree listing, None if the
+        directory is gone, and (size, mtime_ns) of each listed file.
+        """
+        entries = list_dir(self.root, rel)
+        if not entries and not (self.root / rel).is_dir():
+            return None, {}
+        fingerprints: dict[str, tuple[int, int]] = {}
+        for e in entries:
+            if e["type"] == "dir":
+                continue
+            try:
+                st = os.stat(self.root / e["path"])
+            except OSError:
+                continue
+            fingerprints[e["path"]] = (st.st_size, st.st_mtime_ns)
+        return entries, fingerprints
+
+    def merge_dir(
+        self, rel: str, scan: tuple[list[dict] | None, dict[str, tuple[int, int]]],
+    ) -> tuple[bool, list[str]]:
+        """
+        Apply a scan_dir result to the index (memory only).
+
+        Returns (changed, new_subdirs): whether the listing or any file's
+        (size, mtime_ns) changed, and watchable subdirectories not seen before.
+        """
+        entries, fingerprints = scan
+        old = self.tree.get(rel)
+        if entries is None:
+            self._drop_subtree(rel)
+            return old is not None, []
+        changed = old != entries
+        self.tree[rel] = entries
+
+        new_subdirs = [
+            e["path"] for e in entries
+            if e["type"] == "dir" and e["path"] not in self.tree and _watchable(e["name"])
+        ]
+        for path, fp in fingerprints.items():
+            if self.manifest.get(path) != fp:
+                self.manifest[path] = fp
+                changed = True
+
+        # Files and subdirectories gone since the previous listing
+        dirs = {e["path"] for e in entries if e["type"] == "dir"}
+        for e in old or []:
+            if e["type"] == "dir":
+                if e["path"] not in dirs and e["path"] in self.tree:
+                    self._drop_subtree(e["path"])
+                    changed = True
+            elif e["path"] not in fingerprints and self.manifest.pop(e["path"], None) is not None:
+                changed = True
+        return changed, new_subdirs
+
+    def refresh_dir(self, rel: str) -> tuple[bool, list[str]]:
+        """Re-list one directory from disk; see merge_dir."""
+        return self.merge_dir(rel, self.scan_dir(rel))
+
+    def forget(self, rel: str) -> None:
+        """Drop a directory and its subtree, so they are listed from disk again."""
+        self._drop_subtree(rel)
+
+    def _drop_subtree(self, rel: str) -> None:
+        prefix = rel + os.sep
+        for d in [d for d in self.tree if d == rel or d.startswith(prefix)]:
+            del self.tree[d]
+        for p in [p for p in self.manifest if p.startswith(prefix)]:
+            del self.manifest[p]
+
+    def build(self) -> list[str]:
+        """Index the whole (pruned) tree. Returns every indexed directory."""
+        pending = [""]
+        indexed: list[str] = []
+        while pending and len(indexed) < MAX_WATCHED_DIRS:
+            rel = pending.pop()
+            _, subdirs = self.refresh_dir(rel)
+            indexed.append(rel)
+            pending.extend(subdirs)
+        return indexed
+
+
+# ── Backends ────────────────────────────────────────────────────────────────
+
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (
+    _IN_CLOSE_WRITE | _IN_ATTRIB | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE
+    | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1  # noqa: B018 — attribute lookup fails off Linux
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class _InotifyBackend:
+    """Kernel inotify watches on every indexed directory, read via loop.add_reader."""
+    name = "inotify"
+
+    def __init__(self, watcher: "ProjectWatcher") -> None:
+        self._watcher = watcher
+        self._libc = _load_libc()
+        self._fd = -1
+        self._wd_to_rel: dict[int, str] = {}
+        # Set once inotify_add_watch hit the per-user watch limit
+        self.exhausted = False
+        if self._libc is None:
+            raise OSError("inotify is not available on this platform")
+
+    def start(self, dirs: list[str]) -> None:
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        for rel in dirs:
+            self.add_dir(rel)
+        asyncio.get_running_loop().add_reader(self._fd, self._on_readable)
+
+    def add_dir(self, rel: str) -> bool:
+        """
+        Watch one directory. On failure it is dropped from the index — so it
+        is served from disk instead of going stale — and False is returned.
+        """
+        if self.exhausted:
+            self._watcher.index.forget(rel)
+            return False
+        path = os.fsencode(str(self._watcher.index.root / rel))
+        wd = self._libc.inotify_add_watch(self._fd, path, _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            self._watcher.index.forget(rel)
+            if err == errno.ENOSPC:
+                self.exhausted = True
+                logger.warning(
+                    f"[watcher] inotify watch limit reached at {rel!r} "
+                    f"(fs.inotify.max_user_watches) — {self._watcher.index.root} will be polled"
+                )
+            else:
+                logger.warning(f"[watcher] inotify_add_watch failed for {rel!r}: {os.strerror(err)} (errno {err})")
+            return False
+        self._wd_to_rel[wd] = rel
+        return True
+
+    def _on_readable(self) -> None:
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size + length
+            if mask & _IN_Q_OVERFLOW:
+                self._watcher.mark_all()
+                continue
+            rel = self._wd_to_rel.get(wd)
+            if rel is None:
+                continue
+            if mask & _IN_IGNORED:
+                self._wd_to_rel.pop(wd, None)
+                continue
+            if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                # Re-list the parent so the entry disappears from the tree
+                self._watcher.mark(os.path.dirname(rel))
+                continue
+            self._watcher.mark(rel)
+
+    def stop(self) -> None:
+        if self._fd >= 0:
+            try:
+                asyncio.get_running_loop().remove_reader(self._fd)
+            except RuntimeError:
+                pass
+            os.close(self._fd)
+            self._fd = -1
+        self._wd_to_rel.clear()
+
+
+class _PollingBackend:
+    """Periodically snapshots the pruned tree off the event loop and diffs per directory."""
+    name = "poll"
+
+    def __init__(self, watcher: "ProjectWatcher") -> None:
+        self._watcher = watcher
+        self._task: asyncio.Task | None = None
+        self._previous: dict[str, tuple] = {}
+
+    async def prime(self) -> None:
+        """Take the baseline snapshot — before the index is built, so no change is missed."""
+        self._previous = await asyncio.to_thread(self._snapshot)
+
+    def start(self, dirs: list[str]) -> None:
+        self._task = asyncio.create_task(self._poll())
+
+    def add_dir(self, rel: str) -> bool:
+        return True  # the snapshot walk covers every watchable directory
+
+    def _snapshot(self) -> dict[str, tuple]:
+        root = self._watcher.index.root
+        snap: dict[str, tuple] = {}
+        pending = [""]
+        while pending and len(snap) < MAX_WATCHED_DIRS:
+            rel = pending.pop()
+            sig = []
+            try:
+                with os.scandir(root / rel if rel else root) as it:
+                    for e in it:
+                        if _hidden(e.name):
+                            continue
+                        try:
+                            st = e.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        sig.append((e.name, st.st_mtime_ns, st.st_size))
+                        if e.is_dir(follow_symlinks=False) and _watchable(e.name):
+                            pending.append(f"{rel}{os.sep}{e.name}" if rel else e.name)
+            except OSError:
+                pass
+            snap[rel] = tuple(sorted(sig))
+        return snap
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(POLL_INTERVAL)
+            current = await asyncio.to_thread(self._snapshot)
+            for rel, sig in current.items():
+                if self._previous.get(rel) != sig:
+                    self._watcher.mark(rel)
+            for rel in self._previous.keys() - current.keys():
+                self._watcher.mark(os.path.dirname(rel))
+            self._previous = current
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+# ── Watcher ─────────────────────────────────────────────────────────────────
+
+class ProjectWatcher:
+    """Watches one project and pushes debounced `files_updated` events."""
+
+    def __init__(
+        self,
+        project_id: str,
+        root: str,
+        broadcast: Callable[[dict], Awaitable[None]],
+        mode: str = WATCH_MODE,
+    ) -> None:
+        self.project_id = project_id
+        self.index = ProjectIndex(root)
+        self._broadcast = broadcast
+        self._mode = mode
+        self._backend: _InotifyBackend | _PollingBackend | None = None
+        self._pending: set[str] = set()
+        self._wakeup = asyncio.Event()
+        self._flush_task: asyncio.Task | None = None
+        self._summary_task: asyncio.Task | None = None
+
+    @property
+    def backend(self) -> str:
+        return self._backend.name if self._backend else "none"
+
+    async def start(self) -> None:
+        if self._mode in ("auto", "inotify"):
+            try:
+                self._backend = _InotifyBackend(self)
+            except OSError as exc:
+                if self._mode == "inotify":
+                    raise
+                logger.info(f"[watcher] inotify unavailable ({exc}) — falling back to polling")
+        if self._backend is None:
+            self._backend = _PollingBackend(self)
+            await self._backend.prime()
+        dirs = await asyncio.to_thread(self.index.build)
+        self._backend.start(dirs)
+        if self._backend.name == "inotify":
+            # Re-list once to catch changes made between the index walk and add_watch
+            self.mark_all()
+        await self._fall_back_if_exhausted()
+        self._flush_task = asyncio.create_task(self._flush_loop())
+        logger.info(f"[watcher] Watching {self.index.root} ({len(dirs)} dirs, {self.backend})")
+
+    def stop(self) -> None:
+        if self._backend:
+            self._backend.stop()
+        for task in (self._flush_task, self._summary_task):
+            if task and not task.done():
+                task.cancel()
+
+    async def _fall_back_if_exhausted(self) -> None:
+        """Switch to polling once inotify ran out of watches."""
+        if not getattr(self._backend, "exhausted", False):
+            return
+        self._backend.stop()
+        backend = _PollingBackend(self)
+        await backend.prime()
+        backend.start([])
+        self._backend = backend
+        # Re-list everything: changes since the failure, and the dropped subtrees
+        self.mark_all()
+
+    def mark(self, rel: str) -> None:
+        self._pending.add(rel)
+        self._wakeup.set()
+
+    def mark_all(self) -> None:
+        self.mark("")
+        self._pending.update(self.index.tree)
+
+    async def _flush_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            # Debounce: wait for a quiet period, but never longer than DEBOUNCE_MAX
+            started = loop.time()
+            while True:
+                self._wakeup.clear()
+                remaining = DEBOUNCE_MAX - (loop.time() - started)
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(DEBOUNCE_QUIET, remaining))
+                except asyncio.TimeoutError:
+                    break
+            pending, self._pending = self._pending, set()
+            try:
+                await self._flush(pending)
+            except Exception as exc:
+                logger.warning(f"[watcher] Flush failed for {self.index.root}: {exc}")
+
+    async def _apply(self, pending: set[str]) -> list[str]:
+        """
+        Re-list changed dirs (and newly created subtrees). Returns changed dirs.
+
+        Only the disk reads run in a worker thread; the index and the
+        backend's watches are updated here, on the loop, so readers such as
+        mark_all() and GET /files never see them change mid-iteration.
+        """
+        changed: list[str] = []
+        queue = sorted(pending, reverse=True)
+        while queue:
+            batch, queue = queue, []
+            scans = await asyncio.to_thread(lambda: [self.index.scan_dir(rel) for rel in batch])
+            for rel, scan in zip(batch, scans):
+                dir_changed, subdirs = self.index.merge_dir(rel, scan)
+                if dir_changed:
+                    changed.append(rel)
+                for sub in subdirs:
+                    if len(self.index.tree) < MAX_WATCHED_DIRS and self._backend and self._backend.add_dir(sub):
+                        queue.append(sub)
+        return changed
+
+    async def _flush(self, pending: set[str]) -> None:
+        changed = await self._apply(pending)
+        await self._fall_back_if_exhausted()
+        if not changed:
+            return
+        # Collapse to the top-most changed subtrees
+        subtrees: list[str] = []
+        for rel in sorted(changed):
+            if not any(rel == s or s == "" or rel.startswith(s + os.sep) for s in subtrees):
+                subtrees.append(rel)
+        await self._broadcast({
+            "agent_id": "orchestrator",
+            "type": "files_updated",
+            "project_id": self.project_id,
+            "paths": subtrees,
+            "timestamp": _ts(),
+        })
+        if any(not p.startswith(".alchemistral") for p in changed):
+            self._schedule_summary_refresh()
+
+    def _schedule_summary_refresh(self) -> None:
+        if self._summary_task and not self._summary_task.done():
+            return
+
+        async def _refresh() -> None:
+            try:
+                report = await refresh_codebase_summary(str(self.index.root))
+                if report["summary_changed"]:
+                    logger.info(f"[watcher] Refreshed codebase-summary.md for {self.index.root}")
+            except Exception as exc:
+                logger.warning(f"[watcher] Summary refresh failed: {exc}")
+
+        self._summary_task = asyncio.create_task(_refresh())
+
+
+class WatchManager:
+    """Keeps at most WATCH_MAX_PROJECTS watchers alive, most recently opened first."""
+
+    def __init__(self) -> None:
+        self._watchers: dict[str, ProjectWatcher] = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return WATCH_MODE != "off"
+
+    def get_index(self, project_id: str) -> ProjectIndex | None:
+        watcher = self._watchers.get(project_id)
+        return watcher.index if watcher else None
+
+    async def ensure(
+        self,
+        project_id: str,
+        root: str,
+        broadcast: Callable[[dict], Awaitable[None]],
+    ) -> ProjectWatcher | None:
+        """Start watching a project if not already watched."""
+        if not self.enabled:
+            return None
+        async with self._lock:
+            watcher = self._watchers.pop(project_id, None)
+            if watcher is None:
+                watcher = ProjectWatcher(project_id, root, broadcast)
+                try:
+                    await watcher.start()
+                except Exception as exc:
+                    logger.warning(f"[watcher] Could not watch {root}: {exc}")
+                    watcher.stop()
+                    return None
+            self._watchers[project_id] = watcher  # re-insert as most recent
+            while len(self._watchers) > WATCH_MAX_PROJECTS:
+                oldest = next(iter(self._watchers))
+                self.stop(oldest)
+            return watcher
+
+    def stop(self, project_id: str) -> None:
+        watcher = self._watchers.pop(project_id, None)
+        if watcher:
+            watcher.stop()
+
+    def stop_all(self) -> None:
+        for project_id in list(self._watchers):
+            self.stop(project_id)
+
+
+# Global singleton
+watch_manager = WatchManager()
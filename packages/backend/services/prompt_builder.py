@@ -2,14 +2,15 @@
 Prompt Builder — constructs agent system prompts dynamically.
 
 Each agent prompt includes: role definition, domain boundary, memory,
-contracts, skills, and the specific task to execute.
+contracts, the files most relevant to the task (BM25 retrieval over the
+scan), skills, and the specific task to execute — fitted to the agent token
+budget by priority (see token_budget).
 """
 from pathlib import Path
 
-
-def _read_if_exists(path: Path) -> str:
-    """Read a file if it exists, else return empty string."""
-    return path.read_text() if path.exists() else ""
+from services import token_budget
+from services.project_context import load_context, read_text
+from services.retrieval import MEMORY_CHAR_BUDGET, select_context, select_sections
 
 
 def build_prompt(
@@ -30,18 +31,17 @@ def build_prompt(
         agent_todos: Per-agent todo items
     """
     alch = Path(alch_dir)
-    global_md = _read_if_exists(alch / "GLOBAL.md")
-    domain_memory = _read_if_exists(alch / "agents" / f"{agent_domain}.md")
-
-    # Read relevant contracts
-    contracts_dir = alch / "contracts"
-    contract_sections: list[str] = []
-    if contracts_dir.exists():
-        for f in sorted(contracts_dir.iterdir()):
-            if f.is_file():
-                contract_sections.append(f"=== {f.name} ===\n{f.read_text()}")
-
+    context = load_context(alch)
+    # Only the parts of project memory and the codebase that matter for this task
+    global_md = select_sections(context.global_md, task_prompt, MEMORY_CHAR_BUDGET)
+    relevant_files = select_context(str(alch.parent), task_prompt) or "No indexed files match this task."
+    domain_memory = read_text(alch / "agents" / f"{agent_domain}.md")
+
+    # Only the contracts this domain writes or reads
+    contract_sections, omitted = context.contract_texts_for(agent_domain)
     contracts_text = "\n\n".join(contract_sections) if contract_sections else "No contracts yet."
+    if omitted:
+        contracts_text += f"\n\n({omitted} contract{'s' if omitted != 1 else ''} for other domains omitted)"
     skills_text = ", ".join(skills) if skills else "None"
     todos_text = "\n".join(
         f"- [{'x' if t.get('done') else ' '}] {t.get('text', '')}"
@@ -56,13 +56,32 @@ def build_prompt(
     }
 
     builder = builders.get(agent_domain, _build_generic)
+
+    # Fit the variable sections into the agent budget, the template being fixed cost
+    template = builder(
+        task_prompt="", global_md="", domain_memory="", contracts_text="",
+        skills_text=skills_text, todos_text=todos_text, relevant_files="",
+    )
+    fitted = token_budget.fit(
+        f"agent:{agent_domain}",
+        "agent",
+        [
+            token_budget.Section("task", task_prompt, token_budget.PRIORITY_TASK),
+            token_budget.Section("contracts", contracts_text, token_budget.PRIORITY_CONTRACTS),
+            token_budget.Section("domain_memory", domain_memory, token_budget.PRIORITY_DOMAIN_MEMORY),
+            token_budget.Section("global_memory", global_md, token_budget.PRIORITY_GLOBAL_MEMORY),
+            token_budget.Section("relevant_files", relevant_files, token_budget.PRIORITY_SCAN),
+        ],
+        reserve=token_budget.estimate_tokens(template),
+    )
     return builder(
-        task_prompt=task_prompt,
-        global_md=global_md,
-        domain_memory=domain_memory,
-        contracts_text=contracts_text,
+        task_prompt=fitted["task"],
+        global_md=fitted["global_memory"],
+        domain_memory=fitted["domain_memory"],
+        contracts_text=fitted["contracts"],
         skills_text=skills_text,
         todos_text=todos_text,
+        relevant_files=fitted["relevant_files"],
     )
 
 
@@ -73,6 +92,7 @@ def _build_frontend(
     contracts_text: str,
     skills_text: str,
     todos_text: str,
+    relevant_files: str,
 ) -> str:
     return f"""\
 You are Alchemistral's Frontend Agent working in this directory.
@@ -92,6 +112,9 @@ Read these files first:
 === CONTRACTS ===
 {contracts_text}
 
+=== RELEVANT FILES ===
+{relevant_files}
+
 Your active skills: {skills_text}
 Your current todos:
 {todos_text}
@@ -113,6 +136,7 @@ def _build_backend(
     contracts_text: str,
     skills_text: str,
     todos_text: str,
+    relevant_files: str,
 ) -> str:
     return f"""\
 You are Alchemistral's Backend Agent working in this directory.
@@ -131,6 +155,9 @@ Read these files first:
 === CONTRACTS ===
 {contracts_text}
 
+=== RELEVANT FILES ===
+{relevant_files}
+
 Your active skills: {skills_text}
 Your current todos:
 {todos_text}
@@ -152,6 +179,7 @@ def _build_security(
     contracts_text: str,
     skills_text: str,
     todos_text: str,
+    relevant_files: str,
 ) -> str:
     return f"""\
 You are Alchemistral's Security Agent.
@@ -167,6 +195,9 @@ Run OWASP Top 10 analysis on the provided code.
 === CONTRACTS ===
 {contracts_text}
 
+=== RELEVANT FILES ===
+{relevant_files}
+
 YOUR TASK:
 {task_prompt}
 
@@ -182,6 +213,7 @@ def _build_infra(
     contracts_text: str,
     skills_text: str,
     todos_text: str,
+    relevant_files: str,
 ) -> str:
     return f"""\
 You are Alchemistral's Infra Agent working in this directory.
@@ -200,6 +232,9 @@ Read these files first:
 === CONTRACTS ===
 {contracts_text}
 
+=== RELEVANT FILES ===
+{relevant_files}
+
 Your active skills: {skills_text}
 Your current todos:
 {todos_text}
@@ -220,6 +255,7 @@ def _build_generic(
     contracts_text: str,
     skills_text: str,
     todos_text: str,
+    relevant_files: str,
 ) -> str:
     return f"""\
 You are an Alchemistral Agent working in this directory.
@@ -233,6 +269,9 @@ You are an Alchemistral Agent working in this directory.
 === CONTRACTS ===
 {contracts_text}
 
+=== RELEVANT FILES ===
+{relevant_files}
+
 Your active skills: {skills_text}
 Your current todos:
 {todos_text}
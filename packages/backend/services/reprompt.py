@@ -3,10 +3,13 @@ Reprompt engine — rewrites sloppy dev input into precise engineering prompts.
 Uses Mistral Small. Falls back to original message if API key not set or call fails.
 """
 import logging
+from services import metrics, token_budget
 from services.mistral_client import get_client
 
 logger = logging.getLogger(__name__)
 
+_MODEL = "mistral-small-latest"
+
 _SYSTEM_PROMPT = """\
 You are a prompt engineer for a multi-agent coding orchestration system called Alchemistral.
 
@@ -32,6 +35,7 @@ Output format (raw JSON only):
 """
 
 
+@metrics.timed(metrics.STAGE_SECONDS.labels("reprompt"))
 async def reprompt(message: str, global_memory: str, codebase_summary: str = "") -> dict:
     """
     Classify and refine a developer message.
@@ -46,6 +50,18 @@ async def reprompt(message: str, global_memory: str, codebase_summary: str = "")
         logger.warning("MISTRAL_API_KEY not set — reprompt returning original message")
         return fallback
 
+    fitted = token_budget.fit(
+        "reprompt",
+        _MODEL,
+        [
+            token_budget.Section("message", message, token_budget.PRIORITY_TASK),
+            token_budget.Section("global_memory", global_memory, token_budget.PRIORITY_GLOBAL_MEMORY),
+            token_budget.Section("codebase_summary", codebase_summary, token_budget.PRIORITY_SCAN),
+        ],
+        reserve=token_budget.estimate_tokens(_SYSTEM_PROMPT),
+    )
+    global_memory, codebase_summary = fitted["global_memory"], fitted["codebase_summary"]
+
     ctx_parts = []
     if global_memory.strip():
         ctx_parts.append(f"Project memory:\n{global_memory}")
@@ -56,7 +72,7 @@ async def reprompt(message: str, global_memory: str, codebase_summary: str = "")
 
     try:
         raw = await client.chat(
-            model="mistral-small-latest",
+            model=_MODEL,
             messages=[
                 {"role": "system", "content": _SYSTEM_PROMPT},
                 {"role": "user", "content": user_content},
@@ -0,0 +1,276 @@
+"""
+Retrieval — offline BM25 over file paths, symbol names and file heads.
+
+Built from the scan next to the symbol index, at .alchemistral/index/bm25.json:
+  {"version": 1, "files": {"src/app.py": {"m": mtime_ns, "s": size,
+      "n": 57, "tf": {"app": 4, "router": 2, ...}}}}
+
+Term frequencies are field-weighted (path > symbols > head) and updated
+incrementally like the symbol index. At prompt time, `select_context` ranks
+files against the task text and returns the top-k as snippets within a
+character budget; `select_sections` trims a large markdown document
+(GLOBAL.md, the codebase summary) to its most relevant `## ` sections.
+"""
+import json
+import logging
+import math
+import os
+import re
+from pathlib import Path
+
+from services import symbol_index
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_VERSION = 1
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "8"))
+RETRIEVAL_CHAR_BUDGET = int(os.getenv("RETRIEVAL_CHAR_BUDGET", "6000"))
+MEMORY_CHAR_BUDGET = int(os.getenv("RETRIEVAL_MEMORY_BUDGET", "8000"))
+SUMMARY_CHAR_BUDGET = int(os.getenv("RETRIEVAL_SUMMARY_BUDGET", "12000"))
+
+_HEAD_BYTES = 2048
+_SNIPPET_LINES = 30
+_MIN_SNIPPET_CHARS = 200  # don't bother truncating a snippet below this
+_K1 = 1.2
+_B = 0.75
+
+# Field weights: a term in the path says more about a file than one in its body
+_PATH_WEIGHT = 3
+_SYMBOL_WEIGHT = 2
+_HEAD_WEIGHT = 1
+
+# camelCase / PascalCase / snake_case / kebab-case → words
+_TOKEN_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "for", "from", "has",
+    "have", "in", "into", "is", "it", "its", "of", "on", "or", "so", "that",
+    "the", "then", "this", "to", "we", "when", "with", "should", "must",
+    "all", "any", "each", "new", "make", "add", "sure", "after", "run",
+    # language keywords that appear in every file head
+    "def", "import", "return", "self", "const", "let", "var", "function",
+    "export", "default", "true", "false", "none", "null", "if", "else",
+    "pub", "fn", "use", "mod", "func", "package", "include", "require",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased word tokens, identifiers split on case and separators."""
+    tokens: list[str] = []
+    for word in _TOKEN_RE.findall(text):
+        word = word.lower()
+        if len(word) < 2 or word in _STOPWORDS:
+            continue
+        # Crude plural folding so "agents" matches "agent"
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def _read_head(path: Path) -> str:
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read(_HEAD_BYTES)
+    except OSError:
+        return ""
+    if b"\0" in data:
+        return ""
+    return data.decode("utf-8", errors="ignore")
+
+
+def _term_counts(rel: str, symbols: list[list], head: str) -> dict[str, int]:
+    tf: dict[str, int] = {}
+    for weight, text in (
+        (_PATH_WEIGHT, rel),
+        (_SYMBOL_WEIGHT, " ".join(s[0] for s in symbols)),
+        (_HEAD_WEIGHT, head),
+    ):
+        for term in tokenize(text):
+            tf[term] = tf.get(term, 0) + weight
+    return tf
+
+
+# ── Persistence ─────────────────────────────────────────────────────────────
+
+def _index_path(alch_dir: str | Path) -> Path:
+    return symbol_index.index_dir(alch_dir) / "bm25.json"
+
+
+def load_index(alch_dir: str | Path) -> dict:
+    try:
+        data = json.loads(_index_path(alch_dir).read_text())
+    except (OSError, ValueError):
+        return {"version": RETRIEVAL_VERSION, "files": {}}
+    if data.get("version") != RETRIEVAL_VERSION:
+        return {"version": RETRIEVAL_VERSION, "files": {}}
+    return data
+
+
+def save_index(alch_dir: str | Path, data: dict) -> None:
+    path = _index_path(alch_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(data, separators=(",", ":")))
+    os.replace(tmp, path)
+
+
+def update_index(project_path: str, files: list[str], symbols: "symbol_index.SymbolIndex") -> "BM25Index":
+    """Re-tokenise new/changed files among `files` (relative paths), persist. Returns the index."""
+    root = Path(project_path)
+    alch = root / ".alchemistral"
+    data = load_index(alch)
+    old: dict = data["files"]
+    new: dict = {}
+    parsed = 0
+
+    for rel in files:
+        try:
+            st = os.stat(root / rel)
+        except OSError:
+            continue
+        entry = old.get(rel)
+        if entry and entry["m"] == st.st_mtime_ns and entry["s"] == st.st_size:
+            new[rel] = entry
+            continue
+        sym = symbols.files.get(rel, {}).get("sym", [])
+        tf = _term_counts(rel, sym, _read_head(root / rel))
+        new[rel] = {"m": st.st_mtime_ns, "s": st.st_size, "n": sum(tf.values()), "tf": tf}
+        parsed += 1
+
+    data["files"] = new
+    if parsed or set(old) != set(new) or not _index_path(alch).exists():
+        if alch.is_dir():
+            save_index(alch, data)
+    logger.info(f"[retrieval] {len(new)} files indexed ({parsed} tokenised) for {project_path}")
+    _loaded.pop(str(_index_path(alch)), None)
+    return BM25Index(data)
+
+
+# ── Query API ───────────────────────────────────────────────────────────────
+
+class BM25Index:
+    """Okapi BM25 over documents given as {doc_id: {"n": length, "tf": {term: count}}}."""
+
+    def __init__(self, data: dict) -> None:
+        self.files: dict[str, dict] = data.get("files", {})
+        self._postings: dict[str, list[tuple[str, int]]] = {}
+        for rel, entry in self.files.items():
+            for term, count in entry["tf"].items():
+                self._postings.setdefault(term, []).append((rel, count))
+        total = sum(e["n"] for e in self.files.values())
+        self._avgdl = total / len(self.files) if self.files else 0.0
+
+    @classmethod
+    def load(cls, alch_dir: str | Path) -> "BM25Index":
+        """Load the persisted index, reusing the parsed copy while the file is unchanged."""
+        path = _index_path(alch_dir)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return cls({"files": {}})
+        cached = _loaded.get(str(path))
+        if cached and cached[0] == mtime:
+            return cached[1]
+        index = cls(load_index(alch_dir))
+        _loaded[str(path)] = (mtime, index)
+        return index
+
+    def search(self, query: str, k: int = RETRIEVAL_TOP_K) -> list[tuple[str, float]]:
+        """Top-k (doc_id, score) for the query, best first."""
+        n_docs = len(self.files)
+        if not n_docs:
+            return []
+        scores: dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for rel, tf in postings:
+                norm = _K1 * (1 - _B + _B * self.files[rel]["n"] / self._avgdl)
+                scores[rel] = scores.get(rel, 0.0) + idf * tf * (_K1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return ranked[:k]
+
+
+# Parsed indexes by bm25.json path → (mtime_ns, index)
+_loaded: dict[str, tuple[int, BM25Index]] = {}
+
+
+def _snippet(root: Path, rel: str, symbols: "symbol_index.SymbolIndex") -> str:
+    names = [s["name"] for s in symbols.symbols_in(rel) if not s["name"].startswith("_")]
+    lines = _read_head(root / rel).splitlines()[:_SNIPPET_LINES]
+    parts = [f"=== {rel} ==="]
+    if names:
+        parts.append("Symbols: " + ", ".join(names[:12]) + (", …" if len(names) > 12 else ""))
+    if lines:
+        parts.append("\n".join(lines))
+    return "\n".join(parts)
+
+
+def select_context(
+    project_path: str,
+    query: str,
+    k: int = RETRIEVAL_TOP_K,
+    char_budget: int = RETRIEVAL_CHAR_BUDGET,
+) -> str:
+    """
+    The files most relevant to `query` as snippets (path, symbols, first lines),
+    best first, within `char_budget` characters. Empty if nothing matches or
+    the project has not been scanned.
+    """
+    alch = Path(project_path) / ".alchemistral"
+    hits = BM25Index.load(alch).search(query, k)
+    if not hits:
+        return ""
+    symbols = symbol_index.SymbolIndex.load(alch)
+    root = Path(project_path)
+    out: list[str] = []
+    used = 0
+    for rel, _ in hits:
+        snippet = _snippet(root, rel, symbols)
+        remaining = char_budget - used
+        if len(snippet) > remaining:
+            if remaining >= _MIN_SNIPPET_CHARS:
+                out.append(snippet[:remaining].rsplit("\n", 1)[0])
+            break
+        out.append(snippet)
+        used += len(snippet) + 2
+    return "\n\n".join(out)
+
+
+def select_sections(text: str, query: str, char_budget: int) -> str:
+    """
+    Trim a markdown document to `char_budget` by keeping its preamble and the
+    `## ` sections most relevant to `query`, in their original order.
+    Documents already within budget are returned unchanged.
+    """
+    if len(text) <= char_budget:
+        return text
+    chunks = re.split(r"(?m)^(?=## )", text)
+    preamble, sections = (chunks[0], chunks[1:]) if not chunks[0].startswith("## ") else ("", chunks)
+    if not sections:
+        return text[:char_budget]
+
+    docs: dict[str, dict] = {}
+    for i, section in enumerate(sections):
+        tf: dict[str, int] = {}
+        for term in tokenize(section):
+            tf[term] = tf.get(term, 0) + 1
+        docs[str(i)] = {"n": sum(tf.values()), "tf": tf}
+    ranked = [int(i) for i, _ in BM25Index({"files": docs}).search(query, len(docs))]
+    # Sections with no matching term keep their document order, after the hits
+    ranked += [i for i in range(len(sections)) if i not in ranked]
+
+    budget = char_budget - len(preamble)
+    keep: list[int] = []
+    for i in ranked:
+        if len(sections[i]) <= budget:
+            keep.append(i)
+            budget -= len(sections[i])
+    dropped = len(sections) - len(keep)
+    result = preamble[:char_budget] + "".join(sections[i] for i in sorted(keep))
+    if dropped:
+        result = result.rstrip() + f"\n\n({dropped} less relevant section{'s' if dropped != 1 else ''} omitted)\n"
+    return result
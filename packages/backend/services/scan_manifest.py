@@ -0,0 +1,101 @@
+"""
+Scan manifest — persisted per-file fingerprints for incremental codebase rescans.
+
+Stored at .alchemistral/manifest.json:
+  {
+    "version": 1,
+    "summary_hash": "<sha256 of codebase-summary.md>",
+    "global_summary_hash": "<summary hash GLOBAL.md was last generated from>",
+    "files": {"src/app.py": {"size": 123, "mtime_ns": 1700000000000000000,
+                             "hash": "<blake2b>", "sample": "<cached header>"}}
+  }
+
+A file is only re-read when its (size, mtime_ns) changed; its content hash
+then decides whether it really changed (touch without edit keeps the cache).
+"""
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def empty_manifest() -> dict:
+    return {"version": MANIFEST_VERSION, "summary_hash": "", "global_summary_hash": "", "files": {}}
+
+
+def load_manifest(alch_dir: str | Path) -> dict:
+    """Load the manifest, or an empty one if missing, unreadable, or from another version."""
+    path = Path(alch_dir) / MANIFEST_NAME
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return empty_manifest()
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return empty_manifest()
+    data.setdefault("files", {})
+    return data
+
+
+def save_manifest(alch_dir: str | Path, manifest: dict) -> None:
+    """Write the manifest atomically (temp file + rename)."""
+    path = Path(alch_dir) / MANIFEST_NAME
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(manifest, separators=(",", ":")))
+    os.replace(tmp, path)
+
+
+def hash_file(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        while chunk := fh.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def refresh(project_path: str, files: list[str], manifest: dict) -> dict:
+    """
+    Bring manifest["files"] in line with the current file list.
+
+    Unchanged files keep their entry (and cached sample); files whose stat
+    changed are re-hashed, and lose their cached sample only if the hash
+    differs. Returns {"added": [...], "changed": [...], "removed": [...]}.
+    """
+    old: dict = manifest.get("files", {})
+    new: dict = {}
+    added: list[str] = []
+    changed: list[str] = []
+    root = Path(project_path)
+
+    for rel in files:
+        try:
+            st = os.stat(root / rel)
+        except OSError:
+            continue
+        entry = old.get(rel)
+        if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            new[rel] = entry
+            continue
+        try:
+            digest = hash_file(root / rel)
+        except OSError:
+            continue
+        if entry and entry.get("hash") == digest:
+            entry = {**entry, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        else:
+            (changed if entry else added).append(rel)
+            entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest}
+        new[rel] = entry
+
+    removed = [rel for rel in old if rel not in new]
+    manifest["files"] = new
+    return {"added": added, "changed": changed, "removed": removed}
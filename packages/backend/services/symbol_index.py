@@ -0,0 +1,424 @@
+"""
+Symbol Index — top-level symbols and the internal import graph of a project.
+
+Extracted per file for the stacks the scanner recognises:
+  - Python via `ast`
+  - JS/TS, Go and Rust via lightweight line-based regex tokenisers
+
+Stored compactly at .alchemistral/index/symbols.json and updated incrementally
+(files whose size and mtime are unchanged are not re-parsed):
+  {"version": 1, "files": {"src/app.py": {"m": mtime_ns, "s": size, "l": "py",
+      "sym": [["App", "class", 12], ...], "imp": ["fastapi", ".models"],
+      "dep": ["src/models.py"]}}}
+
+`imp` keeps raw import specifiers; `dep` holds those that resolve to files
+inside the project, which is what the importer queries walk.
+"""
+import ast
+import json
+import logging
+import os
+import posixpath
+import re
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+INDEX_MAX_FILES = int(os.getenv("SYMBOL_INDEX_MAX_FILES", "5000"))
+_MAX_FILE_BYTES = 512 * 1024  # larger files are almost always generated
+
+_LANGS: dict[str, str] = {
+    ".py": "py",
+    ".js": "js", ".jsx": "js", ".mjs": "js", ".cjs": "js", ".ts": "js", ".tsx": "js",
+    ".go": "go",
+    ".rs": "rs",
+}
+_JS_RESOLVE_SUFFIXES = (
+    "", ".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs",
+    "/index.ts", "/index.tsx", "/index.js", "/index.jsx",
+)
+
+_JS_SYMBOL_RE = re.compile(
+    r"^(?:export\s+(?:default\s+)?)?(?:declare\s+)?(?:async\s+)?"
+    r"(function\*?|class|const|let|var|interface|type|enum)\s+([A-Za-z_$][\w$]*)",
+    re.MULTILINE,
+)
+_JS_IMPORT_RE = re.compile(
+    r"""(?:^\s*import\s+(?:[\w*{}\s,$]+\s+from\s+)?|^\s*export\s+[\w*{}\s,$]+\s+from\s+|\brequire\(\s*|\bimport\(\s*)['"]([^'"]+)['"]""",
+    re.MULTILINE,
+)
+_GO_SYMBOL_RE = re.compile(
+    r"^(?:func\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)|type\s+([A-Za-z_]\w*)|(?:var|const)\s+([A-Za-z_]\w*))",
+    re.MULTILINE,
+)
+_GO_IMPORT_RE = re.compile(r'^\s*(?:import\s+)?(?:[\w.]+\s+)?"([^"]+)"\s*$', re.MULTILINE)
+_RS_SYMBOL_RE = re.compile(
+    r"^(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?(?:unsafe\s+)?"
+    r"(fn|struct|enum|trait|type|mod|const|static|macro_rules!)\s+([A-Za-z_]\w*)",
+    re.MULTILINE,
+)
+_RS_USE_RE = re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?use\s+([\w:]+)", re.MULTILINE)
+_RS_MOD_RE = re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?mod\s+(\w+)\s*;", re.MULTILINE)
+
+# Module-level boilerplate not worth listing in summaries
+_NOISE_SYMBOLS = {"logger", "log"}
+
+_JS_KINDS = {"function*": "function", "let": "var", "const": "const", "var": "var"}
+_GO_KINDS = ("func", "type", "var")
+
+
+def index_dir(alch_dir: str | Path) -> Path:
+    return Path(alch_dir) / "index"
+
+
+# ── Extraction ──────────────────────────────────────────────────────────────
+
+def _line_of(text: str, pos: int) -> int:
+    return text.count("\n", 0, pos) + 1
+
+
+def _extract_python(text: str) -> tuple[list[list], list[str]]:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return [], []
+    symbols: list[list] = []
+    imports: list[str] = []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            symbols.append([node.name, "function", node.lineno])
+        elif isinstance(node, ast.ClassDef):
+            symbols.append([node.name, "class", node.lineno])
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for t in targets:
+                if isinstance(t, ast.Name):
+                    symbols.append([t.id, "var", node.lineno])
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = "." * node.level + (node.module or "")
+            imports.append(base)
+            # `from pkg import mod` may name submodules — keep them as candidates
+            sep = "" if base.endswith(".") else "."
+            imports.extend(f"{base}{sep}{alias.name}" for alias in node.names if alias.name != "*")
+    return symbols, imports
+
+
+def _extract_js(text: str) -> tuple[list[list], list[str]]:
+    symbols = [
+        [m.group(2), _JS_KINDS.get(m.group(1), m.group(1)), _line_of(text, m.start())]
+        for m in _JS_SYMBOL_RE.finditer(text)
+    ]
+    imports = [m.group(1) for m in _JS_IMPORT_RE.finditer(text)]
+    return symbols, imports
+
+
+def _extract_go(text: str) -> tuple[list[list], list[str]]:
+    symbols = []
+    for m in _GO_SYMBOL_RE.finditer(text):
+        for kind, name in zip(_GO_KINDS, m.groups()):
+            if name:
+                symbols.append([name, kind, _line_of(text, m.start())])
+    return symbols, [m.group(1) for m in _GO_IMPORT_RE.finditer(text)]
+
+
+def _extract_rust(text: str) -> tuple[list[list], list[str]]:
+    symbols = [
+        [m.group(2), m.group(1).rstrip("!"), _line_of(text, m.start())]
+        for m in _RS_SYMBOL_RE.finditer(text)
+    ]
+    imports = [m.group(1) for m in _RS_USE_RE.finditer(text)]
+    imports.extend(f"self::{m.group(1)}" for m in _RS_MOD_RE.finditer(text))
+    return symbols, imports
+
+
+_EXTRACTORS = {"py": _extract_python, "js": _extract_js, "go": _extract_go, "rs": _extract_rust}
+
+
+def extract(path: Path, lang: str) -> tuple[list[list], list[str]]:
+    """Top-level symbols ([name, kind, line]) and raw import specifiers of one file."""
+    try:
+        text = path.read_text(errors="replace")
+    except OSError:
+        return [], []
+    return _EXTRACTORS[lang](text)
+
+
+# ── Import resolution ───────────────────────────────────────────────────────
+
+class _Resolver:
+    """Maps raw import specifiers to project files."""
+
+    def __init__(self, paths: list[str]) -> None:
+        self.paths = set(paths)
+        # dotted/`::` module suffix → path (None once ambiguous), for Python and Rust
+        self._py: dict[str, str | None] = {}
+        self._rs: dict[str, str | None] = {}
+        # Python: posix path → path, and each module's import root — the
+        # directory above its top-most package (a directory on sys.path)
+        self._posix: dict[str, str] = {}
+        self._py_root: dict[str, str] = {}
+        # Go package dir → files
+        self._go_dirs: dict[str, list[str]] = {}
+        for p in paths:
+            posix = p.replace(os.sep, "/")
+            lang = _LANGS.get(os.path.splitext(p)[1])
+            if lang == "py":
+                self._posix[posix] = p
+                parts = posix[:-3].split("/")
+                if parts[-1] == "__init__":
+                    parts = parts[:-1]
+                self._register(self._py, parts, p, ".")
+            elif lang == "rs":
+                parts = posix[:-3].split("/")
+                if parts[-1] in ("mod", "lib", "main"):
+                    parts = parts[:-1]
+                if parts and parts[0] == "src":
+                    parts = parts[1:]
+                self._register(self._rs, parts, p, "::")
+            elif lang == "go":
+                self._go_dirs.setdefault(os.path.dirname(posix), []).append(p)
+        for posix, p in self._posix.items():
+            root = posixpath.dirname(posix)
+            while root and f"{root}/__init__.py" in self._posix:
+                root = posixpath.dirname(root)
+            self._py_root[p] = root
+        self._py_roots = sorted(set(self._py_root.values()))
+
+    @staticmethod
+    def _register(table: dict[str, str | None], parts: list[str], path: str, sep: str) -> None:
+        """Register every suffix of a module path; a suffix two files share maps to None."""
+        for i in range(len(parts)):
+            key = sep.join(parts[i:])
+            table[key] = path if table.get(key, path) == path else None
+
+    def _py_file(self, root: str, module: str) -> str | None:
+        """The file of dotted `module` under import root `root`, if in the project."""
+        rel = "/".join(x for x in (root, module.replace(".", "/")) if x)
+        if not rel:
+            return None
+        return self._posix.get(rel + ".py") or self._posix.get(rel + "/__init__.py")
+
+    def resolve(self, importer: str, spec: str, lang: str) -> list[str]:
+        if lang == "py":
+            return self._resolve_python(importer, spec)
+        if lang == "js":
+            return self._resolve_js(importer, spec)
+        if lang == "go":
+            return self._resolve_go(spec)
+        if lang == "rs":
+            return self._resolve_rust(importer, spec)
+        return []
+
+    def _resolve_python(self, importer: str, spec: str) -> list[str]:
+        level = len(spec) - len(spec.lstrip("."))
+        module = spec[level:]
+        if level:
+            base = Path(importer).parent
+            for _ in range(level - 1):
+                base = base.parent
+            parts = [p for p in base.as_posix().split("/") if p not in ("", ".")]
+            hit = self._py_file("/".join(parts), module)
+            return [hit] if hit and hit != importer else []
+
+        # Absolute: the importer's own import root, then a package (not a
+        # loose script module like tools/logging.py) that only one other root
+        # has; anything else is stdlib or third-party
+        own = self._py_root.get(importer, "")
+        hit = self._py_file(own, module)
+        if hit is None:
+            hits = {
+                h for r in self._py_roots
+                if r != own and (h := self._py_file(r, module))
+                and ("." in module or h.endswith("__init__.py"))
+            }
+            hit = hits.pop() if len(hits) == 1 else None
+        if hit is None and "." in module:
+            # e.g. an installed-package path not rooted where we look; unique suffixes only
+            hit = self._py.get(module)
+        return [hit] if hit and hit != importer else []
+
+    def _resolve_js(self, importer: str, spec: str) -> list[str]:
+        if not spec.startswith("."):
+            return []  # package import
+        base = os.path.normpath(os.path.join(os.path.dirname(importer), spec))
+        for suffix in _JS_RESOLVE_SUFFIXES:
+            candidate = base + suffix.replace("/", os.sep)
+            if candidate in self.paths:
+                return [candidate]
+        return []
+
+    def _resolve_go(self, spec: str) -> list[str]:
+        for d, files in self._go_dirs.items():
+            if d and (spec == d or spec.endswith("/" + d)):
+                return files[:20]
+        return []
+
+    def _resolve_rust(self, importer: str, spec: str) -> list[str]:
+        parts = spec.split("::")
+        if parts and parts[0] == "self":
+            # `mod foo;` / `use self::foo` — child module of the importer
+            own = importer.replace(os.sep, "/")[:-3].split("/")
+            if own[-1] in ("mod", "lib", "main"):
+                own = own[:-1]
+            if own and own[0] == "src":
+                own = own[1:]
+            parts = own + parts[1:]
+        elif parts and parts[0] in ("crate", "super"):
+            parts = parts[1:]
+        # Trailing components may be items (fn/struct) — try the longest module path first
+        for end in range(len(parts), 0, -1):
+            hit = self._rs.get("::".join(parts[:end]))
+            if hit and hit != importer:
+                return [hit]
+        return []
+
+
+# ── Persistence / incremental update ────────────────────────────────────────
+
+def load_index(alch_dir: str | Path) -> dict:
+    path = index_dir(alch_dir) / "symbols.json"
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {"version": INDEX_VERSION, "files": {}}
+    if data.get("version") != INDEX_VERSION:
+        return {"version": INDEX_VERSION, "files": {}}
+    return data
+
+
+def save_index(alch_dir: str | Path, data: dict) -> None:
+    d = index_dir(alch_dir)
+    d.mkdir(parents=True, exist_ok=True)
+    tmp = d / "symbols.json.tmp"
+    tmp.write_text(json.dumps(data, separators=(",", ":")))
+    os.replace(tmp, d / "symbols.json")
+
+
+def update_index(project_path: str, files: list[str]) -> "SymbolIndex":
+    """
+    Re-parse new/changed source files among `files` (relative paths),
+    resolve imports, persist. Returns the index.
+    """
+    root = Path(project_path)
+    alch = root / ".alchemistral"
+    data = load_index(alch)
+    old: dict = data["files"]
+    new: dict = {}
+    parsed = 0
+
+    paths = [p for p in files if os.path.splitext(p)[1] in _LANGS]
+    for rel in paths:
+        try:
+            st = os.stat(root / rel)
+        except OSError:
+            continue
+        if st.st_size > _MAX_FILE_BYTES:
+            continue
+        entry = old.get(rel)
+        if entry and entry["m"] == st.st_mtime_ns and entry["s"] == st.st_size:
+            new[rel] = entry
+            continue
+        lang = _LANGS[os.path.splitext(rel)[1]]
+        symbols, imports = extract(root / rel, lang)
+        new[rel] = {"m": st.st_mtime_ns, "s": st.st_size, "l": lang, "sym": symbols, "imp": imports}
+        parsed += 1
+
+    # Resolution depends on the whole file set — cheap, so always recomputed
+    resolver = _Resolver(list(new))
+    for rel, entry in new.items():
+        deps: list[str] = []
+        for spec in entry["imp"]:
+            for hit in resolver.resolve(rel, spec, entry["l"]):
+                if hit not in deps:
+                    deps.append(hit)
+        entry["dep"] = deps
+
+    data["files"] = new
+    if parsed or set(old) != set(new) or not (index_dir(alch) / "symbols.json").exists():
+        if alch.is_dir():
+            save_index(alch, data)
+    logger.info(f"[symbol_index] {len(new)} files indexed ({parsed} parsed) for {project_path}")
+    return SymbolIndex(data)
+
+
+# ── Query API ───────────────────────────────────────────────────────────────
+
+class SymbolIndex:
+    """Read-only queries over a loaded index."""
+
+    def __init__(self, data: dict) -> None:
+        self.files: dict[str, dict] = data.get("files", {})
+        self._importers: dict[str, list[str]] = {}
+        for rel, entry in self.files.items():
+            for dep in entry.get("dep", []):
+                self._importers.setdefault(dep, []).append(rel)
+
+    @classmethod
+    def load(cls, alch_dir: str | Path) -> "SymbolIndex":
+        """Load the persisted index, reusing the parsed copy while the file is unchanged."""
+        path = index_dir(alch_dir) / "symbols.json"
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return cls({"files": {}})
+        cached = _loaded.get(str(path))
+        if cached and cached[0] == mtime:
+            return cached[1]
+        index = cls(load_index(alch_dir))
+        _loaded[str(path)] = (mtime, index)
+        return index
+
+    def find_symbols(self, query: str, limit: int = 50) -> list[dict]:
+        """Symbols whose name contains `query` (case-insensitive), exact matches first."""
+        q = query.lower()
+        hits: list[tuple[int, dict]] = []
+        for rel, entry in self.files.items():
+            for name, kind, line in entry.get("sym", []):
+                lname = name.lower()
+                if q in lname:
+                    rank = 0 if lname == q else 1 if lname.startswith(q) else 2
+                    hits.append((rank, {"name": name, "kind": kind, "path": rel, "line": line}))
+        hits.sort(key=lambda h: (h[0], h[1]["name"], h[1]["path"]))
+        return [h for _, h in hits[:limit]]
+
+    def symbols_in(self, path: str) -> list[dict]:
+        entry = self.files.get(path, {})
+        return [{"name": n, "kind": k, "line": ln} for n, k, ln in entry.get("sym", [])]
+
+    def imports_of(self, path: str) -> dict:
+        entry = self.files.get(path, {})
+        return {"internal": entry.get("dep", []), "raw": entry.get("imp", [])}
+
+    def importers_of(self, path: str) -> list[str]:
+        return sorted(self._importers.get(path, []))
+
+    def most_imported(self, limit: int = 15) -> list[tuple[str, int]]:
+        ranked = sorted(self._importers.items(), key=lambda kv: (-len(kv[1]), kv[0]))
+        return [(path, len(importers)) for path, importers in ranked[:limit]]
+
+    def key_modules(self, limit: int = 15, max_symbols: int = 8) -> str:
+        """Compact text block: most-imported modules with their top-level symbols."""
+        lines: list[str] = []
+        for path, count in self.most_imported(limit):
+            names = [
+                n for n, _, _ in self.files[path].get("sym", [])
+                if not n.startswith("_") and n not in _NOISE_SYMBOLS
+            ]
+            shown = ", ".join(names[:max_symbols]) + (", …" if len(names) > max_symbols else "")
+            lines.append(f"- {path} (imported by {count}): {shown or '—'}")
+        return "\n".join(lines)
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self.files),
+            "symbols": sum(len(e.get("sym", [])) for e in self.files.values()),
+            "edges": sum(len(e.get("dep", [])) for e in self.files.values()),
+        }
+
+
+# Parsed indexes by symbols.json path → (mtime_ns, index)
+_loaded: dict[str, tuple[int, SymbolIndex]] = {}
@@ -0,0 +1,214 @@
+"""
+Token Budget — fits prompt sections into a per-model token budget.
+
+Sections are kept by priority: task > contracts > domain memory > global
+memory > scan. A section that no longer fits whole is condensed — markdown
+documents keep every heading with an equal share of the budget, plain text is
+cut at a line boundary — and one left with less than _MIN_SECTION_TOKENS is
+dropped. The task itself is never cut.
+
+Token counts come from a fast offline estimator (no tokenizer download):
+words cost about one token per six letters, every other non-space character
+one token — slightly pessimistic for English and code, which is the safe side.
+
+Every fit is recorded per call site (see usage_stats / recent_usage).
+"""
+import logging
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_TASK = 0
+PRIORITY_CONTRACTS = 1
+PRIORITY_DOMAIN_MEMORY = 2
+PRIORITY_GLOBAL_MEMORY = 3
+PRIORITY_SCAN = 4
+
+# Input budgets in tokens — well under each model's context, to keep latency down
+MODEL_BUDGETS: dict[str, int] = {
+    "mistral-large-latest": int(os.getenv("TOKEN_BUDGET_LARGE", "48000")),
+    "mistral-small-latest": int(os.getenv("TOKEN_BUDGET_SMALL", "16000")),
+    "agent": int(os.getenv("TOKEN_BUDGET_AGENT", "24000")),  # CLI agent prompts
+}
+DEFAULT_BUDGET = int(os.getenv("TOKEN_BUDGET_DEFAULT", "16000"))
+
+_MIN_SECTION_TOKENS = 64
+_TRUNCATED_MARKER = "\n… [truncated to fit the prompt budget]"
+_WORD_RE = re.compile(r"[A-Za-z]+")
+_OTHER_RE = re.compile(r"[^\sA-Za-z]")
+_RECENT_MAX = 200
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of `text`."""
+    if not text:
+        return 0
+    words = sum((len(w) + 5) // 6 for w in _WORD_RE.findall(text))
+    return words + len(_OTHER_RE.findall(text))
+
+
+def budget_for(model: str) -> int:
+    return MODEL_BUDGETS.get(model, DEFAULT_BUDGET)
+
+
+@dataclass
+class Section:
+    name: str
+    text: str
+    priority: int
+
+
+@dataclass
+class BudgetUsage:
+    call_site: str
+    model: str
+    budget: int
+    used: int
+    # name → [estimated tokens before, after]
+    sections: dict[str, list[int]] = field(default_factory=dict)
+    truncated: list[str] = field(default_factory=list)
+    timestamp: float = field(default_factory=time.time)
+
+
+_recent: deque[BudgetUsage] = deque(maxlen=_RECENT_MAX)
+_totals: dict[str, dict[str, int]] = {}
+
+
+def _split_sections(text: str) -> list[str]:
+    return [c for c in re.split(r"(?m)^(?=#{1,3} )", text) if c]
+
+
+def _condense(text: str, max_tokens: int) -> str:
+    """
+    Shrink a markdown document section by section: every section keeps its
+    heading and an equal share of the budget (small sections stay whole and
+    hand their unused share to the others).
+    """
+    sections = _split_sections(text)
+    costs = [estimate_tokens(c) for c in sections]
+    shares = [0] * len(sections)
+    pending = sorted(range(len(sections)), key=lambda i: costs[i])
+    left = max_tokens
+    while pending:
+        share = left // len(pending)
+        i = pending[0]
+        if costs[i] > share:
+            break
+        shares[i] = costs[i]
+        left -= costs[i]
+        pending.pop(0)
+    for i in pending:
+        shares[i] = left // len(pending)
+    parts: list[str] = []
+    for chunk, cost, share in zip(sections, costs, shares):
+        if cost <= share:
+            parts.append(chunk)
+        else:
+            heading, _, body = chunk.partition("\n")
+            kept = truncate(body, share - estimate_tokens(heading) - 1)
+            parts.append(f"{heading}\n{kept}\n" if kept else f"{heading}\n")
+    return "".join(parts)
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """Cut `text` at a line (or word) boundary so it, with the marker, fits `max_tokens`."""
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    limit = max_tokens - estimate_tokens(_TRUNCATED_MARKER)
+    if limit <= 0:
+        return ""
+    # Scale by the text's own chars-per-token, then tighten until it fits
+    cut = int(len(text) * limit / tokens)
+    while cut > 0:
+        head = text[:cut]
+        # Prefer a line boundary, unless that would throw away most of the head
+        line_end = head.rfind("\n")
+        if line_end >= cut // 2:
+            head = head[:line_end]
+        elif " " in head:
+            head = head.rsplit(" ", 1)[0]
+        if estimate_tokens(head) <= limit:
+            return head + _TRUNCATED_MARKER
+        cut = int(cut * 0.9)
+    return ""
+
+
+def _shrink(text: str, max_tokens: int) -> str:
+    if len(_split_sections(text)) > 1:
+        condensed = _condense(text, max_tokens)
+        if estimate_tokens(condensed) <= max_tokens:
+            return condensed
+    return truncate(text, max_tokens)
+
+
+def fit(call_site: str, model: str, sections: list[Section], reserve: int = 0) -> dict[str, str]:
+    """
+    Fit sections into the model's budget minus `reserve` (fixed prompt text).
+
+    Returns {section name: text to use} — unchanged, condensed, truncated or ""
+    — and records the usage under `call_site`.
+    """
+    budget = budget_for(model)
+    remaining = budget - reserve
+    usage = BudgetUsage(call_site=call_site, model=model, budget=budget, used=reserve)
+    fitted: dict[str, str] = {}
+
+    for section in sorted(sections, key=lambda s: s.priority):
+        tokens = estimate_tokens(section.text)
+        if tokens <= remaining or section.priority == PRIORITY_TASK:
+            text = section.text
+        elif remaining >= _MIN_SECTION_TOKENS:
+            text = _shrink(section.text, remaining)
+            usage.truncated.append(section.name)
+        else:
+            text = ""
+            usage.truncated.append(section.name)
+        kept = estimate_tokens(text) if text is not section.text else tokens
+        remaining -= kept
+        usage.used += kept
+        usage.sections[section.name] = [tokens, kept]
+        fitted[section.name] = text
+
+    _record(usage)
+    return fitted
+
+
+def _record(usage: BudgetUsage) -> None:
+    _recent.append(usage)
+    t = _totals.setdefault(usage.call_site, {"calls": 0, "truncated_calls": 0, "tokens_used": 0, "max_used": 0})
+    t["calls"] += 1
+    t["tokens_used"] += usage.used
+    t["max_used"] = max(t["max_used"], usage.used)
+    if usage.truncated:
+        t["truncated_calls"] += 1
+        logger.info(
+            f"[token_budget] {usage.call_site}: {usage.used}/{usage.budget} tokens "
+            f"({usage.model}), shrunk: {', '.join(usage.truncated)}"
+        )
+
+
+def usage_stats() -> dict[str, dict[str, int]]:
+    """Per call site: calls, truncated_calls, tokens_used (sum) and max_used."""
+    return {site: dict(t) for site, t in _totals.items()}
+
+
+def recent_usage(limit: int = 50) -> list[dict]:
+    """The most recent fits, newest first."""
+    items = list(_recent)[-limit:][::-1]
+    return [
+        {
+            "call_site": u.call_site,
+            "model": u.model,
+            "budget": u.budget,
+            "used": u.used,
+            "sections": u.sections,
+            "truncated": u.truncated,
+            "timestamp": u.timestamp,
+        }
+        for u in items
+    ]
@@ -0,0 +1,183 @@
+"""
+Tracing — per-mission span timeline, exported as Chrome trace-event JSON.
+
+A mission (see pipeline.run_mission) opens a MissionTrace in a contextvar;
+every span opened while it runs — in the pipeline task or in tasks and
+threads started from it — lands in that trace:
+
+    with tracing.span("reprompt"):
+        ...
+
+    @tracing.traced("create_worktree")
+    async def create_worktree(...): ...
+
+Spans are drawn on lanes (Chrome "threads"): the pipeline itself, and one
+lane per agent (set_lane), so concurrent agents do not overlap in the view.
+The last TRACE_KEEP_MISSIONS traces are kept in memory; open one in
+https://ui.perfetto.dev or chrome://tracing.
+
+Disabled (MISSION_TRACING=false), traced() returns the function unchanged
+and span() a shared no-op context manager.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+
+TRACING_ENABLED = os.getenv("MISSION_TRACING", "true").lower() == "true"
+TRACE_KEEP_MISSIONS = int(os.getenv("TRACE_KEEP_MISSIONS", "20"))
+
+_MAIN_LANE = "pipeline"
+_NOOP = nullcontext()
+
+
+class MissionTrace:
+    def __init__(self, mission_id: str, project_id: str, label: str) -> None:
+        self.mission_id = mission_id
+        self.project_id = project_id
+        self.label = label
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self._t0 = time.perf_counter_ns()
+        self._end = self._t0
+        self._lanes: dict[str, int] = {_MAIN_LANE: 1}
+        self._events: list[dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, lane: str, start_ns: int, end_ns: int, args: dict) -> None:
+        with self._lock:
+            tid = self._lanes.setdefault(lane, len(self._lanes) + 1)
+            self._events.append({
+                "name": name,
+                "ph": "X",
+                "ts": (start_ns - self._t0) / 1000,
+                "dur": (end_ns - start_ns) / 1000,
+                "pid": 1,
+                "tid": tid,
+                "args": args,
+            })
+            self._end = max(self._end, end_ns)
+
+    def to_chrome(self) -> dict:
+        """Chrome trace-event format (JSON object form)."""
+        with self._lock:
+            meta = [{
+                "name": "process_name", "ph": "M", "pid": 1, "tid": 0,
+                "args": {"name": f"mission {self.mission_id}: {self.label}"},
+            }]
+            meta += [
+                {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": lane}}
+                for lane, tid in self._lanes.items()
+            ]
+            events = sorted(self._events, key=lambda e: e["ts"])
+        return {
+            "traceEvents": meta + events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "mission_id": self.mission_id,
+                "project_id": self.project_id,
+                "started_at": self.started_at,
+            },
+        }
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "mission_id": self.mission_id,
+                "project_id": self.project_id,
+                "label": self.label,
+                "started_at": self.started_at,
+                "duration_ms": round((self._end - self._t0) / 1e6, 1),
+                "spans": len(self._events),
+            }
+
+
+_current: ContextVar[MissionTrace | None] = ContextVar("mission_trace", default=None)
+_lane: ContextVar[str] = ContextVar("trace_lane", default=_MAIN_LANE)
+_traces: OrderedDict[str, MissionTrace] = OrderedDict()
+
+
+class _Span:
+    __slots__ = ("_trace", "_name", "_lane", "_args", "_token", "_start")
+
+    def __init__(self, trace: MissionTrace, name: str, lane: str | None, args: dict) -> None:
+        self._trace = trace
+        self._name = name
+        self._lane = lane
+        self._args = args
+        self._token = None
+
+    def __enter__(self) -> "_Span":
+        if self._lane:
+            self._token = _lane.set(self._lane)
+        else:
+            self._lane = _lane.get()
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self._args["error"] = exc_type.__name__
+        self._trace.add(self._name, self._lane, self._start, end, self._args)
+        if self._token is not None:
+            _lane.reset(self._token)
+
+
+def start_mission(mission_id: str, project_id: str, label: str) -> MissionTrace | None:
+    """Open a trace for the mission running in the current task (None when disabled)."""
+    if not TRACING_ENABLED:
+        return None
+    trace = MissionTrace(mission_id, project_id, label)
+    _traces[mission_id] = trace
+    while len(_traces) > TRACE_KEEP_MISSIONS:
+        _traces.popitem(last=False)
+    _current.set(trace)
+    return trace
+
+
+def span(name: str, lane: str | None = None, **args):
+    """Time a block as a span of the current mission (no-op outside a mission)."""
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name, lane, args)
+
+
+def set_lane(lane: str) -> None:
+    """Draw the rest of the current task's spans on `lane` (e.g. an agent id)."""
+    if _current.get() is not None:
+        _lane.set(lane)
+
+
+def traced(name: str | None = None):
+    """Decorator: run every call of an async function in a span."""
+    def decorator(fn):
+        if not TRACING_ENABLED:
+            return fn
+        span_name = name or fn.__name__
+
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return await fn(*args, **kwargs)
+            with _Span(trace, span_name, None, {}):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_trace(mission_id: str) -> MissionTrace | None:
+    return _traces.get(mission_id)
+
+
+def list_traces(project_id: str | None = None) -> list[dict]:
+    """Summaries of the kept traces, newest first."""
+    return [
+        t.summary() for t in reversed(_traces.values())
+        if project_id is None or t.project_id == project_id
+    ]
@@ -4,23 +4,18 @@ Git Worktree Manager — create, list, and remove isolated worktrees for agents.
 Each agent gets its own worktree under .worktrees/ in the project root,
 checked out to a dedicated branch. All worktrees share the same .git history.
 """
-import asyncio
 import logging
 from pathlib import Path
 
+from services import tracing
+from services.git_runner import git_runner
+
 logger = logging.getLogger(__name__)
 
 
 async def _run_git(cwd: str, *args: str) -> tuple[int, str, str]:
     """Run a git command and return (returncode, stdout, stderr)."""
-    proc = await asyncio.create_subprocess_exec(
-        "git", *args,
-        cwd=cwd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, stderr = await proc.communicate()
-    return proc.returncode, stdout.decode(), stderr.decode()
+    return await git_runner.run(cwd, *args)
 
 
 async def _ensure_head(project_path: str) -> None:
@@ -37,6 +32,7 @@ async def _ensure_head(project_path: str) -> None:
             raise RuntimeError(f"Failed to create initial commit: {err2}")
 
 
+@tracing.traced()
 async def create_worktree(project_path: str, agent_id: str) -> str:
     """
     Create a git worktree for an agent.
@@ -93,8 +89,12 @@ async def list_worktrees(project_path: str) -> list[dict]:
     return worktrees
 
 
-async def remove_worktree(project_path: str, agent_id: str) -> None:
-    """Remove an agent's worktree and its branch."""
+async def remove_worktree(
+    project_path: str,
+    agent_id: str,
+    delete_branch: bool = True,
+) -> None:
+    """Remove an agent's worktree and (unless delete_branch=False) its branch."""
     wt_dir = Path(project_path) / ".worktrees" / agent_id
     branch = f"agent/{agent_id}"
 
@@ -107,11 +107,12 @@ async def remove_worktree(project_path: str, agent_id: str) -> None:
             logger.warning(f"git worktree remove failed: {err}")
 
     # Clean up the branch
-    rc, out, err = await _run_git(
-        project_path,
-        "branch", "-D", branch,
-    )
-    if rc != 0:
-        logger.debug(f"Branch cleanup {branch}: {err.strip()}")
+    if delete_branch:
+        rc, out, err = await _run_git(
+            project_path,
+            "branch", "-D", branch,
+        )
+        if rc != 0:
+            logger.debug(f"Branch cleanup {branch}: {err.strip()}")
 
     logger.info(f"Removed worktree {wt_dir}")
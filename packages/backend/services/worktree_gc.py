@@ -0,0 +1,271 @@
+"""
+Worktree GC — prunes the worktrees and agent/* branches finished agents leave behind.
+
+Every spawn creates .worktrees/<agent_id> on branch agent/<agent_id>; nothing
+removes them until the project is deleted. The collector sweeps a project and:
+  1. removes worktrees (and branches) already merged into main/master
+  2. removes worktrees (and branches) older than the retention age
+  3. evicts the oldest remaining worktrees beyond the count cap or disk budget
+     (the branch is kept so unmerged work is never lost)
+  4. runs `git worktree prune` and deletes the branches of 1–2 together with
+     leftover merged/stale agent branches, in one update-ref transaction
+
+Worktrees of running agents — and agents that finished within the grace
+period, whose work the DAG executor may still be committing — are never touched.
+"""
+import asyncio
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from services.agent_manager import agent_manager
+from services.alchemistral import load_projects
+from services.git_runner import git_runner
+from services.worktree import _run_git, remove_worktree
+
+logger = logging.getLogger(__name__)
+
+GC_INTERVAL = int(os.getenv("WORKTREE_GC_INTERVAL", "600"))  # seconds, 0 disables the loop
+
+_RUNNING_STATUSES = {"pending", "spawning", "active", "validating"}
+
+
+@dataclass
+class RetentionPolicy:
+    """How long and how much agent worktree state to keep per project."""
+    max_age_hours: float = 24.0
+    max_count: int = 10
+    disk_budget_mb: int = 2048
+    grace_seconds: int = 300
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        return cls(
+            max_age_hours=float(os.getenv("WORKTREE_MAX_AGE_HOURS", "24")),
+            max_count=int(os.getenv("WORKTREE_MAX_COUNT", "10")),
+            disk_budget_mb=int(os.getenv("WORKTREE_DISK_BUDGET_MB", "2048")),
+            grace_seconds=int(os.getenv("WORKTREE_GC_GRACE_SECONDS", "300")),
+        )
+
+
+def _dir_size(path: str) -> int:
+    """Disk usage of a directory tree in bytes (does not follow symlinks)."""
+    total = 0
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    total += st.st_blocks * 512 if hasattr(st, "st_blocks") else st.st_size
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except OSError:
+            continue
+    return total
+
+
+def _protected_agents(grace_seconds: int) -> set[str]:
+    """Agent ids whose worktrees must not be collected."""
+    protected: set[str] = set()
+    now = time.time()
+    for proj_agents in agent_manager._agents.values():
+        for agent_id, state in proj_agents.items():
+            if state.status in _RUNNING_STATUSES:
+                protected.add(agent_id)
+                continue
+            if state.completed_at:
+                try:
+                    finished = datetime.fromisoformat(state.completed_at).timestamp()
+                except ValueError:
+                    protected.add(agent_id)
+                    continue
+                if now - finished < grace_seconds:
+                    protected.add(agent_id)
+    return protected
+
+
+async def _base_branch(project_path: str) -> str | None:
+    for name in ("main", "master"):
+        rc, _, _ = await _run_git(project_path, "rev-parse", "--verify", "--quiet", f"refs/heads/{name}")
+        if rc == 0:
+            return name
+    return None
+
+
+async def _agent_branches(project_path: str) -> dict[str, float]:
+    """Map agent/* branch name → last commit time (unix seconds)."""
+    rc, out, err = await _run_git(
+        project_path,
+        "for-each-ref", "--format=%(refname:short) %(committerdate:unix)", "refs/heads/agent/",
+    )
+    if rc != 0:
+        logger.warning(f"[worktree_gc] for-each-ref failed in {project_path}: {err.strip()}")
+        return {}
+    branches: dict[str, float] = {}
+    for line in out.splitlines():
+        name, _, ts = line.rpartition(" ")
+        if name:
+            branches[name] = float(ts or 0)
+    return branches
+
+
+async def _merged_branches(project_path: str, base: str | None) -> set[str]:
+    if not base:
+        return set()
+    rc, out, _ = await _run_git(project_path, "branch", "--merged", base, "--list", "agent/*")
+    if rc != 0:
+        return set()
+    return {line.strip().lstrip("*+ ").strip() for line in out.splitlines() if line.strip()}
+
+
+async def collect_project(
+    project_path: str,
+    policy: RetentionPolicy | None = None,
+    protected: set[str] | None = None,
+) -> dict:
+    """
+    Run one GC pass over a project.
+
+    Returns a report: removed worktrees, deleted branches, reclaimed bytes.
+    """
+    policy = policy or RetentionPolicy.from_env()
+    if protected is None:
+        protected = _protected_agents(policy.grace_seconds)
+
+    report: dict = {
+        "project_path": project_path,
+        "removed_worktrees": [],
+        "deleted_branches": [],
+        "reclaimed_bytes": 0,
+    }
+    if not (Path(project_path) / ".git").exists():
+        return report
+
+    base = await _base_branch(project_path)
+    branches = await _agent_branches(project_path)
+    merged = await _merged_branches(project_path, base)
+    now = time.time()
+    max_age = policy.max_age_hours * 3600
+
+    # ── Candidate worktrees ──
+    wt_root = Path(project_path) / ".worktrees"
+    candidates: list[dict] = []
+    if wt_root.is_dir():
+        for entry in os.scandir(wt_root):
+            if not entry.is_dir(follow_symlinks=False) or entry.name in protected:
+                continue
+            branch = f"agent/{entry.name}"
+            try:
+                mtime = entry.stat(follow_symlinks=False).st_mtime
+            except OSError:
+                mtime = now
+            candidates.append({
+                "agent_id": entry.name,
+                "path": entry.path,
+                "branch": branch,
+                "age": now - max(mtime, branches.get(branch, 0.0)),
+                "size": await asyncio.to_thread(_dir_size, entry.path),
+            })
+
+    doomed_branches: list[str] = []
+
+    async def _remove(wt: dict, delete_branch: bool, reason: str) -> None:
+        # Branches are deleted together at the end, in one transaction
+        await remove_worktree(project_path, wt["agent_id"], delete_branch=False)
+        if Path(wt["path"]).exists():
+            # Not registered with git (e.g. metadata already pruned) — drop the directory
+            await asyncio.to_thread(shutil.rmtree, wt["path"], True)
+        report["removed_worktrees"].append({"agent_id": wt["agent_id"], "reason": reason})
+        report["reclaimed_bytes"] += wt["size"]
+        if delete_branch and wt["branch"] in branches:
+            doomed_branches.append(wt["branch"])
+            branches.pop(wt["branch"], None)
+        logger.info(f"[worktree_gc] Removed {wt['path']} ({reason}, {wt['size']} bytes)")
+
+    # 1–2. Merged or stale: worktree and branch both go
+    kept: list[dict] = []
+    for wt in candidates:
+        if wt["branch"] in merged:
+            await _remove(wt, delete_branch=True, reason="merged")
+        elif wt["age"] > max_age:
+            await _remove(wt, delete_branch=True, reason="stale")
+        else:
+            kept.append(wt)
+
+    # 3. Count cap and disk budget — evict oldest checkouts, keep their branches
+    kept.sort(key=lambda w: w["age"], reverse=True)
+    budget = policy.disk_budget_mb * 1024 * 1024
+    protected_count = sum(1 for name in protected if (wt_root / name).is_dir())
+    total = sum(w["size"] for w in kept)
+    while kept:
+        if len(kept) + protected_count > policy.max_count:
+            reason = "count"
+        elif total > budget:
+            reason = "disk_budget"
+        else:
+            break
+        wt = kept.pop(0)
+        total -= wt["size"]
+        await _remove(wt, delete_branch=False, reason=reason)
+
+    # 4. Prune worktree metadata, then drop leftover merged/stale agent branches
+    await _run_git(project_path, "worktree", "prune")
+    live = {f"agent/{name}" for name in protected} | {w["branch"] for w in kept}
+    doomed_branches += [
+        branch for branch, committed in branches.items()
+        if branch not in live
+        and not (wt_root / branch.removeprefix("agent/")).exists()
+        and (branch in merged or now - committed > max_age)
+    ]
+    if doomed_branches:
+        rc, _, err = await git_runner.delete_branches(project_path, doomed_branches)
+        if rc == 0:
+            report["deleted_branches"] = doomed_branches
+        else:
+            logger.warning(f"[worktree_gc] Branch cleanup failed: {err.strip()}")
+
+    return report
+
+
+async def collect_all(policy: RetentionPolicy | None = None) -> list[dict]:
+    """Run one GC pass over every registered project."""
+    policy = policy or RetentionPolicy.from_env()
+    protected = _protected_agents(policy.grace_seconds)
+    reports: list[dict] = []
+    for project in load_projects():
+        local_path = project.get("local_path", "")
+        if not local_path or not Path(local_path).exists():
+            continue
+        try:
+            report = await collect_project(local_path, policy, protected)
+        except Exception as exc:
+            logger.warning(f"[worktree_gc] GC failed for {local_path}: {exc}")
+            continue
+        report["project_id"] = project["id"]
+        reports.append(report)
+    return reports
+
+
+async def gc_loop(interval: int = GC_INTERVAL) -> None:
+    """Background loop — sweeps all projects every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            reports = await collect_all()
+        except Exception as exc:
+            # One failed sweep must not end the loop for the rest of the process
+            logger.error(f"[worktree_gc] Sweep failed: {exc}", exc_info=True)
+            continue
+        reclaimed = sum(r["reclaimed_bytes"] for r in reports)
+        removed = sum(len(r["removed_worktrees"]) for r in reports)
+        if removed or any(r["deleted_branches"] for r in reports):
+            logger.info(f"[worktree_gc] Removed {removed} worktree(s), reclaimed {reclaimed} bytes")
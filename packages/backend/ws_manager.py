@@ -4,9 +4,17 @@ WebSocket connection manager — shared singleton used by main.py and routers.
 import logging
 from fastapi import WebSocket
 
+from services import metrics
+
 logger = logging.getLogger(__name__)
 
 
+_FRAMES = metrics.counter("alchemistral_ws_frames_total", "WebSocket frames sent")
+_DROPPED_FRAMES = metrics.counter(
+    "alchemistral_ws_dropped_frames_total", "WebSocket frames that could not be sent (client dropped)",
+)
+
+
 class ConnectionManager:
     def __init__(self) -> None:
         self.active: list[WebSocket] = []
@@ -24,10 +32,13 @@ class ConnectionManager:
         for ws in self.active:
             try:
                 await ws.send_json(message)
+                _FRAMES.inc()
             except Exception:
+                _DROPPED_FRAMES.inc()
                 disconnected.append(ws)
         for ws in disconnected:
             self.disconnect(ws)
 
 
 manager = ConnectionManager()
+metrics.gauge("alchemistral_ws_clients", "Connected WebSocket clients").set_function(lambda: len(manager.active))